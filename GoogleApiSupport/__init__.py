@@ -1 +1,17 @@
-name = 'google-api-support'
\ No newline at end of file
+import importlib
+
+name = 'google-api-support'
+
+_submodules = ('aio', 'apis', 'auth', 'batch', 'credential_pool', 'deadline', 'downloads', 'drive', 'drive_index',
+               'drive_sync', 'execution', 'file_lock', 'instrumentation', 'path_resolver', 'rate_limit',
+               'response_cache', 'sheets', 'slides', 'spreadsheets', 'storage', 'token_refresh', 'transport',
+               'uploads')
+
+
+def __getattr__(attribute):
+    # Submodules are imported on first access, so `import GoogleApiSupport` costs nothing
+    if attribute in _submodules:
+        return importlib.import_module(f'{__name__}.{attribute}')
+    if attribute == 'trace':
+        return importlib.import_module(f'{__name__}.instrumentation').trace
+    raise AttributeError(f"module {__name__!r} has no attribute {attribute!r}")
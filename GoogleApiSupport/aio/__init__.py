@@ -0,0 +1,11 @@
+"""Asyncio versions of the main drive, slides and spreadsheets functions.
+
+Requests are built by the same services `auth.get_service` returns, so arguments and
+responses match the blocking modules, and are sent with a shared `httpx.AsyncClient` per
+event loop. Services are built in the executor of the loop, see `transport`. Reads are not
+answered from `response_cache`. Needs the `aio` extra: `pip install google-api-support[aio]`.
+
+    from GoogleApiSupport.aio import drive
+
+    new_file_ids = await asyncio.gather(*[drive.copy_file(template_id, name) for name in names])
+"""
@@ -0,0 +1,173 @@
+"""Asyncio versions of the functions in `GoogleApiSupport.drive`."""
+
+import asyncio
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import drive
+from GoogleApiSupport.aio.transport import execute, get_service
+
+
+async def retrieve_permissions(file_id, fields='permissions(id,type,role,emailAddress,domain)', **kwargs):
+    """Retrieve a list of permissions.
+    Args:
+    file_id: ID of the file to retrieve permissions for.
+    fields: Field mask of the response, '*' returns every attribute of the permissions.
+    Returns:
+    List of permissions.
+    """
+    service = await get_service("drive")
+    permissions = await execute(service.permissions().list(fileId=file_id, fields=fields, **kwargs))
+    return permissions.get('permissions', [])
+
+
+async def insert_permission(file_id, perm_type, role, email_address=None, domain=None, **kwargs):
+    """Insert a new permission.
+    Args:
+    file_id: ID of the file to insert permission for.
+    perm_type: The value 'user', 'group', 'domain', 'anyone' or 'default'.
+    role: The value 'owner', 'writer' or 'reader'.
+    email_address: User or group e-mail address (needed if perm_type is 'user' or 'group')
+    domain: Domain name (needed if perm_type is 'domain')
+    Returns:
+    The inserted permission.
+    """
+    service = await get_service("drive")
+    new_permission = {
+        'type': perm_type,
+        'role': role,
+        'emailAddress': email_address,
+        'domain': domain
+    }
+    return await execute(service.permissions().create(fileId=file_id, body=new_permission, **kwargs))
+
+
+async def copy_permissions(start_file_id, end_file_id, **kwargs):
+    """Copy the permissions of one file that another one lacks, inserting all of them concurrently.
+    Args:
+    start_file_id: ID of the file to retrieve permissions for.
+    end_file_id: ID of the file to insert permission for.
+    Returns:
+    A list of `drive.PermissionGrant`, one for every permission of the start file.
+    """
+    from googleapiclient import errors
+
+    with auth.single_pool_member():
+        retrieve_fields = kwargs.get('fields', 'permissions(id,type,role,emailAddress,domain)')
+        supports_all_drives = kwargs.get('supportsAllDrives', False)
+        transfer_ownership = kwargs.get('transferOwnership', False)
+        send_notification_email = kwargs['sendNotificationEmail'] if 'sendNotificationEmail' in kwargs and transfer_ownership == False else True
+
+        service = await get_service("drive")
+        start_permissions, end_permissions = await asyncio.gather(*[
+            execute(service.permissions().list(fileId=file_id, fields=retrieve_fields,
+                                               supportsAllDrives=supports_all_drives))
+            for file_id in (start_file_id, end_file_id)])
+        plan = drive.plan_permission_copy(start_permissions.get('permissions', []),
+                                          end_permissions.get('permissions', []),
+                                          transfer_ownership)
+
+        missing = [permission for permission, existing in plan if existing is None]
+        inserted = iter(await asyncio.gather(*[
+            insert_permission(file_id=end_file_id,
+                              perm_type=permission['type'],
+                              role=permission['role'],
+                              email_address=permission['emailAddress'],
+                              domain=permission['domain'],
+                              supportsAllDrives=supports_all_drives,
+                              transferOwnership=transfer_ownership,
+                              sendNotificationEmail=send_notification_email)
+            for permission in missing], return_exceptions=True))
+
+        results = []
+        for permission, existing in plan:
+            if existing is not None:
+                results.append(drive.PermissionGrant(permission, 'existing', existing, None))
+                continue
+            result = next(inserted)
+            if isinstance(result, errors.HttpError):
+                results.append(drive.PermissionGrant(permission, 'failed', None, result))
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                results.append(drive.PermissionGrant(permission, 'created', result, None))
+        return results
+
+
+async def get_file_name(file_id):
+    service = await get_service("drive")
+    return await execute(service.files().get(fileId=file_id, fields='name'))
+
+
+async def move_file(file_id, folder_destination_id):
+    service = await get_service("drive")
+    file = await execute(service.files().get(fileId=file_id,
+                                             fields='parents',
+                                             supportsAllDrives=True))
+
+    previous_parents = ",".join(file.get('parents'))
+
+    return await execute(service.files().update(fileId=file_id,
+                                                addParents=folder_destination_id,
+                                                removeParents=previous_parents,
+                                                supportsAllDrives=True,
+                                                fields='id, parents'))
+
+
+async def delete_file(file_id, **kwargs):
+    service = await get_service("drive")
+    return await execute(service.files().delete(fileId=file_id, **kwargs))
+
+
+async def copy_file(file_from_id, new_file_name='', supports_all_drives=False, transfer_permissions=False, **kwargs):
+    """
+    By passing an old file id, creates a copy and returns the id of the file copy
+    Set transfer_permissions to True if you want to transfer the permissions from the old file to the new file
+    """
+    with auth.single_pool_member():
+        service = await get_service("drive")
+        drive_response = await execute(service.files().copy(fileId=file_from_id,
+                                                            body={'name': new_file_name},
+                                                            supportsAllDrives=supports_all_drives))
+
+        new_file_id = drive_response.get('id')
+
+        if transfer_permissions:
+            await copy_permissions(start_file_id=file_from_id,
+                                   end_file_id=new_file_id,
+                                   supportsAllDrives=supports_all_drives,
+                                   **kwargs)
+
+        return new_file_id
+
+
+async def iter_files(q, fields='files(id,name,mimeType)', page_size=drive.PAGE_SIZE, **kwargs):
+    """Yields the files matching a query, following the pages of the results as they are consumed.
+    See `GoogleApiSupport.drive.iter_files`."""
+    service = await get_service("drive")
+    if 'nextPageToken' not in fields:
+        fields = f'nextPageToken,{fields}'
+    page_token = None
+    while True:
+        response = await execute(service.files().list(q=q, fields=fields, pageSize=page_size, pageToken=page_token,
+                                                      **kwargs))
+        for file in response.get('files', []):
+            yield file
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def iter_files_in_folder(parent_folder, fields='files(id,name,mimeType)', **kwargs):
+    return iter_files(f"'{parent_folder}' in parents", fields=fields, **kwargs)
+
+
+def iter_folders_in_folder(parent_folder, fields='files(id,name,mimeType)', **kwargs):
+    return iter_files(f"mimeType='{drive.FOLDER_MIME_TYPE}' and '{parent_folder}' in parents", fields=fields, **kwargs)
+
+
+async def folders_in_folder(parent_folder, fields='files(id,name,mimeType)'):
+    return [folder async for folder in iter_folders_in_folder(parent_folder, fields=fields)]
+
+
+async def files_in_folder(parent_folder, fields='files(id,name,mimeType)'):
+    return [file async for file in iter_files_in_folder(parent_folder, fields=fields)]
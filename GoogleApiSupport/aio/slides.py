@@ -0,0 +1,29 @@
+"""Asyncio versions of the functions in `GoogleApiSupport.slides`."""
+
+from GoogleApiSupport import slides
+from GoogleApiSupport.aio.transport import execute, get_service
+
+
+async def get_presentation_info(presentation_id, fields=None):
+    service = await get_service("slides")
+    return await execute(service.presentations().get(presentationId=presentation_id, fields=fields))
+
+
+async def get_presentation_slides(presentation_id, fields='slides'):
+    presentation = await get_presentation_info(presentation_id, fields=fields)
+    return presentation.get('slides')
+
+
+async def execute_batch_update(requests, presentation_id, additional_apis=[]):
+    service = await get_service("slides", additional_apis=additional_apis)
+    return await execute(service.presentations().batchUpdate(presentationId=presentation_id,
+                                                             body={'requests': requests}))
+
+
+async def text_replace(old: str, new: str, presentation_id: str, pages=None):
+    return await batch_text_replace({old: new}, presentation_id, pages)
+
+
+async def batch_text_replace(text_mapping: dict, presentation_id: str, pages=None):
+    """Given a list of tuples with replacement pairs this function replace it all"""
+    return await execute_batch_update(slides._text_replace_requests(text_mapping, pages), presentation_id)
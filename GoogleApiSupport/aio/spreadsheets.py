@@ -0,0 +1,96 @@
+"""Asyncio versions of the functions in `GoogleApiSupport.spreadsheets`."""
+
+from GoogleApiSupport import spreadsheets
+from GoogleApiSupport.aio.transport import execute, get_service
+
+
+async def get_info(spreadsheet_id, include_grid_data=False, fields=None):
+    """Returns an spreadsheet info object
+
+    Args:
+        spreadsheet_id (str): The id from the Spreadsheet. Long string with letters, numbers and characters
+        include_grid_data (bool): Passed to False, the function does not query the spreadsheet data, only the document information.
+        fields (str, optional): Field mask of the response, such as 'sheets.properties.title'. Defaults to None, the whole resource.
+    Returns:
+        dict: Object with a lot of sheet information such title, url, colors, alignment and much more.
+    """
+    service = await get_service("spreadsheets")
+    return await execute(service.spreadsheets().get(spreadsheetId=spreadsheet_id, includeGridData=include_grid_data,
+                                                    fields=fields))
+
+
+async def get_sheet_names(spreadsheet_id):
+    """Get the names of the sheets in a spreadsheet.
+
+    Args:
+        spreadsheet_id (str): The id from the Spreadsheet. Long string with letters, numbers and characters
+
+    Returns:
+        list: A list of the names of the sheets.
+    """
+    response = await get_info(spreadsheet_id, fields='sheets.properties.title')
+    return [a['properties']['title'] for a in response['sheets']]
+
+
+async def pandas_to_sheet(spreadsheet_id, page_name, df, starting_cell='A1'):
+    """Uploads a pandas.dataframe to the desired page of a google sheets sheet.
+
+    Args:
+        spreadsheet_id (str): The id from the Spreadsheet. Long string with letters, numbers and characters
+        page_name (str): The target name of the page to upload the DataFrame
+        df (pd.DataFrame): The dataframe to be uploaded.
+        starting_cell (str, optional): The cell in the sheet where the data will be uploaded. Defaults to 'A1'.
+
+    Returns:
+        dict: A response object
+    """
+    service = await get_service("spreadsheets")
+    return await execute(service.spreadsheets().values().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body=spreadsheets._pandas_to_sheet_body(page_name, df, starting_cell)
+    ))
+
+
+async def download_sheet_to_pandas(spreadsheet_id, sheet_name='', sheet_range='', index='', has_header=True,
+                                   fields='values'):
+    """Downloads and instances a pd.DataFrame object with the sheets values.
+    Args:
+        spreadsheet_id (_type_): Id of the desired document
+        sheet_name (str, optional): Name of the desired page 'Hoja1'. (by default: first page). Defaults to ''.
+        sheet_range (str, optional): Range of the desired info 'A1:C6'.(by default: WHOLE PAGE). Defaults to ''.
+        index (str, optional): column you want to be the index of the resulting dataframe. Defaults to ''.
+        has_header (bool, optional): If the sheet has a header. If not, a dummy header is created. Defaults to True.
+        fields (str, optional): Field mask of the value range, it must include 'values'. Defaults to 'values'.
+
+    Returns:
+        pd.DataFrame: The output dataframe.
+    """
+    service = await get_service("spreadsheets")
+    if (sheet_range != ''):
+        sheet_range = '!'+sheet_range
+
+    response = await execute(service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        valueRenderOption='FORMATTED_VALUE',
+        range=sheet_name+sheet_range,
+        fields=fields
+    ))
+    return spreadsheets._values_to_pandas(response['values'], index, has_header)
+
+
+async def clear_sheet(spreadsheet_id, sheet_name, sheet_range=''):
+    """Deletes the data in the selected area
+
+    Args:
+        spreadsheet_id (str): The id from the Spreadsheet.
+        sheet_name (str): Name of the page to clear.
+        sheet_range (str, optional): Range to clear, the whole page if empty. Defaults to ''.
+    """
+    service = await get_service("spreadsheets")
+    if (sheet_range != ''):
+        sheet_range = '!'+sheet_range
+
+    return await execute(service.spreadsheets().values().clear(
+        spreadsheetId=spreadsheet_id,
+        range=sheet_name+sheet_range
+    ))
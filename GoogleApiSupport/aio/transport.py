@@ -0,0 +1,174 @@
+"""Non-blocking transport of the `aio` modules.
+
+Every event loop gets one `httpx.AsyncClient`, whose connection pool is shared by all the
+requests sent from that loop, so hundreds of them can be in flight at once. The blocking steps,
+building services and loading their credentials, refreshing tokens and taking tokens from the
+file buckets of `rate_limit`, run in the default executor of the loop.
+
+Writes drop the cached reads of `response_cache`, but reads are always sent: the cache is
+only used by the blocking modules.
+"""
+
+import time
+import asyncio
+import weakref
+import functools
+import contextvars
+
+import httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MAX_URI_LENGTH
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import rate_limit
+from GoogleApiSupport import response_cache
+from GoogleApiSupport import instrumentation
+
+try:
+    import httpx
+except ImportError as error:
+    raise ImportError('GoogleApiSupport.aio needs httpx, install it with `pip install google-api-support[aio]`') from error
+
+# Connections open at once per event loop, across all hosts.
+MAX_CONNECTIONS = 100
+# Idle connections kept alive per event loop.
+MAX_KEEPALIVE_CONNECTIONS = 100
+# Seconds to wait for a response.
+TIMEOUT = 120
+
+_clients = weakref.WeakKeyDictionary()
+_refresh_locks = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """Returns the `httpx.AsyncClient` of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+            timeout=TIMEOUT,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def get_service(api_name, **kwargs):
+    """Returns `auth.get_service(api_name, **kwargs)`, built without blocking the event loop."""
+    # In the context of the task, so `auth.single_pool_member` blocks apply
+    build = functools.partial(contextvars.copy_context().run, auth.get_service, api_name, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, build)
+
+
+async def close():
+    """Closes the client of the running event loop and its pooled connections."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def execute(request, idempotent=None, timeout=None):
+    """Sends a request built by a googleapiclient service without blocking the event loop.
+        Errors are retried with the same policy as `execution.ApiRequest.execute`.
+
+    Args:
+        request (googleapiclient.http.HttpRequest): Request returned by a service method, such as `service.files().copy(...)`.
+        idempotent (bool, optional): Whether the request can be replayed after a server error.
+            Defaults to None, which guesses it from the http method and the api method.
+        timeout (float, optional): Seconds the call may take, retries included. Defaults to None, which
+            applies the current `deadline` or the default timeout of the api.
+
+    Returns:
+        dict: The deserialized response, as `request.execute()` would return it.
+
+    Raises:
+        googleapiclient.errors.HttpError: If the response was not a 2xx.
+        deadline.DeadlineExceeded: If the call did not finish in time.
+    """
+    if idempotent is None:
+        idempotent = execution.is_idempotent(request)
+    started = time.monotonic()
+    measured = {'status': None, 'size': None}
+    attempt = 0
+    api = instrumentation.split_method_id(request.methodId)[0]
+    if request.method != 'GET' and response_cache.enabled():
+        response_cache.invalidate(request.uri)
+    try:
+        with deadline.default_timeout(api), deadline.timeout(timeout):
+            while True:
+                deadline.check(request.methodId)
+                try:
+                    return await _send(request, measured)
+                except deadline.DeadlineExceeded:
+                    raise
+                except Exception as error:
+                    delay = execution.retry_delay(error, attempt, idempotent, started,
+                                                  transient_errors=execution.TRANSIENT_ERRORS + (httpx.TransportError,))
+                    left = deadline.remaining()
+                    if left is not None and (left == 0 or (delay is not None and delay >= left)):
+                        raise deadline.DeadlineExceeded(
+                            f'{request.methodId} did not finish before its deadline') from error
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+    finally:
+        if instrumentation.enabled():
+            instrumentation.record_call(request.methodId, request.uri, time.monotonic() - started, request.body_size,
+                                        measured['status'], measured['size'], attempt, request.method,
+                                        request.body)
+
+
+async def _send(request, measured):
+    uri, method, body, headers = request.uri, request.method, request.body, dict(request.headers)
+    # Same long url workaround `HttpRequest.execute` applies
+    if len(uri) > MAX_URI_LENGTH and method == 'GET':
+        uri, body = uri.split('?', 1)
+        method = 'POST'
+        headers['x-http-method-override'] = 'GET'
+        headers['content-type'] = 'application/x-www-form-urlencoded'
+
+    limiter = getattr(request.http, 'limiter', None)
+    if limiter:
+        left = deadline.remaining()
+        # Nothing is taken from the bucket when the wait is past the deadline
+        if isinstance(limiter.bucket(request.method), rate_limit.FileTokenBucket):
+            # Locking the state file of the bucket may wait for other processes
+            wait = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(limiter.reserve, max_wait=left, method=request.method))
+        else:
+            wait = limiter.reserve(max_wait=left, method=request.method)
+        if left is not None and wait > left:
+            raise deadline.DeadlineExceeded(f'The rate limit allows no request before the deadline, in {wait:.1f}s')
+        await asyncio.sleep(wait)
+
+    credentials = request.http.credentials
+    if not credentials.valid:
+        await _refresh(credentials)
+    credentials.apply(headers)
+
+    left = deadline.remaining()
+    response = await get_client().request(method, uri, content=body, headers=headers,
+                                          timeout=httpx.USE_CLIENT_DEFAULT if left is None else left)
+
+    info = {key.lower(): value for key, value in response.headers.items()}
+    info['status'] = str(response.status_code)
+    info['reason'] = response.reason_phrase
+    resp = httplib2.Response(info)
+    measured.update(status=resp.status, size=len(response.content))
+    if resp.status >= 300:
+        raise HttpError(resp, response.content, uri=uri)
+    return request.postproc(resp, response.content)
+
+
+async def _refresh(credentials):
+    loop = asyncio.get_running_loop()
+    lock = _refresh_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        # Another task may have refreshed the credentials while this one waited
+        if not credentials.valid:
+            await loop.run_in_executor(None, credentials.refresh, Request())
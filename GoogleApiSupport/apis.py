@@ -1,25 +1,32 @@
+import os
+import json
 import functools
 
 api_configs = {
     "slides": {
         "scope": "https://www.googleapis.com/auth/presentations",
         "build": "slides",
-        "version": "v1"
+        "version": "v1",
+        # Per user quotas, see rate_limit.py
+        "rate_limit": {"read": {"requests": 600, "period": 60}, "write": {"requests": 60, "period": 60}}
     },
     "drive": {
         "scope": "https://www.googleapis.com/auth/drive",
         "build": "drive",
-        "version": "v3"
+        "version": "v3",
+        "rate_limit": {"requests": 12000, "period": 60}
     },
     "sheets": { # TODO Delete the sheets api_config
         "scope": "https://www.googleapis.com/auth/spreadsheets",
         "build": "sheets",
-        "version": "v4"
+        "version": "v4",
+        "rate_limit": {"read": {"requests": 60, "period": 60}, "write": {"requests": 60, "period": 60}}
     },
     "spreadsheets": {
         "scope": "https://www.googleapis.com/auth/spreadsheets",
         "build": "sheets",
-        "version": "v4"
+        "version": "v4",
+        "rate_limit": {"read": {"requests": 60, "period": 60}, "write": {"requests": 60, "period": 60}}
     }
 }
 
@@ -30,3 +37,46 @@ def get_api_config(api_name):
 
 def all_scopes():
     return [ data['scope'] for __placeholder, data in api_configs.items() ]
+
+
+def get_discovery_document(api_name):
+    """Returns the discovery document bundled with the package for the api,
+        so services can be built without fetching it from the network.
+
+    Args:
+        api_name (str): Name of the api in `api_configs`.
+
+    Returns:
+        dict: The parsed discovery document. It is parsed once per process and shared, do not modify it,
+            nor pass it to `build_from_document`, which does: use `get_discovery_json` for that.
+    """
+    api_config = get_api_config(api_name)
+    return _load_discovery_document(api_config['build'], api_config['version'])
+
+
+def get_discovery_json(api_name):
+    """Returns the text of the discovery document bundled with the package for the api.
+
+    `build_from_document` modifies the document it is given, so each service is built from its
+    own copy parsed from this text, which is faster than deep copying the parsed document.
+
+    Args:
+        api_name (str): Name of the api in `api_configs`.
+
+    Returns:
+        str: The discovery document as JSON, read once per process.
+    """
+    api_config = get_api_config(api_name)
+    return _read_discovery_json(api_config['build'], api_config['version'])
+
+
+@functools.lru_cache()
+def _load_discovery_document(build, version):
+    return json.loads(_read_discovery_json(build, version))
+
+
+@functools.lru_cache()
+def _read_discovery_json(build, version):
+    discovery_path = os.path.join(os.path.dirname(__file__), 'discovery', f'{build}.{version}.json')
+    with open(discovery_path, encoding='utf-8') as discovery_file:
+        return discovery_file.read()
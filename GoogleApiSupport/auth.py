@@ -1,26 +1,50 @@
 import os
+import json
+import time
 import logging
-from oauth2client.client import _raise_exception_for_reading_json
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
 
-#service account
-from oauth2client.service_account import ServiceAccountCredentials
-from apiclient.discovery import build
-from httplib2 import Http
+from GoogleApiSupport import apis
+from GoogleApiSupport import file_lock
+from GoogleApiSupport import rate_limit
+from GoogleApiSupport import token_refresh
+from GoogleApiSupport import credential_pool
 
-#oauth
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+# The google client libraries are imported when the first service is built, so importing
+# the modules of this package stays cheap.
 
-from GoogleApiSupport import apis
+
+# Seconds a built service is reused before being rebuilt. None keeps it forever.
+SERVICE_CACHE_TTL = 3600
+# Maximum number of services kept in the pool, across all threads. The least recently used are dropped first.
+SERVICE_POOL_SIZE = 64
+# 'session' shares a pooled keep-alive requests session between all the services with the same credentials.
+# 'httplib2' gives every service its own httplib2.Http, as older versions of the library did.
+TRANSPORT = 'session'
+
+_service_cache = OrderedDict()
+_service_cache_lock = threading.Lock()
+_service_cache_stats = {'hits': 0, 'misses': 0}
+_credential_pool = None
+_pool_member = contextvars.ContextVar('google_api_pool_member', default=None)
+_credentials_cache = {}
+_credentials_cache_lock = threading.Lock()
 
 
 def get_service(api_name, service_credentials_path=None, 
-                oauth_credentials_path=None, additional_apis=[]):
+                oauth_credentials_path=None, additional_apis=[], use_cache=True, subject=None):
     """ First section of this function checks credentials for service accounts. 
         If no service account credentials are present, it will then check for OAuth credentials. 
         If no OAuth credentials found, it will return an exception. 
 
+        Built services are cached by api name, credentials file and scopes, so repeated
+        calls reuse the same authenticated service until `SERVICE_CACHE_TTL` expires.
+        The underlying http transport is not thread safe, so every thread gets its own
+        service from the pool and module functions can be called from many threads at once.
+
 
     Args:
         api_name (_type_): _description_
@@ -29,53 +53,232 @@ def get_service(api_name, service_credentials_path=None,
         additional_apis (list, optional): Some times a request needs access to multiple scopes.
             Here you can add as many as you want. Apis must be in apis.py file in order to be allowed.
             Defaults to [].
+        use_cache (bool, optional): Reuse a previously built service for the same api,
+            credentials and scopes. Defaults to True.
+        subject (str, optional): User impersonated by the service account through domain-wide delegation.
+            Defaults to None.
 
     Returns:
         Service object: Authenticated service to query against apis.
     """
+    if _credential_pool is not None and not (service_credentials_path or oauth_credentials_path or subject):
+        pinned = _pool_member.get()
+        if pinned:
+            service_credentials_path, subject = pinned[0]
+        else:
+            service_credentials_path, subject = _credential_pool.pick(api_name)
+            if pinned is not None:
+                pinned.append((service_credentials_path, subject))
+                service_credentials_path, subject = pinned[0]
+
     service_credentials_path = get_service_credentials_path(service_credentials_path)
     oauth_credentials_path = get_oauth_credentials_path(oauth_credentials_path)
-    service = None
     scopes = apis.get_api_config(api_name)['scope']
     
     if additional_apis:
         scopes = [scopes]
         for additional_api_name in additional_apis:
             scopes.append(apis.get_api_config(additional_api_name)['scope'])
-    
-    if service_credentials_path: 
-
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(
-            service_credentials_path,
-            scopes=scopes
-        )
-
-        service = build(apis.get_api_config(api_name)['build'],
-                        apis.get_api_config(api_name)['version'],
-                        http=credentials.authorize(Http()),
-                        cache_discovery=False
-                        )
+
+    if not use_cache:
+        return _build_service(api_name, service_credentials_path, oauth_credentials_path, scopes, subject)
+
+    cache_key = _service_cache_key(api_name, service_credentials_path, oauth_credentials_path, scopes, subject)
+    with _service_cache_lock:
+        cached = _service_cache.get(cache_key)
+        if cached and (SERVICE_CACHE_TTL is None or time.monotonic() - cached[1] < SERVICE_CACHE_TTL):
+            _service_cache.move_to_end(cache_key)
+            _service_cache_stats['hits'] += 1
+            return cached[0]
+        _service_cache_stats['misses'] += 1
+
+    service = _build_service(api_name, service_credentials_path, oauth_credentials_path, scopes, subject)
+
+    with _service_cache_lock:
+        _service_cache[cache_key] = (service, time.monotonic())
+        _service_cache.move_to_end(cache_key)
+        while len(_service_cache) > SERVICE_POOL_SIZE:
+            _service_cache.popitem(last=False)
+    return service
+
+
+def invalidate_service_cache(api_name=None):
+    """Drops cached services so the next `get_service` call builds them again.
+
+    Args:
+        api_name (str, optional): Only drop the services of this api. Defaults to None, which drops all of them,
+            and the parsed credentials as well.
+    """
+    with _service_cache_lock:
+        for cache_key in list(_service_cache):
+            if api_name is None or cache_key[1] == api_name:
+                del _service_cache[cache_key]
+    if api_name is None:
+        with _credentials_cache_lock:
+            dropped = list(_credentials_cache.values())
+            _credentials_cache.clear()
+        for credentials, _ in dropped:
+            token_refresh.unwatch(credentials)
+        from GoogleApiSupport import transport
+        transport.close_sessions()
+
+
+def use_credential_pool(members, strategy='round_robin'):
+    """Spreads the services built without explicit credentials over several service accounts.
+        See `credential_pool` for details.
+
+    Args:
+        members (list): Paths of service account key files, or `(path, subject)` pairs to impersonate
+            `subject` through domain-wide delegation. None or an empty list stops using a pool.
+        strategy (str, optional): 'round_robin' or 'least_loaded'. Defaults to 'round_robin'.
+    """
+    global _credential_pool
+    _credential_pool = credential_pool.CredentialPool(members, strategy) if members else None
+
+
+@contextlib.contextmanager
+def single_pool_member():
+    """Makes the `get_service` calls of the block that take a member of the credential pool all take
+        the same one, so the steps of an operation, such as copying a file and then its permissions,
+        act as one identity. Nested blocks keep the member of the outermost one. Also usable as a decorator.
+    """
+    if _pool_member.get() is not None:
+        yield
+        return
+    token = _pool_member.set([])
+    try:
+        yield
+    finally:
+        _pool_member.reset(token)
+
+
+def service_cache_info():
+    """Returns the service cache counters.
+
+    Returns:
+        dict: `hits`, `misses` and the current number of cached services as `size`.
+    """
+    with _service_cache_lock:
+        return dict(_service_cache_stats, size=len(_service_cache))
+
+
+def _service_cache_key(api_name, service_credentials_path, oauth_credentials_path, scopes, subject=None):
+    if isinstance(scopes, str):
+        scopes = [scopes]
+    # Thread ids can be reused once a thread finishes, which is fine as the previous owner no longer uses the service
+    return (threading.get_ident(), api_name, service_credentials_path, oauth_credentials_path, tuple(sorted(scopes)),
+            subject)
+
+
+def _build_service(api_name, service_credentials_path, oauth_credentials_path, scopes, subject=None):
+    from apiclient.discovery import build_from_document
+    from GoogleApiSupport import transport
+    from GoogleApiSupport import execution
+
+    if not (service_credentials_path or oauth_credentials_path):
+        raise Exception('UNABLE TO FIND OAUTH OR SERVICE CREDENTIALS FILE | \
+                        Environment variable not defined or file from provided path does not exist | \
+                        More info in project folder docs/setup_credentials.md')
+
+    # Cached while the file is not modified, a rotated key file gives new credentials and a new session
+    credentials = get_credentials(service_credentials_path, oauth_credentials_path, scopes, subject)
+    if TRANSPORT == 'session':
+        session_key = _service_cache_key(api_name, service_credentials_path, oauth_credentials_path, scopes,
+                                         subject)[2:]
+        http = transport.get_session_http(session_key, credentials)
+    else:
+        http = transport.authorized_httplib2(credentials)
+
+    if service_credentials_path:
+        identity = credential_pool.identity(service_credentials_path, subject)
+    else:
+        identity = oauth_credentials_path
+    limiter = rate_limit.get_limiter(api_name, identity=identity)
+    if limiter:
+        http = transport.RateLimitedHttp(http, limiter)
+
+    return build_from_document(_discovery_document(api_name), http=http,
+                               requestBuilder=execution.ApiRequest)
+
+
+def get_credentials(service_credentials_path=None, oauth_credentials_path=None, scopes=None, subject=None):
+    """Loads the credentials from an already resolved service account or OAuth credentials file.
+        Service account credentials take precedence.
+
+        Parsed credentials are reused until their file is modified, and their tokens are
+        refreshed in the background by `token_refresh` before they expire.
+
+    Args:
+        service_credentials_path (str, optional): Path of the service account key file. Defaults to None.
+        oauth_credentials_path (str, optional): Path of the OAuth client secrets file. Defaults to None.
+        scopes (list, optional): Scopes requested for service account credentials. Defaults to None.
+        subject (str, optional): User impersonated by the service account. Defaults to None.
+
+    Returns:
+        google.auth.credentials.Credentials: Credentials ready to authorize requests.
+    """
+    if isinstance(scopes, str):
+        scopes = [scopes]
+
+    if service_credentials_path:
+        def load():
+            from google.oauth2 import service_account
+            return service_account.Credentials.from_service_account_file(
+                service_credentials_path,
+                scopes=scopes,
+                subject=subject
+            ), None
+
+        key = ('service', service_credentials_path, tuple(sorted(scopes or [])), subject)
+        credentials = _cached_credentials(key, service_credentials_path, load)
         logging.info(f'Using authorisation via service_credentials found on `{service_credentials_path}`')
-       
-    elif not service_credentials_path and oauth_credentials_path:
-        # we enable at once all the scopes needed when using the lib, otherwise we'll need to manage
-        # deleting old token.json files when changing from one scope to the other
-        scopes = apis.all_scopes()
-        
-        credentials = oauth_credentials_from_file(oauth_credentials_path, scopes)
 
-        service = build(apis.get_api_config(api_name)['build'],
-                        apis.get_api_config(api_name)['version'],
-                        credentials=credentials
-                        )
+    elif oauth_credentials_path:
+        def load():
+            # we enable at once all the scopes needed when using the lib, otherwise we'll need to manage
+            # deleting old token.json files when changing from one scope to the other
+            credentials = oauth_credentials_from_file(oauth_credentials_path, apis.all_scopes())
+            return credentials, save_oauth_token
+
+        credentials = _cached_credentials(('oauth', oauth_credentials_path), oauth_credentials_path, load)
         logging.info(f'Using authorisation via oauth_credentials found on `{oauth_credentials_path}`')
-        
-    elif not (service_credentials_path or oauth_credentials_path):
+
+    else:
         raise Exception('UNABLE TO FIND OAUTH OR SERVICE CREDENTIALS FILE | \
                         Environment variable not defined or file from provided path does not exist | \
                         More info in project folder docs/setup_credentials.md')
 
-    return service
+    return credentials
+
+
+def _cached_credentials(key, path, load):
+    """Returns the credentials parsed from `path` by `load` while the file is not modified."""
+    modified = os.path.getmtime(path)
+    with _credentials_cache_lock:
+        cached = _credentials_cache.get(key)
+        if cached and cached[1] == modified:
+            return cached[0]
+        if cached:
+            # The file changed, the old credentials are neither kept nor refreshed any longer
+            del _credentials_cache[key]
+    if cached:
+        token_refresh.unwatch(cached[0])
+
+    credentials, on_refresh = load()
+    token_refresh.watch(credentials, on_refresh)
+    with _credentials_cache_lock:
+        _credentials_cache[key] = (credentials, modified)
+    return credentials
+
+
+def _discovery_document(api_name):
+    # Parsed again for every service, build_from_document modifies the document it is given
+    document = json.loads(apis.get_discovery_json(api_name))
+    # Points the services to another host, such as a local stand-in of the Google APIs
+    root_url = os.environ.get('GOOGLE_API_ROOT_URL')
+    if root_url:
+        document['rootUrl'] = root_url
+    return document
 
 
 def get_service_credentials_path(service_credentials_path=None):
@@ -146,19 +349,35 @@ def oauth_credentials_from_file(oauth_credentials_path, scopes, local_credential
     Returns:
         Credentials object:
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     credentials = None
-    
-    if os.path.exists(local_credentials_path):
-        credentials = Credentials.from_authorized_user_file(local_credentials_path, scopes)
-    # If there are no (valid) credentials available, let the user log in.
-    if not credentials or not credentials.valid:
-        if credentials and credentials.expired and credentials.refresh_token:
-            credentials.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                oauth_credentials_path, scopes)
-            credentials = flow.run_local_server(port=0)
-        # Save the credentials for the next run
-        with open(local_credentials_path, 'w') as token:
-            token.write(credentials.to_json())
-    return credentials
\ No newline at end of file
+
+    # Other processes wait, so only one of them refreshes the token or asks the user to log in
+    with file_lock.locked(local_credentials_path):
+        if os.path.exists(local_credentials_path):
+            credentials = Credentials.from_authorized_user_file(local_credentials_path, scopes)
+        # If there are no (valid) credentials available, let the user log in.
+        if not credentials or not credentials.valid:
+            if credentials and credentials.expired and credentials.refresh_token:
+                credentials.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    oauth_credentials_path, scopes)
+                credentials = flow.run_local_server(port=0)
+            # Save the credentials for the next run
+            file_lock.write_atomic(local_credentials_path, credentials.to_json())
+    return credentials
+
+
+def save_oauth_token(credentials, local_credentials_path='token.json'):
+    """Saves refreshed OAuth credentials so the next runs start with a valid token.
+
+    Args:
+        credentials (google.oauth2.credentials.Credentials): The refreshed credentials.
+        local_credentials_path (str, optional): File read by `oauth_credentials_from_file`. Defaults to 'token.json'.
+    """
+    with file_lock.locked(local_credentials_path):
+        file_lock.write_atomic(local_credentials_path, credentials.to_json())
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Batching of independent calls into requests to the `/batch` endpoint of an api.
+
+Calls added to a `Batch` are sent when it is executed, up to `MAX_BATCH_SIZE` of them per
+HTTP round trip, and their results are delivered to `concurrent.futures.Future` objects:
+
+    from GoogleApiSupport import batch, drive
+
+    with batch.Batch('drive') as drive_batch:
+        grants = [drive.insert_permission(file_id, 'user', 'reader', email, batch=drive_batch)
+                  for email in emails]
+    permissions = [grant.result() for grant in grants]
+
+The functions of the modules that accept a `batch` argument return such a future instead of
+the result when they are given one.
+
+Every call of a batch counts against the quota, so the rate limiter of the service is charged
+one token per call, of the read or write quota of the call. A batch whose tokens come after the
+current `deadline` is not sent and its calls fail with `deadline.DeadlineExceeded`. Calls that
+fail with a retryable error are sent again in a new batch, following the same policy as
+`execution.call_with_retries`. Writes drop the cached reads of their documents, see `response_cache`.
+"""
+
+import time
+import logging
+from concurrent.futures import Future
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import rate_limit
+from GoogleApiSupport import response_cache
+from GoogleApiSupport import instrumentation
+
+# Calls per HTTP request. The batch endpoints of Google accept at most 100.
+MAX_BATCH_SIZE = 100
+
+
+class Batch:
+    """Collects independent calls of an api and sends them together.
+
+    Args:
+        api_name (str, optional): Name of the api in `apis.api_configs`. Defaults to 'drive'.
+        max_size (int, optional): Calls per HTTP request. Defaults to MAX_BATCH_SIZE.
+        **kwargs: Passed to `auth.get_service` to choose the credentials.
+    """
+
+    def __init__(self, api_name='drive', max_size=MAX_BATCH_SIZE, **kwargs):
+        self.api_name = api_name
+        self.max_size = min(max_size, MAX_BATCH_SIZE)
+        self.service = auth.get_service(api_name, **kwargs)
+        self._calls = []
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def add(self, request, idempotent=None):
+        """Queues a request built by a service, such as `service.files().delete(fileId=file_id)`.
+
+        Args:
+            request (HttpRequest): The request, not executed.
+            idempotent (bool, optional): Whether it can be replayed after a server error. Defaults to None,
+                which guesses it like `execution.ApiRequest.execute`.
+
+        Returns:
+            Future: Receives the deserialized response, or the error of the call.
+        """
+        if idempotent is None:
+            idempotent = execution.is_idempotent(request)
+        future = Future()
+        self._calls.append((request, idempotent, future))
+        return future
+
+    def execute(self):
+        """Sends the queued calls, retrying the ones that failed with a retryable error.
+
+        Returns:
+            list: The futures of the calls, in the order they were added.
+        """
+        calls, self._calls = self._calls, []
+        started = time.monotonic()
+        attempt = 0
+        pending = calls
+        while pending:
+            failed = []
+            for first in range(0, len(pending), self.max_size):
+                failed += self._send(pending[first:first + self.max_size], attempt)
+
+            pending = []
+            delay = 0
+            left = deadline.remaining()
+            for call, error in failed:
+                call_delay = execution.retry_delay(error, attempt, call[1], started)
+                if left is not None and (left == 0 or (call_delay is not None and call_delay >= left)):
+                    exceeded = deadline.DeadlineExceeded(f'{call[0].methodId} did not finish before its deadline')
+                    exceeded.__cause__ = error
+                    call[2].set_exception(exceeded)
+                elif call_delay is None:
+                    call[2].set_exception(error)
+                else:
+                    pending.append(call)
+                    delay = max(delay, call_delay)
+            if pending:
+                logging.warning(f'Retrying {len(pending)} calls of a {self.api_name} batch in {delay:.2f}s')
+                time.sleep(delay)
+                attempt += 1
+        return [call[2] for call in calls]
+
+    def _send(self, calls, attempt):
+        """Sends one batch request and returns the `(call, error)` pairs of the calls that failed."""
+        http = calls[0][0].http
+        limiter = getattr(http, 'limiter', None)
+        if limiter is not None:
+            # Every call takes a token of its read or write quota, the request of the batch itself none
+            reads = sum(request.method in rate_limit.READ_METHODS for request, _, _ in calls)
+            left = deadline.remaining()
+            wait = 0
+            for method, tokens in (('GET', reads), ('POST', len(calls) - reads)):
+                if tokens:
+                    wait = max(wait, limiter.reserve(tokens, max_wait=left, method=method))
+            if left is not None and wait > left:
+                for call in calls:
+                    call[2].set_exception(deadline.DeadlineExceeded(
+                        f'The rate limit allows no batch of {self.api_name} before the deadline, in {wait:.1f}s'))
+                return []
+            if wait > 0:
+                time.sleep(wait)
+            http = http.http
+
+        failed = []
+        statuses = {}
+
+        def callback(request_id, response, exception):
+            call = calls[int(request_id)]
+            if exception is None:
+                statuses[request_id] = 200
+                call[2].set_result(response)
+            else:
+                statuses[request_id] = exception.resp.status
+                failed.append((call, exception))
+
+        batch_request = self.service.new_batch_http_request()
+        for index, (request, _, _) in enumerate(calls):
+            batch_request.add(request, callback=callback, request_id=str(index))
+
+        started = time.perf_counter()
+        try:
+            batch_request.execute(http=http)
+        except Exception as error:
+            # Nothing is known about the calls of a batch that failed as a whole
+            failed += [(call, error) for index, call in enumerate(calls) if str(index) not in statuses]
+        latency = time.perf_counter() - started
+        if response_cache.enabled():
+            for request, _, _ in calls:
+                if request.method != 'GET':
+                    response_cache.invalidate(request.uri)
+
+        if instrumentation.enabled():
+            for index, (request, _, _) in enumerate(calls):
+                instrumentation.record_call(request.methodId, request.uri, latency, request.body_size,
+                                            statuses.get(str(index)), None, attempt, request.method, request.body)
+        return failed
@@ -0,0 +1,70 @@
+"""Spreading of the calls over several service accounts, each counted against its own quota.
+
+Per user quotas limit what a single identity can do, so bulk jobs can go faster by sharing
+the work among several service accounts, or several users impersonated through domain-wide
+delegation:
+
+    from GoogleApiSupport import auth
+
+    auth.use_credential_pool(['keys/exporter-1.json', 'keys/exporter-2.json',
+                              ('keys/delegated.json', 'reports@example.com')])
+
+From then on every `get_service` call made without explicit credentials takes the next member
+of the pool, and the rate limiter paces every member separately. With the `least_loaded`
+strategy it takes the member whose rate limit bucket has the most tokens left, so a member
+slowed down by other traffic gets fewer calls.
+
+All the members must have access to the documents the calls touch. The functions that chain
+several calls on the same files, such as `drive.copy_file` with `transfer_permissions`, make all
+of them with one member, see `auth.single_pool_member`: the copy is owned by that member and
+only it may be able to share it.
+"""
+
+import threading
+
+from GoogleApiSupport import rate_limit
+
+STRATEGIES = ('round_robin', 'least_loaded')
+
+
+class CredentialPool:
+    """Members taking turns to authorize the calls.
+
+    Args:
+        members (list): Paths of service account key files, or `(path, subject)` pairs to impersonate
+            `subject` through domain-wide delegation.
+        strategy (str, optional): 'round_robin' or 'least_loaded'. Defaults to 'round_robin'.
+    """
+
+    def __init__(self, members, strategy='round_robin'):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown strategy {strategy!r}, use one of {STRATEGIES}')
+        self.members = [tuple(member) if isinstance(member, (tuple, list)) else (member, None) for member in members]
+        if not self.members:
+            raise ValueError('A credential pool needs at least one service account key file')
+        self.strategy = strategy
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.members)
+
+    def pick(self, api_name):
+        """Returns the `(service_credentials_path, subject)` of the member that authorizes the next call."""
+        with self._lock:
+            first = self._turn
+            self._turn = (self._turn + 1) % len(self.members)
+
+        if self.strategy == 'least_loaded':
+            # Starting from the member whose turn it is spreads the calls among equally loaded members
+            ordered = self.members[first:] + self.members[:first]
+            limiters = [rate_limit.get_limiter(api_name, identity=identity(*member)) for member in ordered]
+            if all(limiters):
+                tokens = [limiter.available() for limiter in limiters]
+                return ordered[tokens.index(max(tokens))]
+        return self.members[first]
+
+
+def identity(service_credentials_path, subject=None):
+    """Name of a member for the rate limiter, which counts quotas per identity."""
+    return f'{service_credentials_path}#{subject}' if subject else service_credentials_path
@@ -0,0 +1,68 @@
+"""Deadlines bounding how long the calls to the apis can take.
+
+    from GoogleApiSupport import deadline, drive
+
+    with deadline.timeout(30):
+        drive.copy_file(file_id, 'Copy', transfer_permissions=True)
+
+Every request sent inside the block, its retries and its waits for the rate limiter share the
+30 seconds: the remaining time is the socket timeout of each attempt, no retry is started if
+its backoff would end after the deadline, and `DeadlineExceeded` is raised once it passes.
+Blocks can be nested, the earliest deadline wins. Deadlines follow the calls of the thread
+or asyncio task that set them.
+
+`DEFAULT_TIMEOUTS` bounds every request of an api that runs outside of any block, e.g.
+`deadline.DEFAULT_TIMEOUTS['sheets'] = 60` for the functions of `spreadsheets`.
+"""
+
+import time
+import contextlib
+import contextvars
+
+# Seconds each call of an api may take, retries included, when no deadline is set. None waits forever.
+DEFAULT_TIMEOUTS = {
+    'drive': None,
+    'slides': None,
+    'sheets': None,
+    'storage': None,
+}
+
+_expires = contextvars.ContextVar('google_api_deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call did not finish before its deadline."""
+
+
+@contextlib.contextmanager
+def timeout(seconds):
+    """Bounds the calls made inside the block to `seconds` in total. None leaves them unbounded."""
+    if seconds is None:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _expires.get()
+    token = _expires.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _expires.reset(token)
+
+
+def default_timeout(api):
+    """Applies the default timeout of an api, such as 'drive', to the block."""
+    return timeout(DEFAULT_TIMEOUTS.get(api))
+
+
+def remaining():
+    """Seconds left before the current deadline, None if there is none."""
+    expires = _expires.get()
+    if expires is None:
+        return None
+    return max(0.0, expires - time.monotonic())
+
+
+def check(description=''):
+    """Raises `DeadlineExceeded` if the current deadline has passed."""
+    if remaining() == 0:
+        raise DeadlineExceeded(f'{description or "Call"} did not finish before its deadline')
@@ -0,0 +1,310 @@
+"""Streaming downloads of Drive files, in chunks, to disk or to any writable stream.
+
+    from GoogleApiSupport import downloads
+
+    service = auth.get_service('drive')
+    downloads.download_to_file(service.files().get_media(fileId=file_id), '/data/export.zip',
+                               on_progress=lambda received, total: print(received, total))
+
+Every chunk is written to the destination as it arrives, so downloading a file takes
+`CHUNK_SIZE` bytes of memory whatever its size. A chunk that fails is retried with the policy
+of `execution.call_with_retries`. Files are written to `<path>.part` and renamed when complete,
+and a download interrupted by a crash continues from the size of that partial file with a
+Range request instead of starting over, when the file in Drive is still the version the
+partial file was downloaded from.
+
+`download_folder` copies a whole Drive folder to disk, exporting the Google Workspace files
+and downloading the others, and skips the files whose local copy is already up to date.
+"""
+
+import os
+import time
+import hashlib
+import datetime
+import threading
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import drive
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import file_lock
+from GoogleApiSupport import drive_index
+
+# Bytes requested per chunk, also the memory a download takes.
+CHUNK_SIZE = 8 * 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+# Fields of a Drive file that change with its content, see `file_version`.
+VERSION_FIELDS = 'md5Checksum,headRevisionId,modifiedTime'
+# Downloads running at the same time in `download_folder`.
+MAX_WORKERS = 4
+# Bytes of the files being downloaded at the same time in `download_folder`.
+MAX_BYTES_IN_FLIGHT = 256 * 1024 * 1024
+# Format and extension of the exports of the Google Workspace files, by their mime type.
+EXPORT_FORMATS = {
+    'application/vnd.google-apps.document':
+        ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'),
+    'application/vnd.google-apps.spreadsheet':
+        ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'application/vnd.google-apps.presentation':
+        ('application/vnd.openxmlformats-officedocument.presentationml.presentation', '.pptx'),
+    'application/vnd.google-apps.drawing': ('image/png', '.png'),
+    'application/vnd.google-apps.script': ('application/vnd.google-apps.script+json', '.json'),
+}
+WORKSPACE_MIME_PREFIX = 'application/vnd.google-apps.'
+
+DownloadResult = namedtuple('DownloadResult', [
+    'path',      # local path of the file
+    'file',      # metadata of the Drive file
+    'status',    # 'downloaded', 'exported', 'skipped' (already up to date), 'unsupported' or 'failed'
+    'bytes',     # bytes written
+    'error',     # the exception of the failed downloads
+])
+DownloadReport = namedtuple('DownloadReport', [
+    'results',   # DownloadResult of every file, in the order they were listed
+    'bytes',     # bytes written
+    'seconds',   # wall time of the whole download
+])
+
+
+def download(request, sink, chunk_size=None, offset=0, on_progress=None):
+    """Writes the content of a media request, such as `files().get_media(...)`, to a writable stream.
+
+    Args:
+        request (googleapiclient.http.HttpRequest): Media request built by a service.
+        sink (io.IOBase): Binary stream receiving the content, chunk by chunk.
+        chunk_size (int, optional): Bytes requested at a time. Defaults to CHUNK_SIZE.
+        offset (int, optional): Bytes of the content already received, the download starts after them.
+            Defaults to 0.
+        on_progress (callable, optional): Called with the bytes received and the total, None if unknown,
+            after every chunk. Defaults to None.
+
+    Returns:
+        int: Bytes of the whole content.
+    """
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaDownloadProgress
+    from googleapiclient.http import MediaIoBaseDownload
+
+    downloader = MediaIoBaseDownload(sink, request, chunksize=chunk_size or CHUNK_SIZE)
+    # Continues with a Range request after the bytes already received
+    downloader._progress = offset
+
+    def next_chunk():
+        try:
+            return downloader.next_chunk()
+        except HttpError as error:
+            # Asked for the bytes after the end, a previous download had received them all
+            if error.resp.status == 416 and error.resp.get('content-range', '').endswith(f'/{downloader._progress}'):
+                return MediaDownloadProgress(downloader._progress, downloader._progress), True
+            raise
+
+    done = False
+    with deadline.default_timeout('drive'):
+        while not done:
+            status, done = execution.call_with_retries(next_chunk, description=f'{request.methodId} media')
+            if on_progress:
+                on_progress(status.resumable_progress, status.total_size)
+    return downloader._progress
+
+
+def download_to_file(request, destination_path, chunk_size=None, resume=True, on_progress=None, version=None):
+    """Downloads the content of a media request to a file, through a partial file renamed at the end.
+
+    Args:
+        request (googleapiclient.http.HttpRequest): Media request built by a service.
+        destination_path (str): Path of the file to write.
+        chunk_size (int, optional): Bytes requested at a time. Defaults to CHUNK_SIZE.
+        resume (bool, optional): Whether to continue the partial file left by a previous download.
+            Exports must not be resumed, they ignore Range headers. Defaults to True.
+        on_progress (callable, optional): Called with the bytes received and the total after every chunk.
+            Defaults to None.
+        version (str, optional): Version of the content, such as `file_version` of the Drive file. A partial
+            file is only continued by a download of the same version. Defaults to None, which starts over.
+
+    Returns:
+        int: Bytes of the file.
+    """
+    partial_path = destination_path + PARTIAL_SUFFIX
+    version_path = partial_path + '.version'
+    offset = 0
+    if resume and version is not None and os.path.exists(partial_path):
+        try:
+            with open(version_path) as version_file:
+                partial_version = version_file.read()
+        except FileNotFoundError:
+            partial_version = None
+        # Bytes of another version followed by the rest of this one would make a corrupt file
+        if partial_version == version:
+            offset = os.path.getsize(partial_path)
+    if not offset and version is not None:
+        file_lock.write_atomic(version_path, version)
+    with open(partial_path, 'ab' if offset else 'wb') as partial_file:
+        size = download(request, partial_file, chunk_size, offset, on_progress)
+    os.replace(partial_path, destination_path)
+    if os.path.exists(version_path):
+        os.remove(version_path)
+    return size
+
+
+def file_version(file):
+    """Returns what identifies the content of a Drive file with the `VERSION_FIELDS`, None if it has none."""
+    return file.get('md5Checksum') or file.get('headRevisionId') or file.get('modifiedTime')
+
+
+def download_folder(folder_id, destination_folder, max_workers=MAX_WORKERS, max_bytes_in_flight=MAX_BYTES_IN_FLIGHT,
+                    export_formats=None, chunk_size=None):
+    """Copies a Drive folder and everything below it to a local folder.
+
+    Google Workspace files are exported in the format of `export_formats` and the other files are
+    downloaded as they are. Files whose local copy has the same md5 checksum, or the same modification
+    time for exports, are skipped, so running it again only transfers what changed.
+
+    Args:
+        folder_id (str): Id of the Drive folder.
+        destination_folder (str): Local folder where to write the files, created if missing.
+        max_workers (int, optional): Downloads running at the same time. Defaults to MAX_WORKERS.
+        max_bytes_in_flight (int, optional): Bytes of the files being downloaded at the same time, a larger
+            file is downloaded alone. Defaults to MAX_BYTES_IN_FLIGHT.
+        export_formats (dict, optional): `(mime type, extension)` of the exports by Google Workspace mime type.
+            Defaults to EXPORT_FORMATS.
+        chunk_size (int, optional): Bytes requested at a time. Defaults to CHUNK_SIZE.
+
+    Returns:
+        DownloadReport: The result of every file, failed downloads don't raise.
+    """
+    export_formats = EXPORT_FORMATS if export_formats is None else export_formats
+    budget = _ByteBudget(max_bytes_in_flight)
+    local_folders = {folder_id: destination_folder}
+    local_paths = set()
+    os.makedirs(destination_folder, exist_ok=True)
+
+    def run(file, path, export_format, reserved):
+        try:
+            return _download_file(file, path, export_format, chunk_size)
+        except Exception as error:
+            return DownloadResult(path, file, 'failed', 0, error)
+        finally:
+            budget.release(reserved)
+
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers, thread_name_prefix='drive-download') as executor:
+        for _, file in drive_index.walk(folder_id, max_workers=max_workers):
+            parent = next(parent for parent in file['parents'] if parent in local_folders)
+            name = _local_name(file['name'])
+            export_format = export_formats.get(file['mimeType'])
+            if export_format and not name.endswith(export_format[1]):
+                name += export_format[1]
+            path = os.path.join(local_folders[parent], name)
+            if path in local_paths:
+                # Drive allows several files with the same name in a folder
+                root, extension = os.path.splitext(path)
+                path = f'{root} ({file["id"]}){extension}'
+            local_paths.add(path)
+            if not _is_inside(path, destination_folder):
+                results.append(DownloadResult(path, file, 'failed', 0,
+                                              ValueError(f'{path} is outside of {destination_folder}')))
+                continue
+
+            if file['mimeType'] == drive.FOLDER_MIME_TYPE:
+                local_folders[file['id']] = path
+                os.makedirs(path, exist_ok=True)
+            elif file['mimeType'].startswith(WORKSPACE_MIME_PREFIX) and not export_format:
+                results.append(DownloadResult(path, file, 'unsupported', 0, None))
+            else:
+                # Exports have no size, they take a chunk of the budget
+                reserved = budget.acquire(int(file.get('size') or chunk_size or CHUNK_SIZE))
+                results.append(executor.submit(contextvars.copy_context().run, run, file, path, export_format,
+                                               reserved))
+        results = [result if isinstance(result, DownloadResult) else result.result() for result in results]
+    written = sum(result.bytes for result in results)
+    return DownloadReport(results, written, time.monotonic() - started)
+
+
+def _download_file(file, path, export_format, chunk_size):
+    """Downloads or exports a file unless its local copy is up to date."""
+    modified = _timestamp(file['modifiedTime']) if file.get('modifiedTime') else None
+    if _up_to_date(file, path, modified):
+        return DownloadResult(path, file, 'skipped', 0, None)
+
+    service = auth.get_service("drive")
+    if export_format:
+        request = service.files().export_media(fileId=file['id'], mimeType=export_format[0])
+        # Exports ignore Range headers, a partial export can't be continued
+        size = download_to_file(request, path, chunk_size=chunk_size, resume=False)
+    else:
+        request = service.files().get_media(fileId=file['id'], supportsAllDrives=True)
+        size = download_to_file(request, path, chunk_size=chunk_size, version=file_version(file))
+    if modified is not None:
+        # Next runs compare it with the modifiedTime of the file
+        os.utime(path, (modified, modified))
+    return DownloadResult(path, file, 'exported' if export_format else 'downloaded', size, None)
+
+
+def _local_name(name):
+    """Name of a Drive file that stays a single entry of its local folder."""
+    for separator in ('/', os.sep, os.altsep):
+        if separator:
+            name = name.replace(separator, '_')
+    # Drive accepts names that mean the folder itself or its parent
+    return '_' * len(name) if name in ('', '.', '..') else name
+
+
+def _is_inside(path, folder):
+    folder = os.path.realpath(folder)
+    return os.path.commonpath([os.path.realpath(path), folder]) == folder
+
+
+def _up_to_date(file, path, modified):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if 'size' in file and stat.st_size != int(file['size']):
+        return False
+    if modified is not None and abs(stat.st_mtime - modified) < 1:
+        return True
+    if file.get('md5Checksum') and _md5(path) == file['md5Checksum']:
+        if modified is not None:
+            os.utime(path, (modified, modified))
+        return True
+    return False
+
+
+def _md5(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as local_file:
+        for block in iter(lambda: local_file.read(1024 * 1024), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def _timestamp(rfc3339):
+    """Seconds since the epoch of a time such as '2024-05-01T10:00:00.000Z'."""
+    return datetime.datetime.strptime(rfc3339, '%Y-%m-%dT%H:%M:%S.%fZ').replace(
+        tzinfo=datetime.timezone.utc).timestamp()
+
+
+class _ByteBudget:
+    """Bytes that can be reserved by the downloads running at the same time."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size):
+        """Waits until `size` bytes, at most the whole budget, are free. Returns the bytes reserved."""
+        size = min(size, self.limit)
+        with self._condition:
+            self._condition.wait_for(lambda: self.used + size <= self.limit)
+            self.used += size
+        return size
+
+    def release(self, size):
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
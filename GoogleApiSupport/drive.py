@@ -1,28 +1,24 @@
 from GoogleApiSupport import auth
-from apiclient import errors
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.http import MediaIoBaseUpload
 import mimetypes
+from collections import namedtuple
 
 # Permissions functions
 
 # https://developers.google.com/drive/api/v2/reference/permissions/list
-def retrieve_permissions(file_id, **kwargs):
+def retrieve_permissions(file_id, fields='permissions(id,type,role,emailAddress,domain)', **kwargs):
     """Retrieve a list of permissions.
     Args:
     file_id: ID of the file to retrieve permissions for.
+    fields: Field mask of the response, '*' returns every attribute of the permissions.
     Returns:
-    List of permissions.
+    List of permissions. Errors left after the retries are raised.
     """
     service = auth.get_service("drive")
-    try:
-        permissions = service.permissions().list(fileId=file_id, **kwargs).execute()
-        return permissions.get('permissions', [])
-    except errors.HttpError as error:
-        print('An error occurred: %s' % error)
+    permissions = service.permissions().list(fileId=file_id, fields=fields, **kwargs).execute()
+    return permissions.get('permissions', [])
 
 # https://developers.google.com/drive/api/v2/reference/permissions/insert
-def insert_permission(file_id, perm_type, role, email_address=None, domain=None, **kwargs):
+def insert_permission(file_id, perm_type, role, email_address=None, domain=None, batch=None, **kwargs):
     """Insert a new permission.
     Args:
     file_id: ID of the file to insert permission for.
@@ -30,8 +26,9 @@ def insert_permission(file_id, perm_type, role, email_address=None, domain=None,
     role: The value 'owner', 'writer' or 'reader'.
     email_address: User or group e-mail address (needed if perm_type is 'user' or 'group')
     domain: Domain name (needed if perm_type is 'domain')
+    batch: A `batch.Batch` to send the call with, instead of sending it now.
     Returns:
-    The inserted permission if successful, None otherwise.
+    The inserted permission, errors left after the retries are raised. With a batch, the future of the permission.
     """
     service = auth.get_service("drive")
     new_permission = {
@@ -40,56 +37,125 @@ def insert_permission(file_id, perm_type, role, email_address=None, domain=None,
         'emailAddress': email_address,
         'domain': domain
     }
-    try:
-        return service.permissions().create(fileId=file_id, body=new_permission, **kwargs).execute()
-    except errors.HttpError as error:
-        print('An error occurred: %s' % error)
+    request = service.permissions().create(fileId=file_id, body=new_permission, **kwargs)
+    if batch is not None:
+        return batch.add(request)
+    return request.execute()
 
 
+# Roles of the permissions, from the most to the least powerful.
+ROLES = ('owner', 'organizer', 'fileOrganizer', 'writer', 'commenter', 'reader')
+
+PermissionGrant = namedtuple('PermissionGrant', [
+    'permission',  # permission sent to the target file, or that would have been sent
+    'status',      # 'created', 'existing' (the target already had it) or 'failed'
+    'result',      # permission created, or the one of the target that already granted it
+    'error',       # HttpError of the failed grants
+])
+
+
+def plan_permission_copy(start_permissions, end_permissions, transfer_ownership=False):
+    """Pairs the permissions to copy with the permission of the target granting them already, if any.
+
+    Args:
+        start_permissions (list): Permissions of the source file, with type, role, emailAddress and domain.
+        end_permissions (list): Permissions of the target file, with the same attributes.
+        transfer_ownership (bool, optional): Whether the owner of the source becomes owner of the target,
+            otherwise it becomes a writer. Defaults to False.
+
+    Returns:
+        list: `(permission, existing)` tuples, `existing` being None for the grants missing in the target.
+    """
+    granted = {_grantee(permission): permission for permission in end_permissions}
+    plan = []
+    for permission in start_permissions:
+        perm_type = permission['type']
+        # Ownership transfers are not supported for files and folders in shared drives. - OR maybe yes with additional arg "supportAllDrives"
+        # Owndership transfer is only possible if service account has domain-wide authority
+        role = 'writer' if transfer_ownership == False and permission['role'] == 'owner' else permission['role']
+        # value: User or group e-mail address, domain name or None for  for 'anyone' or 'default' type.
+        new_permission = {
+            'type': perm_type,
+            'role': role,
+            'emailAddress': permission['emailAddress'] if perm_type in ('user', 'group') else None,
+            'domain': permission['domain'] if perm_type == 'domain' else None,
+        }
+        existing = granted.get(_grantee(new_permission))
+        if existing is not None and not _grants_at_least(existing['role'], role):
+            existing = None
+        plan.append((new_permission, existing))
+    return plan
+
+
+def _grantee(permission):
+    address = permission.get('emailAddress') or permission.get('domain')
+    return permission['type'], address.lower() if address else None
+
+
+def _grants_at_least(role, wanted_role):
+    if role in ROLES and wanted_role in ROLES:
+        return ROLES.index(role) <= ROLES.index(wanted_role)
+    return role == wanted_role
+
+
+@auth.single_pool_member()
 def copy_permissions(start_file_id, end_file_id, **kwargs):
-    """Copy permissions from one file to another.
+    """Copy the permissions of one file that another one lacks.
+    The permissions of both files are read in one batch and the missing ones are inserted in another.
     Args:
     start_file_id: ID of the file to retrieve permissions for.
     end_file_id: ID of the file to insert permission for.
     Returns:
-    The copied permissions if successful, None otherwise.
+    A list of `PermissionGrant`, one for every permission of the start file.
     """
-    
+    from googleapiclient import errors
+    from GoogleApiSupport.batch import Batch
+
     # Values of needed kwargs
-    retrieve_fields = kwargs['fields'] if 'fields' in kwargs else '*'
+    retrieve_fields = kwargs['fields'] if 'fields' in kwargs else 'permissions(id,type,role,emailAddress,domain)'
     supports_all_drives = kwargs['supportsAllDrives'] if 'supportsAllDrives' in kwargs else False
     transfer_ownership = kwargs['transferOwnership'] if 'transferOwnership' in kwargs else False
     send_notification_email = kwargs['sendNotificationEmail'] if 'sendNotificationEmail' in kwargs and transfer_ownership == False else True
-    
-    # Retrieve permissions
-    start_permissions = retrieve_permissions(file_id=start_file_id, fields=retrieve_fields)
 
-    # Insert permissions one by one
-    for permission in start_permissions:
-        perm_type = permission['type']
-        # Ownership transfers are not supported for files and folders in shared drives. - OR maybe yes with additional arg "supportAllDrives"
-        # Owndership transfer is only possible if service account has domain-wide authority
-        role = 'writer' if transfer_ownership == False and permission['role'] == 'owner' else permission['role']
-        # value: User or group e-mail address, domain name or None for  for 'anyone' or 'default' type.
-        email_address = permission['emailAddress'] if perm_type in ('user', 'group') else None
-        domain = permission['domain'] if perm_type == 'domain' else None
-            
-        end_permissions = list()
+    # Retrieve the permissions of both files at once
+    with Batch("drive") as retrieve_batch:
+        service = retrieve_batch.service
+        start_permissions, end_permissions = [
+            retrieve_batch.add(service.permissions().list(fileId=file_id, fields=retrieve_fields,
+                                                          supportsAllDrives=supports_all_drives))
+            for file_id in (start_file_id, end_file_id)]
+    plan = plan_permission_copy(start_permissions.result().get('permissions', []),
+                                end_permissions.result().get('permissions', []),
+                                transfer_ownership)
+
+    # Insert the missing permissions in as few requests as possible
+    with Batch("drive") as permissions_batch:
+        grants = [insert_permission(file_id=end_file_id,
+                                    perm_type=permission['type'],
+                                    role=permission['role'],
+                                    email_address=permission['emailAddress'],
+                                    domain=permission['domain'],
+                                    batch=permissions_batch,
+                                    supportsAllDrives=supports_all_drives,
+                                    transferOwnership=transfer_ownership,
+                                    sendNotificationEmail=send_notification_email)
+                  if existing is None else None
+                  for permission, existing in plan]
+
+    results = []
+    for (permission, existing), grant in zip(plan, grants):
+        if grant is None:
+            results.append(PermissionGrant(permission, 'existing', existing, None))
+            continue
         try:
-            new_permission = insert_permission(file_id=end_file_id,
-                                     perm_type=perm_type,
-                                     role=role,
-                                     email_address=email_address,
-                                     domain=domain,
-                                     supportsAllDrives=supports_all_drives,
-                                     transferOwnership=transfer_ownership,
-                                     sendNotificationEmail=send_notification_email)
-            end_permissions = end_permissions.append(new_permission)
+            results.append(PermissionGrant(permission, 'created', grant.result(), None))
         except errors.HttpError as error:
             print('An error occurred: %s' % error)
-    
-    print('Successfully transferred permissions from file {} to file {}'.format(start_file_id, end_file_id))
-    return end_permissions
+            results.append(PermissionGrant(permission, 'failed', None, error))
+
+    created = sum(result.status == 'created' for result in results)
+    print('Successfully transferred {} permissions from file {} to file {}'.format(created, start_file_id, end_file_id))
+    return results
 
 def get_file_name(file_id):
     service = auth.get_service("drive")
@@ -98,7 +164,10 @@ def get_file_name(file_id):
     return response
 
 
-def move_file(file_id, folder_destination_id):
+def move_file(file_id, folder_destination_id, batch=None):
+    """Moves a file to a folder. With a `batch`, the current parents are read straight away and
+    the move is queued in it.
+    """
     print('Moving file id {} to folder with id {}'.format(
         file_id, folder_destination_id))
     service = auth.get_service("drive")
@@ -108,21 +177,38 @@ def move_file(file_id, folder_destination_id):
 
     previous_parents = ",".join(file.get('parents'))
 
-    response = service.files().update(fileId=file_id,
-                                      addParents=folder_destination_id,
-                                      removeParents=previous_parents,
-                                      supportsAllDrives=True,
-                                      fields='id, parents').execute()
-    return response
+    request = service.files().update(fileId=file_id,
+                                     addParents=folder_destination_id,
+                                     removeParents=previous_parents,
+                                     supportsAllDrives=True,
+                                     fields='id, parents')
+    if batch is not None:
+        return batch.add(request)
+    return request.execute()
 
 
-def delete_file(file_id):
+def delete_file(file_id, batch=None, **kwargs):
     service = auth.get_service("drive")
-    response = service.files().delete(fileId=file_id).execute()
+    request = service.files().delete(fileId=file_id, **kwargs)
+    if batch is not None:
+        return batch.add(request)
+    response = request.execute()
     print(f"Deleted file: {file_id}")
     return response
 
 
+def trash_file(file_id, batch=None, **kwargs):
+    """Moves a file to the trash, where it can still be restored, unlike `delete_file`."""
+    service = auth.get_service("drive")
+    request = service.files().update(fileId=file_id, body={'trashed': True}, fields='id', **kwargs)
+    if batch is not None:
+        return batch.add(request)
+    response = request.execute()
+    print(f"Trashed file: {file_id}")
+    return response
+
+
+@auth.single_pool_member()
 def copy_file(file_from_id, new_file_name='', supports_all_drives=False, transfer_permissions=False, **kwargs):
     """
     By passing an old file id, creates a copy and returns the id of the file copy
@@ -149,10 +235,11 @@ def copy_file(file_from_id, new_file_name='', supports_all_drives=False, transfe
 
 
 def upload_image_to_drive(image_name: str, image_file_path: str, folder_destination_id=None):
+    from GoogleApiSupport import uploads
+
     service = auth.get_service("drive")
 
-    file = service.files().create(
-        body={'name': image_name, 'mimeType': 'image/png'}, media_body=image_file_path).execute()
+    file = uploads.upload(image_name, local_file_path=image_file_path, mime_type='image/png')
     file_id = file.get('id')
     service.permissions().create(fileId=file_id,
                                  body={"role": "reader", "type": "anyone", "withLink": True}).execute()
@@ -167,10 +254,11 @@ def upload_image_to_drive(image_name: str, image_file_path: str, folder_destinat
     return {'image_url': image_url, 'file_id': file_id}
 
 def upload_image(image_name: str, image_file_path: str, folder_destination_id=None):
+    from GoogleApiSupport import uploads
+
     service = auth.get_service("drive")
 
-    file = service.files().create(
-        body={'name': image_name, 'mimeType': 'image/png'}, media_body=image_file_path).execute()
+    file = uploads.upload(image_name, local_file_path=image_file_path, mime_type='image/png')
     file_id = file.get('id')
     service.permissions().create(fileId=file_id,
                                  body={"role": "reader", "type": "anyone", "withLink": True}).execute()
@@ -185,52 +273,40 @@ def upload_image(image_name: str, image_file_path: str, folder_destination_id=No
     return {'image_url': image_url, 'file_id': file_id}
 
 
-def upload_file(file_name: str, parent_folder_id: list, local_file_path=None, buffer=None, mime_type=None):
+def upload_file(file_name: str, parent_folder_id: list, local_file_path=None, buffer=None, mime_type=None,
+                chunk_size=None, on_progress=None):
     """ Upload a new file of any type to the drive
+    Files larger than the chunk size are uploaded in chunks and resumed where they failed, see `uploads`.
     Args:
     file_name: the name you would like to use in google drive
     parent_folder_id: optional list of the parent folder id. Without this, it will give access to anyone with the link
     local_file_path: if uploading a local file, you provide the path here
     buffer: if uploading a file stored in memory, provide a BytesIO object
     mime_typ: required if providing a buffer, optional if using a local file path
+    chunk_size: bytes sent per request, a multiple of 256 KiB (by default: uploads.CHUNK_SIZE)
+    on_progress: optional callable receiving the bytes sent and the total after every chunk
     Returns:
     A dictionary with the file_url and file_id
     """
+    from GoogleApiSupport import uploads
+
     service = auth.get_service("drive")
-    try:
-        if local_file_path and buffer:
-            print("Error: Please provide a local file path OR a buffer")
-            return None
-        if local_file_path:
-            if not mime_type:
-                mime_type, _ = mimetypes.guess_type(local_file_path)
-            media_content = MediaFileUpload(local_file_path)
-            request_body = {'name': file_name, 
-                            'mimeType': mime_type, 
-                           }
-        if buffer:
-            media_content = MediaIoBaseUpload(buffer, mime_type)
-            request_body = {'name': file_name, 
-                            'mimeType': mime_type, 
-                           }
-        if parent_folder_id:
-            request_body['parents'] = parent_folder_id
-        
-        file = service.files().create(
-            body=request_body, 
-            media_body=media_content,
-            supportsAllDrives=True).execute()
-        
-        file_id = file['id']
-        file_url = f"https://drive.google.com/file/d/{file_id}/view"
-        
-        if not parent_folder_id:
-            service.permissions().create(fileId=file_id,
-                                         body={"role": "reader", "type": "anyone", "withLink": True}).execute()
-
-    except Exception as e:
-        print(f'Error: {e}')
+    if local_file_path and buffer:
+        print("Error: Please provide a local file path OR a buffer")
         return None
+    if local_file_path and not mime_type:
+        mime_type, _ = mimetypes.guess_type(local_file_path)
+
+    # Errors left after the retries, and DeadlineExceeded, reach the caller
+    file = uploads.upload(file_name, local_file_path=local_file_path, buffer=buffer, mime_type=mime_type,
+                          parents=parent_folder_id, chunk_size=chunk_size, on_progress=on_progress)
+
+    file_id = file['id']
+    file_url = f"https://drive.google.com/file/d/{file_id}/view"
+
+    if not parent_folder_id:
+        service.permissions().create(fileId=file_id,
+                                     body={"role": "reader", "type": "anyone", "withLink": True}).execute()
 
     return {'file_url': file_url, 'file_id': file_id}
 
@@ -251,30 +327,59 @@ def create_folder(name, parent_folder: list = list()):
     return response
 
 
-def folders_in_folder(parent_folder):
-    service = auth.get_service("drive")
+# Largest page the files.list method returns.
+PAGE_SIZE = 1000
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
 
-    response = service.files().list(q="mimeType='application/vnd.google-apps.folder' \
-                                    and parents='{parent_folder}'".format(parent_folder=parent_folder)).execute()
-    return response['files']
 
+def iter_files(q, fields='files(id,name,mimeType)', page_size=PAGE_SIZE, **kwargs):
+    """Yields the files matching a query, following the pages of the results as they are consumed.
 
-def files_in_folder(parent_folder):
+    Args:
+        q (str): Drive search query, such as "'folder_id' in parents".
+        fields (str, optional): Field mask of the files, `nextPageToken` is added to it. Defaults to
+            'files(id,name,mimeType)'.
+        page_size (int, optional): Files per page, at most 1000. Defaults to PAGE_SIZE.
+        **kwargs: Other parameters of files.list, such as `corpora` or `driveId`.
+
+    Yields:
+        dict: Every file, one page at a time.
+    """
     service = auth.get_service("drive")
+    if 'nextPageToken' not in fields:
+        fields = f'nextPageToken,{fields}'
+    page_token = None
+    while True:
+        response = service.files().list(q=q, fields=fields, pageSize=page_size, pageToken=page_token,
+                                        **kwargs).execute()
+        yield from response.get('files', [])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def iter_files_in_folder(parent_folder, fields='files(id,name,mimeType)', **kwargs):
+    """Yields the files of a folder, see `iter_files`."""
+    return iter_files(f"'{parent_folder}' in parents", fields=fields, **kwargs)
 
-    response = service.files().list(q="parents='{parent_folder}'".format(parent_folder=parent_folder)).execute()
-    return response['files']
+
+def iter_folders_in_folder(parent_folder, fields='files(id,name,mimeType)', **kwargs):
+    """Yields the folders of a folder, see `iter_files`."""
+    return iter_files(f"mimeType='{FOLDER_MIME_TYPE}' and '{parent_folder}' in parents", fields=fields, **kwargs)
+
+
+def folders_in_folder(parent_folder, fields='files(id,name,mimeType)'):
+    return list(iter_folders_in_folder(parent_folder, fields=fields))
+
+
+def files_in_folder(parent_folder, fields='files(id,name,mimeType)'):
+    return list(iter_files_in_folder(parent_folder, fields=fields))
 
 
 def search_folder_id_by_name(name, parent_folder):
-    service = auth.get_service("drive")
+    files = list(iter_files(f"mimeType='{FOLDER_MIME_TYPE}' and name='{name}' and '{parent_folder}' in parents",
+                            fields='files(id)'))
 
-    response = service.files().list(q="mimeType='application/vnd.google-apps.folder' \
-                                    and name='{name}' and parents='{parent_folder}'".format(
-                                        name=name, parent_folder=parent_folder)).execute()
-    
-    files = response['files'] 
-    
     if len(files) > 1:
         print('Warning: There\'s more than 1 folder with name {}'.format(name))
 
@@ -284,65 +389,78 @@ def search_folder_id_by_name(name, parent_folder):
     return files[0]['id']
 
 
-def download_file(file_id, destination_path='test.pdf', mime_type='application/pdf'):
+def download_file(file_id, destination_path='test.pdf', mime_type='application/pdf', chunk_size=None,
+                  on_progress=None):
+    """Exports a Google Workspace file, such as a Doc or a Slides presentation, streaming it to disk.
+    Args:
+    file_id: ID of the file to export.
+    destination_path: path of the file to write.
+    mime_type: format of the export.
+    chunk_size: bytes requested at a time (by default: downloads.CHUNK_SIZE)
+    on_progress: optional callable receiving the bytes received and the total after every chunk
+    """
+    from GoogleApiSupport import downloads
+
     service = auth.get_service("drive")
-    data = service.files().export(
-        fileId=file_id,
-        mimeType=mime_type
-    ).execute()
-
-    f = open(destination_path, 'wb')
-    f.write(data)
-    f.close()
+    request = service.files().export_media(fileId=file_id, mimeType=mime_type)
+    # Exports ignore Range headers, a partial export can't be continued
+    downloads.download_to_file(request, destination_path, chunk_size=chunk_size, resume=False,
+                               on_progress=on_progress)
     return
-    
+
+
+def download_media(file_id, destination, chunk_size=None, resume=True, on_progress=None):
+    """Downloads the content of a file that is not a Google Workspace file, in chunks.
+    Args:
+    file_id: ID of the file to download.
+    destination: path of the file to write, or a binary stream to write the content to.
+    chunk_size: bytes requested at a time (by default: downloads.CHUNK_SIZE)
+    resume: whether to continue the partial file left by an interrupted download of the same path,
+        when the file did not change since
+    on_progress: optional callable receiving the bytes received and the total after every chunk
+    Returns:
+    The size of the file in bytes.
+    """
+    from GoogleApiSupport import downloads
+
+    service = auth.get_service("drive")
+    request = service.files().get_media(fileId=file_id, supportsAllDrives=True)
+    if isinstance(destination, str):
+        version = None
+        if resume:
+            file = service.files().get(fileId=file_id, fields=downloads.VERSION_FIELDS,
+                                       supportsAllDrives=True).execute()
+            version = downloads.file_version(file)
+        return downloads.download_to_file(request, destination, chunk_size=chunk_size, resume=resume,
+                                          on_progress=on_progress, version=version)
+    return downloads.download(request, destination, chunk_size=chunk_size, on_progress=on_progress)
+
 
 # Specific Team Drive functions
 
 def get_folder_id_by_path(path, team_drive_id):
-    print('Retrieving folder id for path {} inside TeamDrive with id {}'.format(
-        path, team_drive_id))
-    parent_folder = ''
-    last_level = ''
-    for level in path.split('/'):
-        if parent_folder == '':
-            parent_folder = get_folder_id_by_name(level, team_drive_id)
-        else:
-            folders_in_folder = list_folders_in_folder(
-                parent_folder, team_drive_id)
-            if level in [response['name'] for response in folders_in_folder]:
-                parent_folder = [
-                    response['id'] for response in folders_in_folder if response['name'] == level][0]
-            else:
-                print('Creating folder {} inside parent folder {} with folder id = {}'.format(
-                    level, last_level, parent_folder))
-                parent_folder = create_folder(level, [parent_folder])['id']
-        last_level = level
-    return parent_folder
-
-
-def list_folders_in_folder(parent_folder, team_drive_id):
-    service = auth.get_service("drive")
+    """Returns the id of the folder at a path such as 'Reports/2024' of a shared drive, creating the
+    missing folders. The ids are cached, see `path_resolver`.
+    """
+    from GoogleApiSupport import path_resolver
 
-    response = service.files().list(teamDriveId=team_drive_id, includeTeamDriveItems=True,
-                                    corpora='teamDrive', supportsAllDrives=True,
-                                    q="mimeType='application/vnd.google-apps.folder' \
-                                    and parents='{parent_folder}'".format(parent_folder=parent_folder)).execute()
-    return response['files']
+    return path_resolver.get_resolver(team_drive_id).resolve(path)
 
 
-def get_folder_id_by_name(name, team_drive_id):
-    service = auth.get_service("drive")
+def list_folders_in_folder(parent_folder, team_drive_id, fields='files(id,name,mimeType)'):
+    return list(iter_folders_in_folder(parent_folder, fields=fields, teamDriveId=team_drive_id,
+                                       includeTeamDriveItems=True, corpora='teamDrive', supportsAllDrives=True))
 
-    response = service.files().list(teamDriveId=team_drive_id, includeTeamDriveItems=True,
-                                    corpora='teamDrive', supportsAllDrives=True,
-                                    q="mimeType='application/vnd.google-apps.folder' \
-                                    and name='{name}'".format(name=name)).execute()
 
-    if len(response['files']) > 1:
+def get_folder_id_by_name(name, team_drive_id):
+    files = list(iter_files(f"mimeType='{FOLDER_MIME_TYPE}' and name='{name}'", fields='files(id)',
+                            teamDriveId=team_drive_id, includeTeamDriveItems=True, corpora='teamDrive',
+                            supportsAllDrives=True))
+
+    if len(files) > 1:
         print('Warning: There\'s more than 1 folder with name {}'.format(name))
 
-    elif len(response['files']) == 0:
+    elif len(files) == 0:
         raise ('TODO: Create folder {}'.format(name))
 
-    return response['files'][0]['id']
\ No newline at end of file
+    return files[0]['id']
\ No newline at end of file
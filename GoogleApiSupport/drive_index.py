@@ -0,0 +1,202 @@
+"""Crawling of Drive folder trees into an index of paths and ids that is queried offline.
+
+    from GoogleApiSupport.drive_index import DriveIndex
+
+    index = DriveIndex(root_folder_id).crawl()
+    for report in reports:
+        folder_id = index.resolve(f'Reports/{report.country}/{report.month}')
+
+`walk` lists the folders breadth first, `MAX_WORKERS` of them at a time, so a tree costs one
+`files.list` call per folder (per 1000 children) whatever the number of paths resolved later.
+Paths are the names of the folders below the root joined by '/', the root itself is ''.
+"""
+
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from GoogleApiSupport import drive
+
+# Folders listed at the same time.
+MAX_WORKERS = 8
+# Attributes kept of every file. The index needs id, name, mimeType and parents.
+FIELDS = 'files(id,name,mimeType,parents,modifiedTime,md5Checksum,size)'
+# Parameters of files.list finding the files of shared drives too.
+LIST_KWARGS = {'supportsAllDrives': True, 'includeItemsFromAllDrives': True}
+
+
+def walk(folder_id, fields=FIELDS, folders_only=False, max_workers=MAX_WORKERS, **kwargs):
+    """Yields the files below a folder, breadth first, listing several folders concurrently.
+
+    Args:
+        folder_id (str): Id of the folder to start from.
+        fields (str, optional): Field mask of the files, must include id, name and mimeType. Defaults to FIELDS.
+        folders_only (bool, optional): Whether to skip the files that are not folders. Defaults to False.
+        max_workers (int, optional): Folders listed at the same time. Defaults to MAX_WORKERS.
+        **kwargs: Other parameters of files.list, on top of LIST_KWARGS.
+
+    Yields:
+        tuple: `(path, file)` for every file, with its path relative to `folder_id`.
+    """
+    kwargs = dict(LIST_KWARGS, **kwargs)
+    query = "'{}' in parents and trashed=false"
+    if folders_only:
+        query += f" and mimeType='{drive.FOLDER_MIME_TYPE}'"
+
+    def list_folder(parent_id):
+        return list(drive.iter_files(query.format(parent_id), fields=fields, **kwargs))
+
+    executor = ThreadPoolExecutor(max_workers, thread_name_prefix='drive-walk')
+    pending = {}
+    seen = {folder_id}
+
+    def submit(parent_id, path):
+        # Threads of the pool do not inherit the context, with the current deadline
+        pending[executor.submit(contextvars.copy_context().run, list_folder, parent_id)] = path
+
+    try:
+        submit(folder_id, '')
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder_path = pending.pop(future)
+                for file in future.result():
+                    path = f'{folder_path}/{file["name"]}' if folder_path else file['name']
+                    # Folders with several parents are only listed once
+                    if file['mimeType'] == drive.FOLDER_MIME_TYPE and file['id'] not in seen:
+                        seen.add(file['id'])
+                        submit(file['id'], path)
+                    yield path, file
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+class DriveIndex:
+    """Paths and metadata of the files below a Drive folder.
+
+    Args:
+        root_id (str): Id of the folder at the root of the index.
+        fields (str, optional): Field mask of the files, must include id, name, mimeType and parents.
+            Defaults to FIELDS.
+        folders_only (bool, optional): Whether to index the folders only. Defaults to False.
+        max_workers (int, optional): Folders listed at the same time. Defaults to MAX_WORKERS.
+        **kwargs: Other parameters of files.list, such as `driveId` and `corpora`.
+    """
+
+    def __init__(self, root_id, fields=FIELDS, folders_only=False, max_workers=MAX_WORKERS, **kwargs):
+        self.root_id = root_id
+        self.fields = fields
+        self.folders_only = folders_only
+        self.max_workers = max_workers
+        self.list_kwargs = kwargs
+        self._files = {}
+        self._paths = {root_id: ''}
+        self._ids = {'': root_id}
+        self._children = {root_id: set()}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return path.strip('/') in self._ids
+
+    def __iter__(self):
+        """Yields the metadata of the files, breadth first, every folder before the files below it."""
+        with self._lock:
+            files = []
+            folders = [self.root_id]
+            for folder_id in folders:
+                for child_id in self._children.get(folder_id, ()):
+                    files.append(self._files[child_id])
+                    folders.append(child_id)
+        return iter(files)
+
+    def crawl(self, path=''):
+        """Lists the files below a folder of the index, the root by default, replacing what it knew of them.
+
+        Returns:
+            DriveIndex: The index itself.
+        """
+        with self._lock:
+            folder_id = self._ids[path.strip('/')]
+            for child_id in list(self._children.get(folder_id, ())):
+                self.remove(child_id)
+        for _, file in walk(folder_id, self.fields, self.folders_only, self.max_workers, **self.list_kwargs):
+            self.update(file)
+        return self
+
+    def resolve(self, path):
+        """Returns the id of the file at a path such as 'Reports/2024', None if there is none."""
+        return self._ids.get(path.strip('/'))
+
+    def get(self, file_id):
+        """Returns the metadata of a file of the index, None if it is not in it."""
+        return self._files.get(file_id)
+
+    def path(self, file_id):
+        """Returns the path of a file of the index, None if it is not in it."""
+        return self._paths.get(file_id)
+
+    def children(self, path=''):
+        """Returns the metadata of the files of a folder of the index."""
+        with self._lock:
+            return [self._files[child_id] for child_id in self._children.get(self._ids[path.strip('/')], ())]
+
+    def update(self, file):
+        """Adds a file to the index or applies a change of its name or parents.
+
+        Files whose parents are all outside of the indexed tree are removed from it.
+
+        Args:
+            file (dict): Metadata of the file, with at least id, name, mimeType and parents.
+        """
+        with self._lock:
+            parent_id = next((parent for parent in file.get('parents', ()) if parent in self._paths), None)
+            if parent_id is None:
+                self.remove(file['id'])
+                return
+            previous = self._files.get(file['id'])
+            if previous is not None:
+                self._unlink(previous)
+            self._files[file['id']] = file
+            self._children[parent_id].add(file['id'])
+            if file['mimeType'] == drive.FOLDER_MIME_TYPE:
+                self._children.setdefault(file['id'], set())
+            self._link(file['id'], parent_id)
+
+    def remove(self, file_id):
+        """Removes a file from the index, with everything below it when it is a folder."""
+        with self._lock:
+            file = self._files.pop(file_id, None)
+            if file is None:
+                return
+            self._unlink(file)
+            for child_id in list(self._children.pop(file_id, ())):
+                self.remove(child_id)
+
+    def _link(self, file_id, parent_id):
+        """Indexes the path of a file, and the paths below it when it is a folder that moved."""
+        parent_path = self._paths[parent_id]
+        name = self._files[file_id]['name']
+        path = f'{parent_path}/{name}' if parent_path else name
+        self._paths[file_id] = path
+        if self._ids.setdefault(path, file_id) != file_id:
+            logging.warning(f'There is more than one file with path {path}, resolving it to {self._ids[path]}')
+        for child_id in self._children.get(file_id, ()):
+            self._link(child_id, file_id)
+
+    def _unlink(self, file):
+        """Forgets the paths of a file and of the files below it, keeping them in the tree."""
+        for parent_id in file.get('parents', ()):
+            self._children.get(parent_id, set()).discard(file['id'])
+        stack = [file['id']]
+        while stack:
+            file_id = stack.pop()
+            path = self._paths.pop(file_id, None)
+            if path is not None and self._ids.get(path) == file_id:
+                del self._ids[path]
+            stack.extend(self._children.get(file_id, ()))
@@ -0,0 +1,157 @@
+"""Incremental sync of a `drive_index.DriveIndex` with the Changes API of Drive.
+
+    from GoogleApiSupport.drive_sync import DriveSync
+
+    sync = DriveSync(root_folder_id, state_path='reports-sync.json')
+    for change in sync.poll():
+        print(change.kind, change.path)
+
+The first poll crawls the folder once and keeps the page token of the Changes API. Every next
+poll, in this process or in a later run when `state_path` is set, asks Drive only for the
+changes made since the previous one, a request per 1000 changes, and applies those under the
+watched folder to the index. Changes elsewhere in the drive are dropped without further calls.
+"""
+
+import os
+import json
+import logging
+from collections import namedtuple
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import drive
+from GoogleApiSupport import file_lock
+from GoogleApiSupport import drive_index
+
+Change = namedtuple('Change', [
+    'kind',      # 'added', 'modified', 'moved' (renamed or moved within the folder) or 'removed'
+    'file_id',
+    'path',      # path in the index, before the change for the removed files
+    'file',      # metadata of the file, None for the removed files
+])
+
+
+class DriveSync:
+    """Keeps the index of a Drive folder up to date from the changes of its drive.
+
+    Args:
+        root_id (str): Id of the watched folder.
+        state_path (str, optional): JSON file keeping the page token and the index between runs.
+            Defaults to None, kept in memory.
+        drive_id (str, optional): Id of the shared drive of the folder. Defaults to None, My Drive.
+        **kwargs: Passed to `drive_index.DriveIndex`, such as `fields` or `folders_only`.
+    """
+
+    def __init__(self, root_id, state_path=None, drive_id=None, **kwargs):
+        self.state_path = state_path
+        self.drive_id = drive_id
+        self.index = drive_index.DriveIndex(root_id, **kwargs)
+        self.page_token = None
+        # The files of the changes come with the attributes the index keeps
+        file_fields = self.index.fields
+        if file_fields.startswith('files('):
+            file_fields = file_fields[len('files('):-1]
+        self.fields = f'nextPageToken,newStartPageToken,changes(changeType,fileId,removed,file({file_fields},trashed))'
+        if state_path and os.path.exists(state_path):
+            self._load()
+
+    def start(self):
+        """Crawls the watched folder and keeps the current page token of the changes."""
+        # Taken before the crawl, so the changes made while it runs are applied by the next poll
+        response = self._service().changes().getStartPageToken(**self._drive_kwargs()).execute()
+        self.index.crawl()
+        self.page_token = response['startPageToken']
+        self._save()
+
+    def poll(self):
+        """Applies the changes made since the last poll to the index.
+
+        Returns:
+            list: The `Change` of every file of the watched folder that changed, empty on the first poll.
+        """
+        from googleapiclient.errors import HttpError
+
+        if self.page_token is None:
+            self.start()
+            return []
+        service = self._service()
+        list_kwargs = dict(drive_index.LIST_KWARGS, **self._drive_kwargs())
+        changes = []
+        page_token = self.page_token
+        while page_token:
+            try:
+                response = service.changes().list(pageToken=page_token, fields=self.fields, pageSize=1000,
+                                                  includeRemoved=True, spaces='drive', **list_kwargs).execute()
+            except HttpError as error:
+                if error.resp.status not in (404, 410):
+                    raise
+                logging.warning(f'Page token of the changes of {self.index.root_id} expired, crawling it again')
+                self.page_token = None
+                self.start()
+                return []
+            for change in response.get('changes', []):
+                applied = self.apply(change)
+                if applied is not None:
+                    changes.append(applied)
+            page_token = response.get('nextPageToken')
+            if 'newStartPageToken' in response:
+                self.page_token = response['newStartPageToken']
+        self._save()
+        return changes
+
+    def apply(self, change):
+        """Applies one change of the Changes API to the index.
+
+        Returns:
+            Change: What changed in the watched folder, None if the change is outside of it.
+        """
+        # Changes of the shared drives themselves come without a file
+        if change.get('changeType', 'file') != 'file' or 'fileId' not in change:
+            return None
+        file_id = change['fileId']
+        file = change.get('file')
+        path = self.index.path(file_id)
+        if change.get('removed') or file is None or file.get('trashed'):
+            if path is None:
+                return None
+            self.index.remove(file_id)
+            return Change('removed', file_id, path, None)
+
+        inside = any(self.index.path(parent) is not None for parent in file.get('parents', ()))
+        if self.index.folders_only and file.get('mimeType') != drive.FOLDER_MIME_TYPE:
+            return None
+        if not inside:
+            if path is None:
+                return None
+            # Moved out of the watched folder
+            self.index.remove(file_id)
+            return Change('removed', file_id, path, None)
+
+        file = {key: value for key, value in file.items() if key != 'trashed'}
+        self.index.update(file)
+        new_path = self.index.path(file_id)
+        if path is None:
+            if file['mimeType'] == drive.FOLDER_MIME_TYPE:
+                # A folder moved into the watched one brings files that did not change themselves
+                self.index.crawl(new_path)
+            return Change('added', file_id, new_path, file)
+        return Change('moved' if new_path != path else 'modified', file_id, new_path, file)
+
+    def _service(self):
+        return auth.get_service("drive")
+
+    def _drive_kwargs(self):
+        return {'driveId': self.drive_id, 'supportsAllDrives': True} if self.drive_id else {}
+
+    def _load(self):
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        if state.get('root_id') != self.index.root_id:
+            return
+        for file in state['files']:
+            self.index.update(file)
+        self.page_token = state['page_token']
+
+    def _save(self):
+        if self.state_path:
+            state = {'root_id': self.index.root_id, 'page_token': self.page_token, 'files': list(self.index)}
+            file_lock.write_atomic(self.state_path, json.dumps(state))
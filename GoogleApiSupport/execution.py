@@ -0,0 +1,217 @@
+"""Execution of the requests built by the services of `auth`.
+
+Services are built with `ApiRequest` as request class, so every `.execute()` in the library
+goes through `call_with_retries`: rate limited and transient errors are retried with
+exponential backoff and full jitter, honoring `Retry-After`, until `MAX_RETRY_TIME` is spent.
+
+Requests that are not idempotent, such as `files.copy` or `permissions.create`, are only
+retried when the API refused them without processing them (429 and rate limit 403 errors).
+Replaying them after a 5xx or a broken connection could create the same resource twice.
+
+Retries are also bounded by the deadline of the call, see `deadline`.
+"""
+
+import json
+import time
+import random
+import logging
+import datetime
+import email.utils
+
+import httplib2
+from googleapiclient.http import HttpRequest
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import deadline
+from GoogleApiSupport import instrumentation
+from GoogleApiSupport import response_cache
+
+# Maximum number of retries of a request.
+MAX_RETRIES = 6
+# Seconds of the first backoff, doubled on every retry up to MAX_BACKOFF.
+INITIAL_BACKOFF = 1
+MAX_BACKOFF = 32
+# Seconds after which no more retries are started, counting from the first attempt.
+MAX_RETRY_TIME = 120
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Statuses meaning the request was refused before being processed, safe to replay for any method.
+REFUSED_STATUSES = (429,)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+IDEMPOTENT_HTTP_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'PATCH')
+# POST methods that can safely be sent twice.
+IDEMPOTENT_METHOD_IDS = {
+    'sheets.spreadsheets.values.batchGet',
+    'sheets.spreadsheets.values.batchGetByDataFilter',
+    'sheets.spreadsheets.values.batchUpdate',
+    'sheets.spreadsheets.values.batchClear',
+    'sheets.spreadsheets.values.clear',
+    'sheets.spreadsheets.getByDataFilter',
+    'drive.files.generateIds',
+}
+TRANSIENT_ERRORS = (OSError, httplib2.HttpLib2Error)
+
+
+class ApiRequest(HttpRequest):
+    """HttpRequest whose `execute` retries rate limited and transient errors."""
+
+    def execute(self, http=None, num_retries=0, idempotent=None, use_cache=True, timeout=None):
+        """Execute the request, retrying it when it is safe to.
+
+        Args:
+            http (optional): Transport to use instead of the one of the service.
+            num_retries (int, optional): Retries made by googleapiclient itself, on top of ours. Defaults to 0.
+            idempotent (bool, optional): Whether the request can be replayed after a server error.
+                Defaults to None, which guesses it from the http method and the api method.
+            use_cache (bool, optional): Whether metadata reads can be answered by `response_cache` when it
+                is enabled. Defaults to True.
+            timeout (float, optional): Seconds the call may take, retries included. Defaults to None, which
+                applies the current `deadline` or the default timeout of the api.
+
+        Returns:
+            dict: The deserialized response.
+
+        Raises:
+            deadline.DeadlineExceeded: If the call did not finish in time.
+        """
+        api = instrumentation.split_method_id(self.methodId)[0]
+        with deadline.default_timeout(api), deadline.timeout(timeout):
+            if response_cache.enabled():
+                if use_cache and response_cache.is_cacheable(self):
+                    return response_cache.execute(self, lambda: self._execute(http, num_retries, idempotent))
+                if self.method != 'GET':
+                    response_cache.invalidate(self.uri)
+            return self._execute(http, num_retries, idempotent)
+
+    def _execute(self, http, num_retries, idempotent):
+        if idempotent is None:
+            idempotent = is_idempotent(self)
+
+        def attempt():
+            return super(ApiRequest, self).execute(http=http, num_retries=num_retries)
+
+        if not instrumentation.enabled():
+            return call_with_retries(attempt, idempotent=idempotent, description=self.methodId)
+
+        response = {'status': None, 'size': None}
+        retries = []
+        postproc = self.postproc
+
+        def measured_postproc(resp, content):
+            response.update(status=resp.status, size=len(content or b''))
+            return postproc(resp, content)
+
+        self.postproc = measured_postproc
+        started = time.perf_counter()
+        try:
+            return call_with_retries(attempt, idempotent=idempotent, description=self.methodId,
+                                     on_retry=lambda error: retries.append(error))
+        except HttpError as error:
+            response.update(status=error.resp.status, size=len(error.content or b''))
+            raise
+        finally:
+            self.postproc = postproc
+            instrumentation.record_call(self.methodId, self.uri, time.perf_counter() - started, self.body_size,
+                                        response['status'], response['size'], len(retries), self.method, self.body)
+
+
+def is_idempotent(request):
+    """Guesses whether sending the request twice has the same effect as sending it once."""
+    if request.headers.get('x-http-method-override') == 'GET':
+        return True
+    return request.method in IDEMPOTENT_HTTP_METHODS or request.methodId in IDEMPOTENT_METHOD_IDS
+
+
+def call_with_retries(function, idempotent=True, description='', on_retry=None):
+    """Calls `function` until it succeeds, the error can't be retried or the retry budget is spent.
+        Raises `deadline.DeadlineExceeded` when the current deadline passes before that.
+
+    Args:
+        function (callable): Called without arguments, sends the request and returns its result.
+        idempotent (bool, optional): Whether it can be replayed after a server or connection error. Defaults to True.
+        description (str, optional): Name of the call for the logs. Defaults to ''.
+        on_retry (callable, optional): Called with the error before every retry. Defaults to None.
+
+    Returns:
+        The result of `function`.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        deadline.check(description)
+        try:
+            return function()
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as error:
+            delay = retry_delay(error, attempt, idempotent, started)
+            left = deadline.remaining()
+            # A socket timeout set to the remaining time also ends here
+            if left is not None and (left == 0 or (delay is not None and delay >= left)):
+                raise deadline.DeadlineExceeded(f'{description} did not finish before its deadline') from error
+            if delay is None:
+                raise
+            logging.warning(f'Retrying {description} in {delay:.2f}s after {error!r}')
+            if on_retry:
+                on_retry(error)
+            time.sleep(delay)
+            attempt += 1
+
+
+def retry_delay(error, attempt, idempotent, started, transient_errors=TRANSIENT_ERRORS):
+    """Returns the seconds to wait before retrying after an error, or None if it must not be retried.
+
+    Args:
+        error (Exception): The error raised by the last attempt.
+        attempt (int): Number of retries already made.
+        idempotent (bool): Whether the request can be replayed after a server or connection error.
+        started (float): `time.monotonic()` of the first attempt.
+        transient_errors (tuple, optional): Connection errors worth retrying. Defaults to TRANSIENT_ERRORS.
+
+    Returns:
+        float: Seconds to wait, or None.
+    """
+    if attempt >= MAX_RETRIES:
+        return None
+
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        refused = status in REFUSED_STATUSES or (status == 403 and _rate_limit_reason(error))
+        if not refused and not (idempotent and status in RETRY_STATUSES):
+            return None
+        retry_after = _retry_after(error.resp)
+    elif isinstance(error, transient_errors) and idempotent:
+        retry_after = None
+    else:
+        return None
+
+    delay = random.uniform(0, min(MAX_BACKOFF, INITIAL_BACKOFF * 2 ** attempt))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, INITIAL_BACKOFF)
+
+    if time.monotonic() - started + delay > MAX_RETRY_TIME:
+        return None
+    return delay
+
+
+def _rate_limit_reason(error):
+    try:
+        errors = json.loads(error.content)['error'].get('errors', [])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return False
+    return any(item.get('reason') in RATE_LIMIT_REASONS for item in errors)
+
+
+def _retry_after(resp):
+    value = resp.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
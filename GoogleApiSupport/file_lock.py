@@ -0,0 +1,55 @@
+"""Advisory file locks and atomic writes, to share files safely between processes."""
+
+import os
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock(opened_file):
+    """Blocks until the process holds the exclusive lock of an opened file."""
+    if fcntl:
+        fcntl.flock(opened_file.fileno(), fcntl.LOCK_EX)
+    else:
+        opened_file.seek(0)
+        msvcrt.locking(opened_file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock(opened_file):
+    if fcntl:
+        fcntl.flock(opened_file.fileno(), fcntl.LOCK_UN)
+    else:
+        opened_file.seek(0)
+        msvcrt.locking(opened_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Holds the lock of `path` while the block runs, through a `<path>.lock` file next to it."""
+    with open(path + '.lock', 'a+') as lock_file:
+        lock(lock_file)
+        try:
+            yield
+        finally:
+            unlock(lock_file)
+
+
+def write_atomic(path, text):
+    """Writes a file so readers see either its previous content or the new one, never half of it."""
+    folder = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as temporary_file:
+            temporary_file.write(text)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary)
+        raise
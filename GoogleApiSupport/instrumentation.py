@@ -0,0 +1,304 @@
+"""Per call metrics of the requests sent by the library.
+
+Every executed request produces a `CallRecord` that is handed to the registered sinks. A sink
+is any callable receiving the record, so a plain function works as a callback:
+
+    from GoogleApiSupport import instrumentation
+
+    instrumentation.add_sink(lambda record: print(record.method, record.latency))
+
+    metrics = instrumentation.add_sink(instrumentation.PrometheusSink())
+    ...
+    print(metrics.render())
+
+`trace` lists the calls made by a block of code and points out the ones sent more than once:
+
+    with instrumentation.trace() as calls:
+        slides.get_page_element(presentation_id, title_id)
+        slides.get_page_element(presentation_id, chart_id)
+
+Nothing is measured while no sink is registered.
+"""
+
+import sys
+import time
+import bisect
+import threading
+import contextlib
+from collections import Counter, namedtuple
+
+CallRecord = namedtuple('CallRecord', [
+    'api',             # 'drive', 'slides', 'sheets'
+    'method',          # 'files.copy', 'presentations.batchUpdate', 'spreadsheets.values.get'
+    'latency',         # seconds, including the retries
+    'request_bytes',
+    'response_bytes',
+    'status',          # http status of the last attempt, None if no response was received
+    'retries',
+    'uri',
+    'http_method',     # 'GET', 'POST'...
+    'body',            # request body, None if it has none
+], defaults=(None, None))
+
+# Upper bounds in seconds of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_sinks = []
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink):
+    """Registers a callable that receives a `CallRecord` for every call. Returns the sink."""
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def enabled():
+    """Whether some sink is registered, so calls need to be measured."""
+    return bool(_sinks)
+
+
+def emit(record):
+    """Hands a record to every sink. Errors raised by sinks never reach the caller of the api."""
+    for sink in list(_sinks):
+        try:
+            sink(record)
+        except Exception:
+            pass
+
+
+def record_call(method_id, uri, latency, request_bytes, status, response_bytes, retries, http_method=None, body=None):
+    """Builds the `CallRecord` of a finished call and hands it to the sinks."""
+    api, method = split_method_id(method_id)
+    emit(CallRecord(api, method, latency, request_bytes, response_bytes, status, retries, uri, http_method, body))
+
+
+def split_method_id(method_id):
+    """Splits a discovery method id such as `drive.files.copy` into `('drive', 'files.copy')`."""
+    api, _, method = (method_id or '').partition('.')
+    return api, method
+
+
+class HistogramSink:
+    """Keeps in memory a latency histogram and byte, retry and status counters per api method.
+
+    Args:
+        buckets (tuple, optional): Upper bounds in seconds of the latency buckets. Defaults to DEFAULT_BUCKETS.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            stats = self._stats.get((record.api, record.method))
+            if stats is None:
+                stats = self._stats[(record.api, record.method)] = {
+                    'count': 0,
+                    'latency_sum': 0.0,
+                    'bucket_counts': [0] * (len(self.buckets) + 1),
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                    'retries': 0,
+                    'statuses': {},
+                }
+            stats['count'] += 1
+            stats['latency_sum'] += record.latency
+            stats['bucket_counts'][bisect.bisect_left(self.buckets, record.latency)] += 1
+            stats['request_bytes'] += record.request_bytes or 0
+            stats['response_bytes'] += record.response_bytes or 0
+            stats['retries'] += record.retries
+            stats['statuses'][record.status] = stats['statuses'].get(record.status, 0) + 1
+
+    def snapshot(self):
+        """Returns a copy of the stats, keyed by `(api, method)`."""
+        with self._lock:
+            return {key: dict(stats, bucket_counts=list(stats['bucket_counts']), statuses=dict(stats['statuses']))
+                    for key, stats in self._stats.items()}
+
+    def quantile(self, api, method, q):
+        """Estimates a latency quantile, returning the upper bound of the bucket it falls in.
+
+        Args:
+            api (str): Api name, such as 'drive'.
+            method (str): Method name, such as 'files.copy'.
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            float: Seconds, `inf` if it falls beyond the last bucket, None if there are no calls.
+        """
+        stats = self.snapshot().get((api, method))
+        if not stats:
+            return None
+        rank = q * stats['count']
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), stats['bucket_counts']):
+            seen += count
+            if seen >= rank:
+                return bound
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class PrometheusSink(HistogramSink):
+    """HistogramSink that renders its stats in the Prometheus text exposition format.
+
+    Args:
+        prefix (str, optional): Prefix of the metric names. Defaults to 'google_api'.
+        buckets (tuple, optional): Upper bounds in seconds of the latency buckets. Defaults to DEFAULT_BUCKETS.
+    """
+
+    def __init__(self, prefix='google_api', buckets=DEFAULT_BUCKETS):
+        super().__init__(buckets)
+        self.prefix = prefix
+
+    def render(self):
+        """Returns the metrics as text, ready to be served on a `/metrics` endpoint."""
+        stats = self.snapshot()
+        p = self.prefix
+        lines = [
+            f'# HELP {p}_requests_total Api calls by response status.',
+            f'# TYPE {p}_requests_total counter',
+        ]
+        for (api, method), item in sorted(stats.items()):
+            for status, count in sorted(item['statuses'].items(), key=lambda pair: str(pair[0])):
+                lines.append(f'{p}_requests_total{{{_labels(api, method)},status="{status or "error"}"}} {count}')
+
+        lines += [
+            f'# HELP {p}_request_duration_seconds Latency of the api calls, including retries.',
+            f'# TYPE {p}_request_duration_seconds histogram',
+        ]
+        for (api, method), item in sorted(stats.items()):
+            labels = _labels(api, method)
+            cumulative = 0
+            for bound, count in zip(self.buckets, item['bucket_counts']):
+                cumulative += count
+                lines.append(f'{p}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {item["count"]}')
+            lines.append(f'{p}_request_duration_seconds_sum{{{labels}}} {item["latency_sum"]}')
+            lines.append(f'{p}_request_duration_seconds_count{{{labels}}} {item["count"]}')
+
+        for name, key, description in (('request_bytes_total', 'request_bytes', 'Bytes sent in request bodies.'),
+                                       ('response_bytes_total', 'response_bytes', 'Bytes received in response bodies.'),
+                                       ('retries_total', 'retries', 'Retried attempts.')):
+            lines += [f'# HELP {p}_{name} {description}', f'# TYPE {p}_{name} counter']
+            for (api, method), item in sorted(stats.items()):
+                lines.append(f'{p}_{name}{{{_labels(api, method)}}} {item[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Modules that send the requests, skipped when looking for the function that made a call.
+_TRANSPORT_MODULES = ('GoogleApiSupport.instrumentation', 'GoogleApiSupport.execution', 'GoogleApiSupport.batch',
+                      'GoogleApiSupport.response_cache', 'GoogleApiSupport.transport', 'GoogleApiSupport.aio.transport',
+                      'googleapiclient', 'httplib2', 'asyncio', 'concurrent', 'threading', 'contextlib')
+
+
+class Trace:
+    """Sink keeping every call with the function that made it, to find requests sent more than once.
+
+    Identical requests are the ones with the same http method, url and body, e.g. the same
+    presentation fetched by two helpers when one response could serve both.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.origins = []
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        origin = _caller()
+        with self._lock:
+            self.calls.append(record)
+            self.origins.append(origin)
+
+    def duplicates(self):
+        """Returns the requests sent more than once, most repeated first.
+
+        Returns:
+            list: `(record, count, origins)` tuples, with the first record of the request, the number
+                of times it was sent and the functions that sent it.
+        """
+        with self._lock:
+            calls = list(zip(self.calls, self.origins))
+        counts = Counter(_request_key(record) for record, _ in calls)
+        repeated = {}
+        for record, origin in calls:
+            key = _request_key(record)
+            if counts[key] > 1:
+                repeated.setdefault(key, (record, counts[key], []))[2].append(origin)
+        return sorted(repeated.values(), key=lambda item: -item[1])
+
+    def summary(self):
+        """Returns a text report of the calls per api method and of the repeated requests."""
+        with self._lock:
+            calls = list(self.calls)
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        duplicates = self.duplicates()
+        lines = [f'{len(calls)} api calls in {elapsed:.2f}s, '
+                 f'{sum(count - 1 for _, count, _ in duplicates)} of them repeated requests']
+        per_method = Counter((record.api, record.method) for record in calls)
+        for (api, method), count in per_method.most_common():
+            latency = sum(record.latency for record in calls if (record.api, record.method) == (api, method))
+            lines.append(f'  {count:>4} x {api} {method} ({latency:.2f}s)')
+        if duplicates:
+            lines.append('Repeated requests:')
+        for record, count, origins in duplicates:
+            lines.append(f'  {count:>4} x {record.http_method or ""} {record.uri}')
+            lines.append(f'         from {", ".join(sorted(set(origins)))}')
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def trace(report=print):
+    """Records the api calls made while the block runs and reports the repeated ones when it ends.
+
+    Calls made by other threads in the meantime are recorded too.
+
+    Args:
+        report (callable, optional): Receives the text of `Trace.summary` when the block ends, None
+            to only keep the `Trace`. Defaults to print.
+
+    Yields:
+        Trace: The calls recorded so far.
+    """
+    calls = add_sink(Trace())
+    try:
+        yield calls
+    finally:
+        remove_sink(calls)
+        calls.elapsed = time.perf_counter() - calls.started
+        if report:
+            report(calls.summary())
+
+
+def _request_key(record):
+    return record.http_method, record.uri, record.body
+
+
+def _caller():
+    """Returns `module.function:line` of the innermost function, outside of the transport, that made the call."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(_TRANSPORT_MODULES):
+            return f'{module}.{frame.f_code.co_name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return '?'
+
+
+def _labels(api, method):
+    return f'api="{api}",method="{method}"'
@@ -0,0 +1,162 @@
+"""Resolution of folder paths such as 'Reports/2024/Spain' to folder ids, cached.
+
+    from GoogleApiSupport import path_resolver
+
+    resolver = path_resolver.get_resolver(team_drive_id)
+    folder_id = resolver.resolve('Reports/2024/Spain')
+
+The ids of the folders along resolved paths are kept in a trie for `TTL` seconds, so paths
+sharing a prefix only look up the part they don't share, and a path resolved again is answered
+from memory. Threads resolving the same prefix at the same time wait for a single lookup.
+
+Missing folders are created, the first one of the path included: unlike the former
+`drive.get_folder_id_by_path`, a missing top folder is created instead of raising. When several
+processes create the same folder at once, all of them end up with the oldest one and the others
+move the duplicates they created to the trash, so a duplicate that already got files can be restored.
+"""
+
+import time
+import threading
+from concurrent.futures import Future
+
+from GoogleApiSupport import drive
+
+# Seconds a resolved folder id is trusted before looking it up again.
+TTL = 600
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(team_drive_id=None):
+    """Returns the resolver shared by the callers of a shared drive, or of My Drive when None."""
+    with _resolvers_lock:
+        resolver = _resolvers.get(team_drive_id)
+        if resolver is None:
+            resolver = _resolvers[team_drive_id] = PathResolver(team_drive_id)
+        return resolver
+
+
+class _Node:
+    __slots__ = ('id', 'expires', 'children')
+
+    def __init__(self):
+        self.id = None
+        self.expires = 0
+        self.children = {}
+
+
+class PathResolver:
+    """Resolves folder paths to ids, caching every resolved prefix.
+
+    The first folder of a path is searched by name in the whole drive, the next ones are the
+    subfolders of the previous one with that name.
+
+    Args:
+        team_drive_id (str, optional): Id of the shared drive of the folders. Defaults to None, My Drive.
+        ttl (float, optional): Seconds a resolved folder id is trusted. Defaults to TTL.
+    """
+
+    def __init__(self, team_drive_id=None, ttl=TTL):
+        self.team_drive_id = team_drive_id
+        self.ttl = ttl
+        self._root = _Node()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path, create=True):
+        """Returns the id of the folder at a path.
+
+        Args:
+            path (str): Names of the folders separated by '/'.
+            create (bool, optional): Whether to create the missing folders. Defaults to True.
+
+        Returns:
+            str: Id of the folder, None if it does not exist and `create` is False.
+        """
+        node = self._root
+        parent_id = None
+        prefix = ()
+        for name in [name for name in path.split('/') if name]:
+            prefix += (name,)
+            with self._lock:
+                child = node.children.get(name)
+            if child is None or child.expires <= time.monotonic():
+                folder_id = self._single_flight((prefix, create), lambda: self._find_or_create(parent_id, name, create))
+                if folder_id is None:
+                    return None
+                with self._lock:
+                    child = node.children.setdefault(name, _Node())
+                    if child.id != folder_id:
+                        child.children.clear()
+                    child.id = folder_id
+                    child.expires = time.monotonic() + self.ttl
+            node = child
+            parent_id = child.id
+        return parent_id
+
+    def invalidate(self, path=''):
+        """Forgets the id of the folder at a path and of the folders below it, everything by default.
+
+        Call it when a cached folder was deleted or moved, e.g. after a 404 uploading to it.
+        """
+        names = [name for name in path.split('/') if name]
+        with self._lock:
+            if not names:
+                self._root.children.clear()
+                return
+            node = self._root
+            for name in names[:-1]:
+                node = node.children.get(name)
+                if node is None:
+                    return
+            node.children.pop(names[-1], None)
+
+    def _single_flight(self, key, function):
+        """Runs `function` once for all the threads asking for the same key at the same time."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = function()
+            future.set_result(result)
+            return result
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _find_or_create(self, parent_id, name, create):
+        found = self._find(parent_id, name)
+        if found or not create:
+            return found[0] if found else None
+        parent = parent_id or self.team_drive_id or 'root'
+        print('Creating folder {} inside parent folder {}'.format(name, parent))
+        created = drive.create_folder(name, [parent])['id']
+        # Another process may have created it meanwhile, everyone keeps the oldest one
+        found = self._find(parent_id, name)
+        if found and found[0] != created:
+            drive.trash_file(created, supportsAllDrives=True)
+            return found[0]
+        return created
+
+    def _find(self, parent_id, name):
+        """Returns the ids of the folders with a name, oldest first."""
+        query = f"mimeType='{drive.FOLDER_MIME_TYPE}' and name='{_escape(name)}' and trashed=false"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        kwargs = {'orderBy': 'createdTime'}
+        if self.team_drive_id:
+            kwargs.update(teamDriveId=self.team_drive_id, includeTeamDriveItems=True, corpora='teamDrive',
+                          supportsAllDrives=True)
+        return [folder['id'] for folder in drive.iter_files(query, fields='files(id)', **kwargs)]
+
+
+def _escape(name):
+    return name.replace('\\', '\\\\').replace("'", "\\'")
@@ -0,0 +1,202 @@
+"""Token bucket limiters that pace the requests sent by the services built in `auth`.
+
+Each api with a `rate_limit` in `apis.api_configs` gets one `ApiLimiter` per credentials, shared
+by every thread. The `rate_limit` is either one quota for every request or separate `read` and
+`write` quotas, as Sheets and Slides count them. Reads are GET requests and writes all the others.
+Set `SHARED_STATE_DIR` (or the `GOOGLE_API_RATE_LIMIT_DIR` environment variable) to a folder and
+the buckets keep their state in files there, so all the processes of the machine using the same
+credentials share the quota.
+
+A bucket holds at most `burst` tokens, half of the quota by default, and refills at
+`(requests - burst) / period` tokens per second, so no window of `period` seconds ever sends
+more than `requests` requests and the throughput stays at the quota ceiling instead of bursting
+into 429 errors, while short scripts never wait.
+"""
+
+import os
+import json
+import time
+import threading
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import file_lock
+
+# Set to False to send requests without pacing them.
+ENABLED = True
+# Folder where buckets keep their state so several processes share them. None keeps them in memory.
+SHARED_STATE_DIR = os.environ.get('GOOGLE_API_RATE_LIMIT_DIR')
+# Methods counted against the read quota.
+READ_METHODS = ('GET', 'HEAD')
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Token bucket shared by the threads of the process.
+
+    Callers reserve their tokens straight away, even if it takes the bucket below zero, and sleep
+    until the refill covers them. Waiting callers are therefore served in arrival order.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, the size of the bursts allowed after idle periods.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1, max_wait=None):
+        """Takes tokens from the bucket and returns the seconds to wait before using them.
+
+        Args:
+            tokens (float, optional): Tokens to take. Defaults to 1.
+            max_wait (float, optional): Longest wait accepted. When the tokens would come later, none
+                are taken and the wait is returned all the same. Defaults to None, no limit.
+        """
+        with self._lock:
+            now = time.monotonic()
+            remaining, wait = _take(self._tokens, now - self._updated, tokens, self.rate, self.capacity)
+            if max_wait is None or wait <= max_wait:
+                self._tokens, self._updated = remaining, now
+        return wait
+
+    def acquire(self, tokens=1):
+        """Blocks until the tokens are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def available(self):
+        """Returns the tokens left without taking any, negative while callers wait for the refill."""
+        with self._lock:
+            return min(self.capacity, self._tokens + (time.monotonic() - self._updated) * self.rate)
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a locked file, shared by every process using the same path.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens.
+        path (str): File keeping the state of the bucket.
+    """
+
+    def __init__(self, rate, capacity, path):
+        super().__init__(rate, capacity)
+        self.path = path
+
+    def reserve(self, tokens=1, max_wait=None):
+        with self._lock, open(self.path, 'a+') as state_file:
+            file_lock.lock(state_file)
+            try:
+                state_file.seek(0)
+                content = state_file.read()
+                now = time.time()
+                state = json.loads(content) if content else {'tokens': self.capacity, 'updated': now}
+                remaining, wait = _take(state['tokens'], max(0, now - state['updated']), tokens,
+                                        self.rate, self.capacity)
+                if max_wait is None or wait <= max_wait:
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(json.dumps({'tokens': remaining, 'updated': now}))
+                    state_file.flush()
+            finally:
+                file_lock.unlock(state_file)
+        return wait
+
+    def available(self):
+        with self._lock, open(self.path, 'a+') as state_file:
+            file_lock.lock(state_file)
+            try:
+                state_file.seek(0)
+                content = state_file.read()
+            finally:
+                file_lock.unlock(state_file)
+        if not content:
+            return self.capacity
+        state = json.loads(content)
+        return min(self.capacity, state['tokens'] + max(0, time.time() - state['updated']) * self.rate)
+
+
+class ApiLimiter:
+    """Read and write buckets of an api for some credentials, the same bucket when the quota is shared.
+
+    Args:
+        read (TokenBucket): Bucket of the GET requests.
+        write (TokenBucket): Bucket of the other requests.
+    """
+
+    def __init__(self, read, write):
+        self.read = read
+        self.write = write
+
+    def bucket(self, method='GET'):
+        return self.read if method.upper() in READ_METHODS else self.write
+
+    def reserve(self, tokens=1, max_wait=None, method='GET'):
+        """Takes tokens from the bucket of the method, see `TokenBucket.reserve`."""
+        return self.bucket(method).reserve(tokens, max_wait)
+
+    def acquire(self, tokens=1, method='GET'):
+        self.bucket(method).acquire(tokens)
+
+    def available(self):
+        """Returns the tokens left in the emptiest bucket."""
+        return min(self.read.available(), self.write.available())
+
+
+def get_limiter(api_name, identity=None):
+    """Returns the limiter that paces the requests of an api for some credentials.
+
+    Args:
+        api_name (str): Name of the api in `apis.api_configs`. Apis sharing the same `build` share the limiter.
+        identity (str, optional): Identifies the credentials, quotas are counted per user. Defaults to None.
+
+    Returns:
+        ApiLimiter: The shared limiter, or None if the api has no `rate_limit` or limits are disabled.
+    """
+    api_config = apis.get_api_config(api_name)
+    limit = api_config.get('rate_limit')
+    if not ENABLED or not limit:
+        return None
+
+    key = (api_config['build'], identity)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if 'read' in limit:
+                limiter = ApiLimiter(_bucket(limit['read'], api_config['build'] + '-read', identity),
+                                     _bucket(limit['write'], api_config['build'] + '-write', identity))
+            else:
+                bucket = _bucket(limit, api_config['build'], identity)
+                limiter = ApiLimiter(bucket, bucket)
+            _limiters[key] = limiter
+    return limiter
+
+
+def _bucket(limit, name, identity):
+    burst = min(limit.get('burst', limit['requests'] // 2), limit['requests'])
+    rate = max(limit['requests'] - burst, 1) / limit['period']
+    if SHARED_STATE_DIR:
+        import hashlib
+        os.makedirs(SHARED_STATE_DIR, exist_ok=True)
+        identity_hash = hashlib.sha1(str(identity).encode()).hexdigest()[:16]
+        return FileTokenBucket(rate, burst, os.path.join(SHARED_STATE_DIR, f'{name}-{identity_hash}.json'))
+    return TokenBucket(rate, burst)
+
+
+def reset():
+    """Forgets every bucket, so changes to the `rate_limit` configs or `SHARED_STATE_DIR` take effect."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def _take(available, elapsed, tokens, rate, capacity):
+    available = min(capacity, available + elapsed * rate) - tokens
+    return available, (-available / rate if available < 0 else 0)
+
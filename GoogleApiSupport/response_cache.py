@@ -0,0 +1,329 @@
+"""Optional cache of the metadata reads, revalidated with ETags or document versions.
+
+Nothing is cached until the cache is enabled:
+
+    from GoogleApiSupport import response_cache
+
+    response_cache.enable(freshness=30)                     # in memory
+    response_cache.enable(path='.google-api-cache')         # on disk, shared by processes and runs
+
+The reads listed in `CACHEABLE_METHOD_IDS` (`files.get` of Drive, `presentations.get` of Slides
+and `spreadsheets.get` of Sheets) are answered from the cache without any request while the
+stored response is younger than `freshness` seconds. Older responses are revalidated:
+
+* with `If-None-Match` when the API sent an ETag, an unchanged resource costs a 304 without body;
+* otherwise by asking only for the `version` of a Drive file or the `revisionId` of a
+  presentation, when the cached response contains it, and comparing it with the stored one.
+
+Writes to a document (`batchUpdate`, `files.update`...) drop its cached reads when they are sent
+with `execute()`, in a `batch.Batch` or by the `aio` modules. The resumable requests of `uploads`
+create new files, which have no cached reads. Changes made by other clients, or sent with
+`next_chunk()` outside of `uploads`, are only seen once the freshness window is over.
+"""
+
+import os
+import json
+import time
+import base64
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from GoogleApiSupport import file_lock
+
+# Cacheable methods and the field of their resource that changes with every edit, if any.
+CACHEABLE_METHOD_IDS = {
+    'drive.files.get': 'version',
+    'slides.presentations.get': 'revisionId',
+    'sheets.spreadsheets.get': None,
+}
+
+_cache = None
+_stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def enable(max_entries=256, max_bytes=64 * 2 ** 20, freshness=30, path=None):
+    """Starts caching the metadata reads.
+
+    Args:
+        max_entries (int, optional): Responses kept, the least recently used are evicted. Defaults to 256.
+        max_bytes (int, optional): Size limit of the response bodies kept. Defaults to 64MB.
+        freshness (float, optional): Seconds a response is used without revalidating it. Defaults to 30.
+        path (str, optional): Folder to keep the responses in, so several processes and runs share them.
+            It is created readable by the current user only. Defaults to None, which keeps them in memory.
+    """
+    global _cache
+    if path:
+        _cache = _DiskStore(max_entries, max_bytes, freshness, path)
+    else:
+        _cache = _MemoryStore(max_entries, max_bytes, freshness)
+
+
+def disable():
+    """Stops caching and forgets the responses kept in memory. Files kept on disk are left in place."""
+    global _cache
+    _cache = None
+
+
+def enabled():
+    return _cache is not None
+
+
+def clear():
+    """Forgets every cached response."""
+    if _cache is not None:
+        _cache.clear()
+
+
+def info():
+    """Returns the hits, revalidations, misses and size of the cache."""
+    with _stats_lock:
+        stats = dict(_stats)
+    if _cache is not None:
+        stats.update(entries=len(_cache), bytes=_cache.size)
+    return stats
+
+
+def is_cacheable(request):
+    return (_cache is not None and request.method == 'GET' and request.methodId in CACHEABLE_METHOD_IDS
+            and 'alt=media' not in request.uri)
+
+
+def invalidate(uri):
+    """Drops the cached reads of the document a request to `uri` writes to."""
+    if _cache is not None:
+        _cache.invalidate(urlsplit(uri).path)
+
+
+def execute(request, fetch):
+    """Answers a cacheable request from the cache, revalidating or fetching it when needed.
+
+    Args:
+        request (HttpRequest): The read, such as `service.files().get(fileId=file_id)`.
+        fetch (callable): Sends the request and returns the deserialized response.
+
+    Returns:
+        dict: The deserialized response.
+    """
+    from googleapiclient.errors import HttpError
+    import httplib2
+
+    cache = _cache
+    key = (_identity(request.http), request.uri)
+    entry = cache.get(key)
+    postproc = request.postproc
+
+    def cached_response():
+        return postproc(httplib2.Response(entry['headers']), entry['content'])
+
+    if entry and time.time() - entry['stored'] < cache.freshness:
+        _count('hits')
+        return cached_response()
+
+    if entry and not entry['etag'] and entry['version'] is not None:
+        if _current_version(request) == entry['version']:
+            _count('revalidated')
+            cache.set(key, dict(entry, stored=time.time()))
+            return cached_response()
+        entry = None
+
+    received = {}
+
+    def caching_postproc(resp, content):
+        received.update(headers=dict(resp), content=content)
+        return postproc(resp, content)
+
+    request.postproc = caching_postproc
+    if entry and entry['etag']:
+        request.headers['If-None-Match'] = entry['etag']
+    try:
+        response = fetch()
+    except HttpError as error:
+        if entry and error.resp.status == 304:
+            _count('revalidated')
+            cache.set(key, dict(entry, stored=time.time()))
+            return cached_response()
+        raise
+    finally:
+        request.postproc = postproc
+        request.headers.pop('If-None-Match', None)
+
+    _count('misses')
+    version_field = CACHEABLE_METHOD_IDS[request.methodId]
+    cache.set(key, {
+        'headers': received['headers'],
+        'content': received['content'],
+        'etag': received['headers'].get('etag'),
+        'version': response.get(version_field) if version_field and isinstance(response, dict) else None,
+        'stored': time.time(),
+    })
+    return response
+
+
+def _current_version(request):
+    """Asks only for the version field of the resource requested."""
+    field = CACHEABLE_METHOD_IDS[request.methodId]
+    scheme, netloc, path, query, fragment = urlsplit(request.uri)
+    query = [(name, value) for name, value in parse_qsl(query) if name != 'fields'] + [('fields', field)]
+    check = type(request)(request.http, request.postproc, urlunsplit((scheme, netloc, path, urlencode(query), fragment)),
+                          method='GET', headers=dict(request.headers), methodId=request.methodId)
+    return check.execute(use_cache=False).get(field)
+
+
+def _identity(http):
+    # Two credentials can see different versions of a document, e.g. with or without access to its comments
+    credentials = getattr(http, 'credentials', None)
+    identity = getattr(credentials, 'service_account_email', None) or getattr(credentials, 'client_id', None) or ''
+    # Users impersonated by the same service account through domain-wide delegation don't share their reads
+    subject = getattr(credentials, '_subject', None)
+    return f'{identity}#{subject}' if subject else identity
+
+
+def _count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+class _MemoryStore:
+    """LRU store of the cached responses, bounded in entries and bytes."""
+
+    def __init__(self, max_entries, max_bytes, freshness):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.freshness = freshness
+        self.size = 0
+        # key: (resource path, entry size)
+        self._index = OrderedDict()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        return self._load(key)
+
+    def set(self, key, entry):
+        entry_size = len(entry['content'] or b'')
+        if entry_size > self.max_bytes:
+            return
+        with self._lock:
+            self._save(key, entry)
+            self._track(key, entry_size)
+
+    def _track(self, key, entry_size):
+        """Indexes a stored entry and evicts the least recently used ones over the limits."""
+        if key in self._index:
+            self.size -= self._index.pop(key)[1]
+        self._index[key] = (urlsplit(key[1]).path, entry_size)
+        self.size += entry_size
+        while len(self._index) > self.max_entries or self.size > self.max_bytes:
+            evicted, (_, evicted_size) = self._index.popitem(last=False)
+            self.size -= evicted_size
+            self._remove(evicted)
+
+    def invalidate(self, path):
+        with self._lock:
+            for key, (resource, entry_size) in list(self._index.items()):
+                if path == resource or (path.startswith(resource) and path[len(resource)] in ':/'):
+                    del self._index[key]
+                    self.size -= entry_size
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._index.clear()
+            self.size = 0
+
+    def _load(self, key):
+        return self._entries.get(key)
+
+    def _save(self, key, entry):
+        self._entries[key] = entry
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+
+
+class _DiskStore(_MemoryStore):
+    """Store keeping every response in a JSON file of `path`, indexed again from the folder on start.
+
+    Responses stored by other processes after the start are read when they are asked for.
+    """
+
+    def __init__(self, max_entries, max_bytes, freshness, path):
+        super().__init__(max_entries, max_bytes, freshness)
+        self.path = path
+        # Other users could read the responses or plant their own
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        if hasattr(os, 'getuid') and os.stat(path).st_uid != os.getuid():
+            raise PermissionError(f'The response cache folder {path} belongs to another user')
+        os.chmod(path, 0o700)
+        files = []
+        for name in os.listdir(path):
+            if name.endswith('.json'):
+                stored = self._read(os.path.join(path, name))
+                if stored is not None:
+                    key, entry, modified = stored
+                    files.append((modified, key, len(entry['content'] or b'')))
+        for _, key, entry_size in sorted(files):
+            self._index[key] = (urlsplit(key[1]).path, entry_size)
+            self.size += entry_size
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is None:
+            with self._lock:
+                if key in self._index:
+                    return None
+            # Stored by another process since the start
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._track(key, len(entry['content'] or b''))
+        return entry
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha256(repr(key).encode()).hexdigest() + '.json')
+
+    @staticmethod
+    def _read(path):
+        """Returns the key, entry and modification time of a file, None if it is not a valid entry."""
+        try:
+            with open(path) as entry_file:
+                stored = json.load(entry_file)
+            entry = dict(stored['entry'], content=base64.b64decode(stored['entry']['content']))
+            return tuple(stored['key']), entry, os.path.getmtime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _load(self, key):
+        stored = self._read(self._file(key))
+        if stored is None or stored[0] != key:
+            return None
+        return stored[1]
+
+    def _save(self, key, entry):
+        content = base64.b64encode(entry['content'] or b'').decode('ascii')
+        # Written aside and renamed, so other processes never read half a file
+        file_lock.write_atomic(self._file(key), json.dumps({'key': list(key), 'entry': dict(entry, content=content)}))
+
+    def _remove(self, key):
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        super().clear()
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
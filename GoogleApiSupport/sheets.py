@@ -1,14 +1,22 @@
-import pandas as pd
 import logging
+import functools
 
 from GoogleApiSupport import auth
 
 
-logging.warning("""
+@functools.lru_cache()
+def _deprecation_warning():
+    # Logged once, on the first use of the module instead of at import time
+    logging.warning("""
             [DeprecationWarning] sheets module will be deprecated in favor to spreadsheets.
             1 - modify the import from `sheets` to `spreadsheets`. (from GoogleApiSupport import spreadsheets)
             2 - Some functions are been renamed to make it more easy to read. If you have a name error check for the new function's name""")
-    
+
+
+def _get_service():
+    _deprecation_warning()
+    return auth.get_service("sheets")
+
 
 def get_sheet_info(sheetId, includeGridData=False):
     """Returns an spreadsheet info object
@@ -20,7 +28,7 @@ def get_sheet_info(sheetId, includeGridData=False):
         dict: Object with a lot of sheet information such title, url, colors, alignment and much more.
     """
     logging.warning('module sheets now is named spreadsheets and this function `get_sheet_info` renamed to `get_info`')
-    service = auth.get_service("sheets")
+    service = _get_service()
     response = service.spreadsheets().get(spreadsheetId=sheetId, includeGridData=includeGridData).execute()
     return response
 
@@ -34,7 +42,7 @@ def create(title):
     Returns:
         string: The id from the created file
     """
-    service = auth.get_service("sheets")
+    service = _get_service()
     spreadsheet = {
         'properties': {
             'title': title
@@ -59,7 +67,7 @@ def add_sheet_to_spreadsheet(sheetId, newSheetName):
     """
     logging.warning('module sheets now is named spreadsheets and this function `add_sheet_to_spreadsheet` renamed to `add_sheet`')
 
-    service = auth.get_service("sheets")
+    service = _get_service()
     
     data = {'requests': [
         {
@@ -81,7 +89,7 @@ def change_sheet_title(newFileName, fileId):
         fileId (str): The id from the Spreadsheet. Long string with letters, numbers and characters
     """
     logging.warning('module sheets now is named spreadsheets and this function `change_sheet_title` renamed to `change_title`')
-    service = auth.get_service("sheets")
+    service = _get_service()
 
     body = {
         "requests": [{
@@ -116,34 +124,30 @@ def pandas_to_sheet(sheetId, pageName, df, startingCell='A1'):
         _type_: _description_
     """
 
-    service = auth.get_service("sheets")
+    service = _get_service()
 
     df.fillna(value=0, inplace=True)
     columnsList = df.columns.tolist()
     valuesList = df.values.tolist()
 
-    try:
-        data = [
-            {
-                'range': pageName+'!'+startingCell,
-                'values': [columnsList] + valuesList
-            },
-        ]
-
-        body = {
-            'valueInputOption': 'USER_ENTERED',
-            'data': data
-        }
+    data = [
+        {
+            'range': pageName+'!'+startingCell,
+            'values': [columnsList] + valuesList
+        },
+    ]
 
-        result = service.spreadsheets().values().batchUpdate(
-            spreadsheetId=sheetId,
-            body=body
-        ).execute()
+    body = {
+        'valueInputOption': 'USER_ENTERED',
+        'data': data
+    }
 
-        return 'True'
+    result = service.spreadsheets().values().batchUpdate(
+        spreadsheetId=sheetId,
+        body=body
+    ).execute()
 
-    except Exception as e:
-        print(e)
+    return 'True'
 
 
 
@@ -193,7 +197,7 @@ def sheet_to_pandas(spreadsheetId, sheetName='', sheetRange='', index='', has_he
         pd.DataFrame: The output dataframe.
     """
     logging.warning('module sheets now is named spreadsheets and this function `sheet_to_pandas` renamed to `download_sheet_to_pandas`')
-    service = auth.get_service("sheets")
+    service = _get_service()
     if (sheetRange != ''):
         sheetRange = '!'+sheetRange
 
@@ -212,6 +216,7 @@ def sheet_to_pandas(spreadsheetId, sheetName='', sheetRange='', index='', has_he
                 max_len = len(row)
         headers = __get_range_column_names(max_len)
 
+    import pandas as pd
     if (index == ''):
         return pd.DataFrame(newresult['values'], columns=headers)
     else:
@@ -226,7 +231,7 @@ def clear_sheet(spreadsheetId, sheetName, sheetRange=''):
         sheetName (str): _description_
         sheetRange (str, optional): _description_. Defaults to ''.
     """
-    service = auth.get_service("sheets")
+    service = _get_service()
     if (sheetRange != ''):
         sheetRange = '!'+sheetRange
 
@@ -43,15 +43,34 @@ def create_presentation(name):
     return presentation['presentationId']
 
 
-def get_presentation_info(presentation_id):  # Class ??
+def get_presentation_info(presentation_id, fields=None):  # Class ??
+    """Returns the presentation resource.
+
+    Args:
+        presentation_id (str): Id of the presentation.
+        fields (str, optional): Field mask of the response, such as 'slides.objectId'. Defaults to None, the whole
+            presentation including its masters and layouts.
+
+    Returns:
+        dict: The presentation.
+    """
     service = auth.get_service("slides")
     presentation = service.presentations().get(
-        presentationId=presentation_id).execute()
+        presentationId=presentation_id, fields=fields).execute()
     return presentation
 
 
-def get_presentation_slides(presentation_id):
-    slides = get_presentation_info(presentation_id).get('slides')
+def get_presentation_slides(presentation_id, fields='slides'):
+    """Returns the slides of a presentation, without its masters and layouts.
+
+    Args:
+        presentation_id (str): Id of the presentation.
+        fields (str, optional): Field mask of the response, must start with 'slides'. Defaults to 'slides'.
+
+    Returns:
+        list: The slides.
+    """
+    slides = get_presentation_info(presentation_id, fields=fields).get('slides')
     return slides
 
 
@@ -68,9 +87,14 @@ def get_slide_notes(slide_object: dict):
         return '# Error in slide' + str(e)
 
 
-def get_presentation_notes(presentation_id):
+# endIndex keeps the paragraph markers in textElements, get_slide_notes relies on their positions
+NOTES_FIELDS = ('slides(objectId,slideProperties.notesPage.pageElements.shape'
+                '(shapeType,text.textElements(endIndex,textRun.content)))')
+
+
+def get_presentation_notes(presentation_id, fields=NOTES_FIELDS):
     notes = {}
-    slides = get_presentation_slides(presentation_id)
+    slides = get_presentation_slides(presentation_id, fields=fields)
     for slide in slides:
         notes[slide['objectId']] = get_slide_notes(slide)
     return notes
@@ -115,6 +139,10 @@ def text_replace(old: str, new: str, presentation_id: str, pages=None):
 
 def batch_text_replace(text_mapping: dict, presentation_id: str, pages=None):
     """Given a list of tuples with replacement pairs this function replace it all"""
+    return execute_batch_update(_text_replace_requests(text_mapping, pages), presentation_id)
+
+
+def _text_replace_requests(text_mapping: dict, pages=None):
     if pages is None:
         pages = list()
 
@@ -135,7 +163,7 @@ def batch_text_replace(text_mapping: dict, presentation_id: str, pages=None):
         else:
             raise Exception(
                 'The text from key {} is not a string'.format(placeholder_text))
-    return execute_batch_update(requests, presentation_id)
+    return requests
 
 
 def insert_image(url: str, page_id: str, presentation_id: str, object_id: str = None,
@@ -315,7 +343,7 @@ def transform_object(presentation_id: str, object_id: str, transform, apply_mode
 
 def reindex_slides(presentation_id: str, slide_ids: list, new_index=-1):
     if new_index < 0:
-        number = len(get_presentation_slides(presentation_id)) + new_index + 1
+        number = len(get_presentation_slides(presentation_id, fields='slides.objectId')) + new_index + 1
     else:
         number = new_index
 
@@ -338,9 +366,10 @@ def reindex_slides(presentation_id: str, slide_ids: list, new_index=-1):
     return response
 
 
-def get_all_shapes_placeholders(presentation_id):
+def get_all_shapes_placeholders(presentation_id,
+                                fields='slides(objectId,pageElements(objectId,shape.text.textElements.textRun.content))'):
     shape_ids = {}
-    presentation = get_presentation_info(presentation_id)
+    presentation = get_presentation_info(presentation_id, fields=fields)
     for slide in presentation['slides']:
         for page_element in slide['pageElements']:
             shape_ids[page_element['objectId']] = None
@@ -375,18 +404,28 @@ def update_shape_type(presentation_id, page_id, page_element, shape_type, size=N
 
     return execute_batch_update(requests, presentation_id)
 
-def get_page_element(presentation_id, element_id):
-    presentation = get_presentation_info(presentation_id)
+def get_page_element(presentation_id, element_id, fields='slides.pageElements'):
+    presentation = get_presentation_info(presentation_id, fields=fields)
     for slide in presentation['slides']:
         for page_element in slide['pageElements']:
             if page_element['objectId'] == element_id:
                 return page_element
             
-def get_page(presentation_id, page_id):
-    presentation = get_presentation_info(presentation_id)
-    for slide in presentation['slides']:
-        if slide['objectId'] == page_id:
-            return slide
+def get_page(presentation_id, page_id, fields=None):
+    """Returns a page of a presentation, fetching only that page rather than the whole presentation.
+
+    Args:
+        presentation_id (str): Id of the presentation.
+        page_id (str): Object id of the page.
+        fields (str, optional): Field mask of the page, such as 'pageElements(objectId)'. Defaults to None,
+            the whole page.
+
+    Returns:
+        dict: The page. An HttpError with status 404 is raised if the presentation has no such page.
+    """
+    service = auth.get_service("slides")
+    return service.presentations().pages().get(presentationId=presentation_id, pageObjectId=page_id,
+                                               fields=fields).execute()
 
 
 def replace_shape_with_chart(presentation_id: str, placeholder_text, spreadsheet_id, chart_id, linking_mode='NOT_LINKED_IMAGE', target_id_pages=[]):
@@ -1,5 +1,3 @@
-import pandas as pd
-
 from GoogleApiSupport import auth
 
 """A set of functions to interact with Google Spreadsheets documents. 
@@ -27,18 +25,20 @@ sheet.properties.title | sheet_name
 sheet.properties.sheetId | sheet_id
 """
 
-def get_info(spreadsheet_id, include_grid_data=False):
+def get_info(spreadsheet_id, include_grid_data=False, fields=None):
     """Returns an spreadsheet info object
 
     Args:
         spreadsheet_id (str): The id from the Spreadsheet. Long string with letters, numbers and characters
         include_grid_data (bool): Passed to False, the function does not query the spreadsheet data, only the document information.
+        fields (str, optional): Field mask of the response, such as 'sheets.properties.title'. Defaults to None, the whole resource.
     Returns:
         dict: Object with a lot of sheet information such title, url, colors, alignment and much more.
     Deprecates: sheets.get_sheet_info
     """
     service = auth.get_service("spreadsheets")
-    response = service.spreadsheets().get(spreadsheetId=spreadsheet_id, includeGridData=include_grid_data).execute()
+    response = service.spreadsheets().get(spreadsheetId=spreadsheet_id, includeGridData=include_grid_data,
+                                          fields=fields).execute()
     return response
 
 
@@ -158,50 +158,51 @@ def pandas_to_sheet(spreadsheet_id, page_name, df, starting_cell='A1'):
     """
 
     service = auth.get_service("spreadsheets")
+    body = _pandas_to_sheet_body(page_name, df, starting_cell)
 
-    df.fillna(value=0, inplace=True)
-    columnsList = df.columns.tolist()
-    valuesList = df.values.tolist()
+    response = service.spreadsheets().values().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body=body
+    ).execute()
 
-    try:
-        data = [
-            {
-                'range': page_name+'!'+starting_cell,
-                'values': [columnsList] + valuesList
-            },
-        ]
-
-        body = {
-            'valueInputOption': 'USER_ENTERED',
-            'data': data
-        }
+    return response
 
-        response = service.spreadsheets().values().batchUpdate(
-            spreadsheetId=spreadsheet_id,
-            body=body
-        ).execute()
 
-        return response
+def _pandas_to_sheet_body(page_name, df, starting_cell='A1'):
+    df.fillna(value=0, inplace=True)
+    columnsList = df.columns.tolist()
+    valuesList = df.values.tolist()
 
-    except Exception as e:
-        print(e)
+    data = [
+        {
+            'range': page_name+'!'+starting_cell,
+            'values': [columnsList] + valuesList
+        },
+    ]
+
+    return {
+        'valueInputOption': 'USER_ENTERED',
+        'data': data
+    }
 
 
-def get_sheets(spreadsheet_id, only_names = False):
-    """Get the names of the sheets in a spreadsheet.
+def get_sheets(spreadsheet_id, only_names = False, fields='sheets.properties'):
+    """Get the sheets in a spreadsheet.
 
     Args:
         spreadsheet_id (str): The id from the Spreadsheet. Long string with letters, numbers and characters
+        only_names (bool, optional): Return only the names of the sheets. Defaults to False.
+        fields (str, optional): Field mask of the response. Defaults to 'sheets.properties',
+            pass 'sheets' to get the charts, merges, filters and formats as well.
 
     Returns:
-        list: A list of the names of the sheets.
+        list: A list of the sheets, or of their names.
     """
-    response = get_info(spreadsheet_id)
-    
     if only_names:
-        [a['properties']['title'] for a in response['sheets']]
-    else: 
-        return response['sheets']
+        return get_sheet_names(spreadsheet_id)
+
+    response = get_info(spreadsheet_id, fields=fields)
+    return response['sheets']
     
 
 def get_sheet_names(spreadsheet_id):
@@ -213,27 +214,29 @@ def get_sheet_names(spreadsheet_id):
     Returns:
         list: A list of the names of the sheets.
     """
-    response = get_info(spreadsheet_id)
+    response = get_info(spreadsheet_id, fields='sheets.properties.title')
     return [a['properties']['title'] for a in response['sheets']]
 
 
-def get_sheet_charts(spreadsheet_id, sheet_name):
+def get_sheet_charts(spreadsheet_id, sheet_name, fields='sheets(properties.title,charts)'):
     """Returns a list of the charts in a specific sheet
 
     Args:
         spreadsheet_id (str): Id of the desired document
         sheet_name - Name of the desired page 'Hoja1'
+        fields (str, optional): Field mask of the response, must include the sheet titles.
+            Defaults to 'sheets(properties.title,charts)'.
 
     Returns:
         list: returns a list of the charts.
     """
-    sheet = get_info(spreadsheet_id)
+    sheet = get_info(spreadsheet_id, fields=fields)
     for sheet_page in sheet['sheets']:
         if sheet_page['properties']['title']==sheet_name:
             return sheet_page['charts']
 
 
-def download_sheet_to_pandas(spreadsheet_id, sheet_name='', sheet_range='', index='', has_header=True ):
+def download_sheet_to_pandas(spreadsheet_id, sheet_name='', sheet_range='', index='', has_header=True, fields='values'):
     """Downloads and instances a pd.DataFrame object with the sheets values. Parameters are important to manage the format of the info.
     Args:
         spreadsheet_id (_type_): Id of the desired document
@@ -241,6 +244,7 @@ def download_sheet_to_pandas(spreadsheet_id, sheet_name='', sheet_range='', inde
         sheet_range (str, optional): Range of the desired info 'A1:C6'.(by default: WHOLE PAGE). Defaults to ''.
         index (str, optional): column you want to be the index of the resulting dataframe (by default: none of the columns is set as index). Defaults to ''.
         has_header (bool, optional): If the sheet has a header. If not, a dummy header is created. Defaults to True.
+        fields (str, optional): Field mask of the value range, it must include 'values'. Defaults to 'values'.
 
     Returns:
         pd.DataFrame: The output dataframe.
@@ -253,22 +257,29 @@ def download_sheet_to_pandas(spreadsheet_id, sheet_name='', sheet_range='', inde
     response = service.spreadsheets().values().get(
         spreadsheetId=spreadsheet_id,
         valueRenderOption='FORMATTED_VALUE',
-        range=sheet_name+sheet_range
+        range=sheet_name+sheet_range,
+        fields=fields
     ).execute()
 
+    return _values_to_pandas(response['values'], index, has_header)
+
+
+def _values_to_pandas(values, index='', has_header=True):
+    import pandas as pd
+
     if has_header:
-        headers = response['values'].pop(0)
+        headers = values.pop(0)
     else:
         max_len = 0 
-        for row in response['values']:
+        for row in values:
             if len(row) > max_len:
                 max_len = len(row)
         headers = __get_range_column_names(max_len)
 
     if (index == ''):
-        return pd.DataFrame(response['values'], columns=headers)
+        return pd.DataFrame(values, columns=headers)
     else:
-        return pd.DataFrame(response['values'], columns=headers).set_index(index, drop=False)
+        return pd.DataFrame(values, columns=headers).set_index(index, drop=False)
 
 
 def clear_sheet(spreadsheet_id, sheet_name, sheet_range=''):
@@ -2,11 +2,12 @@ import functools
 import mimetypes
 import datetime
 
-from google.cloud import storage
+from GoogleApiSupport import deadline
 
 
 @functools.lru_cache()
 def get_storage_client():
+    from google.cloud import storage
     return storage.Client()
 
 
@@ -20,7 +21,16 @@ def upload_from_filename_to_google_storage(filename, bucketName,
     content_type = mimetypes.guess_type(filename)[0]
     if content_type:
         blob.content_type = content_type
-    blob.upload_from_filename(filename)
+    with deadline.default_timeout('storage'):
+        deadline.check('upload_from_filename')
+        timeout = deadline.remaining()
+        try:
+            # Without a deadline the client keeps its own default timeout
+            blob.upload_from_filename(filename, **({} if timeout is None else {'timeout': timeout}))
+        except Exception as error:
+            if deadline.remaining() == 0:
+                raise deadline.DeadlineExceeded('upload_from_filename did not finish before its deadline') from error
+            raise
     return blob.public_url
 
 
@@ -0,0 +1,105 @@
+"""Background refresh of the access tokens, before they expire.
+
+Credentials loaded by `auth.get_credentials` are watched by a daemon thread that refreshes
+them `REFRESH_MARGIN` seconds before their token expires, so requests always find a valid
+token and never wait for the token endpoint, even after the process has been idle.
+"""
+
+import logging
+import datetime
+import threading
+import weakref
+
+# Set to False to let the transports refresh the tokens when a request finds them expired.
+ENABLED = True
+# Seconds before the expiry of a token when it is refreshed.
+REFRESH_MARGIN = 300
+# Seconds before trying again after a failed refresh.
+RETRY_DELAY = 30
+# Longest sleep of the thread, new credentials wake it up anyway.
+MAX_SLEEP = 600
+
+_watched = weakref.WeakKeyDictionary()
+_watched_lock = threading.Lock()
+_wakeup = threading.Event()
+_thread = None
+
+
+def watch(credentials, on_refresh=None):
+    """Keeps the token of some credentials fresh while they are in use.
+
+    Args:
+        credentials (google.auth.credentials.Credentials): Credentials able to refresh themselves.
+        on_refresh (callable, optional): Called with the credentials after every refresh, to persist them.
+            Defaults to None.
+    """
+    global _thread
+    if not ENABLED:
+        return
+    with _watched_lock:
+        _watched[credentials] = on_refresh
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='google-api-token-refresh', daemon=True)
+            _thread.start()
+    _wakeup.set()
+
+
+def unwatch(credentials):
+    """Stops refreshing the token of some credentials, e.g. once their key file was replaced."""
+    with _watched_lock:
+        _watched.pop(credentials, None)
+
+
+def _run():
+    from google.auth.transport.requests import Request
+
+    request = Request()
+    while True:
+        _wakeup.clear()
+        _wakeup.wait(refresh_due(request))
+
+
+def refresh_due(request):
+    """Refreshes the watched credentials whose token is about to expire.
+
+    Returns:
+        float: Seconds until the next token needs a refresh.
+    """
+    from google.auth.exceptions import RefreshError
+
+    with _watched_lock:
+        watched = list(_watched.items())
+
+    next_refresh = MAX_SLEEP
+    for credentials, on_refresh in watched:
+        remaining = _remaining(credentials)
+        if remaining is not None and remaining <= REFRESH_MARGIN:
+            try:
+                credentials.refresh(request)
+                if on_refresh:
+                    on_refresh(credentials)
+            except RefreshError as error:
+                # Revoked or misconfigured, the next request will raise it to the caller
+                logging.warning(f'Stopped refreshing credentials in the background after {error!r}')
+                with _watched_lock:
+                    _watched.pop(credentials, None)
+                continue
+            except Exception as error:
+                logging.warning(f'Background token refresh failed, retrying in {RETRY_DELAY}s: {error!r}')
+                next_refresh = min(next_refresh, RETRY_DELAY)
+                continue
+            remaining = _remaining(credentials)
+        if remaining is not None:
+            next_refresh = min(next_refresh, max(remaining - REFRESH_MARGIN, 1))
+    return next_refresh
+
+
+def _remaining(credentials):
+    """Seconds of validity left of the token, 0 if there is none yet and None if it never expires."""
+    if not credentials.token:
+        return 0
+    if credentials.expiry is None:
+        return None
+    # google-auth keeps expiries as naive UTC datetimes
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return (credentials.expiry - now).total_seconds()
@@ -0,0 +1,160 @@
+"""Http transports for the services built in `auth`.
+
+googleapiclient services talk to an httplib2 style object: `request(uri, method, body, headers)`
+returning `(response, content)`. `SessionHttp` offers that interface on top of a pooled
+`requests` session, so connections to googleapis.com are kept alive and shared by every
+service using the same credentials, instead of doing a new TCP+TLS handshake per call.
+"""
+
+import time
+import threading
+
+import httplib2
+import requests
+import google_auth_httplib2
+from google.auth.transport.requests import AuthorizedSession
+
+from GoogleApiSupport import deadline
+
+# Number of hosts each session keeps a connection pool for.
+POOL_CONNECTIONS = 10
+# Connections kept alive per host. Raise it when more threads than this share a session.
+POOL_MAXSIZE = 32
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class SessionHttp:
+    """httplib2 compatible wrapper of an `AuthorizedSession`.
+
+    Args:
+        session (AuthorizedSession): Session that authorizes and sends the requests.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        # googleapiclient looks for the credentials here to authorize batch requests
+        self.credentials = session.credentials
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        try:
+            response = self.session.request(method, uri, data=body, headers=headers,
+                                            allow_redirects=redirections > 0, timeout=deadline.remaining())
+        except requests.exceptions.Timeout as error:
+            raise TimeoutError(str(error)) from error
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status_code)
+        info['reason'] = response.reason
+        content = response.content
+        encoding = info.get('content-encoding')
+        if encoding and encoding in getattr(response.raw, 'CONTENT_DECODERS', ('gzip', 'deflate')):
+            # requests decoded the body, the headers describe it as httplib2 does. MediaIoBaseDownload
+            # counts the bytes received with content-length
+            info['-content-encoding'] = info.pop('content-encoding')
+            info['content-length'] = str(len(content))
+        return httplib2.Response(info), content
+
+    def close(self):
+        self.session.close()
+
+
+class RateLimitedHttp:
+    """Wraps a transport so every request first takes a token from a `rate_limit.ApiLimiter`.
+
+    Args:
+        http: Transport sending the requests, such as `SessionHttp`.
+        limiter (rate_limit.ApiLimiter): Limiter shared by everyone using the same quota.
+    """
+
+    def __init__(self, http, limiter):
+        self.http = http
+        self.limiter = limiter
+        self.credentials = getattr(http, 'credentials', None)
+
+    def request(self, uri, method='GET', *args, **kwargs):
+        left = deadline.remaining()
+        # Nothing is taken from the bucket when the wait is past the deadline
+        wait = self.limiter.reserve(max_wait=left, method=method)
+        if left is not None and wait > left:
+            raise deadline.DeadlineExceeded(f'The rate limit allows no request before the deadline, in {wait:.1f}s')
+        if wait > 0:
+            time.sleep(wait)
+        return self.http.request(uri, method, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+def build_session(credentials):
+    """Creates an `AuthorizedSession` whose connection pools are sized by `POOL_CONNECTIONS` and `POOL_MAXSIZE`.
+
+    Args:
+        credentials (google.auth.credentials.Credentials): Credentials used to authorize the requests.
+
+    Returns:
+        AuthorizedSession: The new session.
+    """
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session_http(session_key, credentials):
+    """Returns a `SessionHttp` on the session shared by everyone asking with the same key.
+
+    The session is replaced when the credentials are not the ones it was built with, such as
+    after `auth.get_credentials` parsed a rotated key file again.
+
+    Args:
+        session_key (hashable): Identifies the credentials the session is authorized with.
+        credentials (google.auth.credentials.Credentials): Credentials to authorize the session with.
+
+    Returns:
+        SessionHttp: Transport to pass as `http` when building a service.
+    """
+    with _sessions_lock:
+        session = _sessions.get(session_key)
+    if session is None or session.credentials is not credentials:
+        new_session = build_session(credentials)
+        with _sessions_lock:
+            previous = _sessions.get(session_key)
+            if previous is not None and previous.credentials is credentials:
+                session = previous
+            else:
+                session = _sessions[session_key] = new_session
+        if session is not new_session:
+            new_session.close()
+        elif previous is not None:
+            previous.close()
+    return SessionHttp(session)
+
+
+class DeadlineAuthorizedHttp(google_auth_httplib2.AuthorizedHttp):
+    """AuthorizedHttp whose socket timeout is the time left before the current `deadline`."""
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        timeout = deadline.remaining()
+        # httplib2 applies its timeout to new connections, the kept alive ones are updated here
+        self.http.timeout = timeout
+        for connection in self.http.connections.values():
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+        return super().request(uri, method, body=body, headers=headers, **kwargs)
+
+
+def authorized_httplib2(credentials):
+    """Returns a fresh httplib2 transport authorized with the credentials. It must not be shared between threads."""
+    return DeadlineAuthorizedHttp(credentials, http=httplib2.Http())
+
+
+def close_sessions():
+    """Closes every shared session and its pooled connections."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,217 @@
+"""Resumable uploads of files to Drive, in chunks, and pools of concurrent uploads.
+
+    from GoogleApiSupport import uploads
+
+    file = uploads.upload('export.csv', local_file_path='/data/export.csv', parents=[folder_id])
+
+    report = uploads.upload_many([{'file_name': name, 'local_file_path': path, 'parents': [folder_id]}
+                                  for name, path in exports], max_workers=4)
+    print(f'{report.bytes / report.seconds / 2**20:.1f} MiB/s')
+
+Files larger than `CHUNK_SIZE` are sent in chunks of that size through an upload session, and
+a chunk that fails is sent again from the last byte the server received instead of from the
+start. The url of the session is kept under a key derived from the path, size and modification
+time of the file, so uploading the same file again after a crash, even from another process
+when `SESSION_DIR` (or the `GOOGLE_API_UPLOAD_SESSION_DIR` environment variable) is set,
+continues the upload. Smaller files are sent in a single request.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import file_lock
+
+# Bytes sent per request, a multiple of 256 KiB. Smaller files are uploaded in one request.
+CHUNK_SIZE = 8 * 1024 * 1024
+# Folder where the urls of the upload sessions are kept. None keeps them in memory.
+SESSION_DIR = os.environ.get('GOOGLE_API_UPLOAD_SESSION_DIR')
+# Seconds an upload session can be resumed, Drive expires them after a week.
+SESSION_TTL = 6 * 24 * 3600
+# Uploads running at the same time in `upload_many`.
+MAX_WORKERS = 4
+
+UploadResult = namedtuple('UploadResult', [
+    'request',   # keyword arguments of `upload`
+    'file',      # the created file, None if it failed
+    'error',     # the exception of the failed uploads
+    'bytes',     # size of the upload
+    'seconds',
+])
+UploadReport = namedtuple('UploadReport', [
+    'results',   # UploadResult of every upload, in the order they were given
+    'bytes',     # bytes of the successful uploads
+    'seconds',   # wall time of the whole pool
+])
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def upload(file_name, local_file_path=None, buffer=None, mime_type=None, parents=None, chunk_size=None,
+           fields='id', on_progress=None, resume_key=None, **kwargs):
+    """Creates a Drive file with the content of a local file or a buffer.
+
+    Args:
+        file_name (str): Name of the file in Drive.
+        local_file_path (str, optional): Path of the file to upload. Defaults to None.
+        buffer (io.IOBase, optional): Seekable binary stream to upload instead. Defaults to None.
+        mime_type (str, optional): Mime type of the content, guessed from the path if not given. Defaults to None.
+        parents (list, optional): Ids of the folders of the file. Defaults to None.
+        chunk_size (int, optional): Bytes per request, a multiple of 256 KiB. Defaults to CHUNK_SIZE.
+        fields (str, optional): Field mask of the returned file. Defaults to 'id'.
+        on_progress (callable, optional): Called with the bytes sent and the total after every chunk.
+            Defaults to None.
+        resume_key (str, optional): Key of the upload session to continue. Defaults to None, which
+            derives it from the path, size and modification time of local files. Buffers are only
+            resumed across calls with a key.
+        **kwargs: Other parameters of files.create.
+
+    Returns:
+        dict: The created file.
+    """
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
+    from googleapiclient.http import MediaIoBaseUpload
+
+    if (local_file_path is None) == (buffer is None):
+        raise ValueError('Provide a local file path or a buffer')
+    chunk_size = chunk_size or CHUNK_SIZE
+    if local_file_path is not None:
+        size = os.path.getsize(local_file_path)
+        media = MediaFileUpload(local_file_path, mimetype=mime_type, chunksize=chunk_size,
+                                resumable=size > chunk_size)
+        if resume_key is None:
+            resume_key = _file_key(local_file_path, file_name, parents)
+    else:
+        size = buffer.seek(0, os.SEEK_END)
+        buffer.seek(0)
+        media = MediaIoBaseUpload(buffer, mime_type or 'application/octet-stream', chunksize=chunk_size,
+                                  resumable=size > chunk_size)
+
+    body = {'name': file_name, 'mimeType': mime_type or media.mimetype()}
+    if parents:
+        body['parents'] = parents
+    kwargs.setdefault('supportsAllDrives', True)
+    service = auth.get_service("drive")
+    request = service.files().create(body=body, media_body=media, fields=fields, **kwargs)
+    if not media.resumable():
+        response = request.execute()
+        if on_progress:
+            on_progress(size, size)
+        return response
+
+    session_uri = _load_session(resume_key) if resume_key else None
+    if session_uri:
+        # Asks the server how much it received before sending the rest
+        request.resumable_uri = session_uri
+        request._in_error_state = True
+
+    def next_chunk():
+        try:
+            return request.next_chunk()
+        except HttpError as error:
+            if error.resp.status in (404, 410) and request.resumable_uri:
+                # The session expired, start a new one
+                _forget_session(resume_key)
+                request.resumable_uri = None
+                request.resumable_progress = 0
+                request._in_error_state = False
+                return request.next_chunk()
+            raise
+
+    response = None
+    with deadline.default_timeout('drive'):
+        while response is None:
+            status, response = execution.call_with_retries(next_chunk, description='drive.files.create upload')
+            if resume_key and request.resumable_uri != session_uri:
+                session_uri = request.resumable_uri
+                _save_session(resume_key, session_uri)
+            if on_progress:
+                on_progress(status.resumable_progress if status else size, size)
+    if resume_key:
+        _forget_session(resume_key)
+    return response
+
+
+def upload_many(uploads, max_workers=MAX_WORKERS, chunk_size=None):
+    """Uploads several files at once with a pool of threads.
+
+    Args:
+        uploads (iterable): Keyword arguments of `upload` for every file.
+        max_workers (int, optional): Uploads running at the same time. Defaults to MAX_WORKERS.
+        chunk_size (int, optional): Bytes per request of every upload. Defaults to CHUNK_SIZE.
+
+    Returns:
+        UploadReport: The result of every upload and the bytes uploaded, failed uploads don't raise.
+    """
+    def run(kwargs):
+        started = time.monotonic()
+        size = os.path.getsize(kwargs['local_file_path']) if kwargs.get('local_file_path') else None
+        try:
+            file = upload(**dict({'chunk_size': chunk_size}, **kwargs))
+        except Exception as error:
+            return UploadResult(kwargs, None, error, size, time.monotonic() - started)
+        return UploadResult(kwargs, file, None, size, time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers, thread_name_prefix='drive-upload') as executor:
+        # Threads of the pool do not inherit the context, with the current deadline
+        futures = [executor.submit(contextvars.copy_context().run, run, kwargs) for kwargs in uploads]
+        results = [future.result() for future in futures]
+    uploaded = sum(result.bytes or 0 for result in results if result.error is None)
+    return UploadReport(results, uploaded, time.monotonic() - started)
+
+
+def _file_key(path, file_name, parents):
+    stat = os.stat(path)
+    identity = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns, file_name, sorted(parents or [])]
+    return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+
+def _session_path(key):
+    return os.path.join(SESSION_DIR, f'{key}.json')
+
+
+def _load_session(key):
+    if SESSION_DIR:
+        try:
+            with open(_session_path(key)) as session_file:
+                session = json.load(session_file)
+        except (OSError, ValueError):
+            return None
+    else:
+        with _sessions_lock:
+            session = _sessions.get(key)
+    if session and time.time() - session['created'] < SESSION_TTL:
+        return session['uri']
+    return None
+
+
+def _save_session(key, uri):
+    session = {'uri': uri, 'created': time.time()}
+    if SESSION_DIR:
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        file_lock.write_atomic(_session_path(key), json.dumps(session))
+    else:
+        with _sessions_lock:
+            _sessions[key] = session
+
+
+def _forget_session(key):
+    if SESSION_DIR:
+        try:
+            os.remove(_session_path(key))
+        except FileNotFoundError:
+            pass
+    else:
+        with _sessions_lock:
+            _sessions.pop(key, None)
@@ -0,0 +1,196 @@
+"""Calls per second and latency percentiles of the main functions, against the local HTTPS stand-in.
+
+    python -m benchmarks.bench_throughput --calls 50 --latency 0.02 --output results.json
+
+Every function is measured at several data sizes: permissions transferred by `copy_file`,
+replacements of `batch_text_replace`, rows of `pandas_to_sheet` and `download_sheet_to_pandas`
+and files listed by `files_in_folder`. The server answers with bodies shaped like the recorded
+API responses. Results are written as JSON so runs of different releases can be compared.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import datetime
+import statistics
+import subprocess
+import contextlib
+
+from benchmarks import responses
+from benchmarks.fake_server import FakeGoogleApiServer
+
+FILE_ID = 'source'
+PRESENTATION_ID = 'presentation'
+SPREADSHEET_ID = 'spreadsheet'
+SHEET_NAME = 'Sheet1'
+
+
+def copy_file_case(size):
+    """`drive.copy_file` transferring `size` permissions."""
+    from GoogleApiSupport import drive
+
+    permissions = responses.drive_permission_list(size)
+    # The permissions of the source and of the copy are read in one batch, then the grants are sent in another
+    read_permissions = _batch_route(lambda index: permissions if index == 0 else {'permissions': []})
+    insert_permissions = _batch_route(responses.drive_permission)
+
+    def permissions_batch(handler):
+        if b'GET /drive/v3/files/' in handler.request_body:
+            return read_permissions(handler)
+        return insert_permissions(handler)
+
+    routes = {
+        ('POST', f'/drive/v3/files/{FILE_ID}/copy'): lambda handler: (200, responses.drive_file('copy')),
+        ('POST', '/batch/drive/v3'): permissions_batch,
+    }
+    return routes, lambda: drive.copy_file(FILE_ID, 'Copy', transfer_permissions=size > 0)
+
+
+def batch_text_replace_case(size):
+    """`slides.batch_text_replace` with `size` replacements."""
+    from GoogleApiSupport import slides
+
+    body = json.dumps(responses.slides_batch_update(PRESENTATION_ID, size)).encode()
+    mapping = {'{{placeholder_%d}}' % index: 'value %d' % index for index in range(size)}
+    routes = {('POST', f'/v1/presentations/{PRESENTATION_ID}:batchUpdate'): lambda handler: (200, body)}
+    return routes, lambda: slides.batch_text_replace(mapping, PRESENTATION_ID)
+
+
+def pandas_to_sheet_case(size):
+    """`spreadsheets.pandas_to_sheet` uploading `size` rows."""
+    import pandas as pd
+    from GoogleApiSupport import spreadsheets
+
+    values = responses.sheet_values(SHEET_NAME, size)['values']
+    df = pd.DataFrame(values[1:], columns=values[0])
+    body = json.dumps(responses.sheet_values_batch_update(SPREADSHEET_ID, SHEET_NAME, size)).encode()
+    routes = {('POST', f'/v4/spreadsheets/{SPREADSHEET_ID}/values:batchUpdate'): lambda handler: (200, body)}
+    return routes, lambda: spreadsheets.pandas_to_sheet(SPREADSHEET_ID, SHEET_NAME, df)
+
+
+def download_sheet_to_pandas_case(size):
+    """`spreadsheets.download_sheet_to_pandas` downloading `size` rows."""
+    from GoogleApiSupport import spreadsheets
+
+    body = json.dumps(responses.sheet_values(SHEET_NAME, size)).encode()
+    routes = {('GET', f'/v4/spreadsheets/{SPREADSHEET_ID}/values/{SHEET_NAME}'): lambda handler: (200, body)}
+    return routes, lambda: spreadsheets.download_sheet_to_pandas(SPREADSHEET_ID, SHEET_NAME)
+
+
+def files_in_folder_case(size):
+    """`drive.files_in_folder` listing `size` files."""
+    from GoogleApiSupport import drive
+
+    body = json.dumps(responses.drive_file_list(size)).encode()
+    routes = {('GET', '/drive/v3/files'): lambda handler: (200, body)}
+    return routes, lambda: drive.files_in_folder('folder')
+
+
+CASES = {
+    # name: (case, sizes)
+    'copy_file': (copy_file_case, (0, 10, 100)),
+    'batch_text_replace': (batch_text_replace_case, (10, 100, 1000)),
+    'pandas_to_sheet': (pandas_to_sheet_case, (100, 1000, 10000)),
+    'download_sheet_to_pandas': (download_sheet_to_pandas_case, (100, 1000, 10000)),
+    'files_in_folder': (files_in_folder_case, (10, 100, 1000)),
+}
+
+
+def run(calls=50, latency=0.0, only=None):
+    results = []
+    with FakeGoogleApiServer(latency=latency) as server:
+        # httplib2 reads its CA bundle when imported, so the library is imported after pointing it to the server
+        os.environ.update(server.environment())
+        from GoogleApiSupport import auth, rate_limit
+        # Measures the library and the transport, without pacing to the quotas
+        rate_limit.ENABLED = False
+        auth.invalidate_service_cache()
+
+        for name, (case, sizes) in CASES.items():
+            if only and name not in only:
+                continue
+            for size in sizes:
+                server.routes, call = case(size)
+                # The functions print their progress
+                with contextlib.redirect_stdout(io.StringIO()):
+                    call()
+                    server.reset_counters()
+                    latencies = []
+                    started = time.perf_counter()
+                    for _ in range(calls):
+                        start = time.perf_counter()
+                        call()
+                        latencies.append(time.perf_counter() - start)
+                    elapsed = time.perf_counter() - started
+
+                percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+                results.append({
+                    'function': name,
+                    'size': size,
+                    'calls': calls,
+                    'calls_per_second': calls / elapsed,
+                    'mean_ms': statistics.mean(latencies) * 1000,
+                    'p50_ms': percentiles[49] * 1000,
+                    'p99_ms': percentiles[98] * 1000,
+                    'requests_per_call': server.requests / calls,
+                })
+        auth.invalidate_service_cache()
+    return results
+
+
+def environment(calls, latency):
+    """Describes the run, so results of different releases and machines can be told apart."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'calls': calls,
+        'server_latency': latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50, help='Measured calls per function and size')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the server waits before answering')
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help='Functions to measure')
+    parser.add_argument('--output', default='benchmark-results.json', help="JSON results file, '-' for stdout")
+    args = parser.parse_args()
+    # google-auth looks up the access boundary of the fake service account in the background and fails
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    results = run(args.calls, args.latency, args.only)
+    print('{:<26}{:>7}{:>12}{:>10}{:>10}{:>10}'.format('function', 'size', 'calls/s', 'p50 ms', 'p99 ms', 'reqs'),
+          file=sys.stderr)
+    for result in results:
+        print('{function:<26}{size:>7}{calls_per_second:>12.1f}{p50_ms:>10.2f}{p99_ms:>10.2f}'
+              '{requests_per_call:>10.1f}'.format(**result), file=sys.stderr)
+
+    report = json.dumps({'environment': environment(args.calls, args.latency), 'results': results}, indent=2)
+    if args.output == '-':
+        print(report)
+    else:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report + '\n')
+
+
+def _batch_route(part_response):
+    def route(handler):
+        body, content_type = responses.batch(handler.request_body, part_response)
+        return 200, body, {'Content-Type': content_type}
+    return route
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Local HTTPS stand-in of the Google APIs used by the benchmarks.
+
+The server answers the OAuth token endpoint and any API path with small JSON bodies,
+optionally after a fixed latency, and counts the TCP connections it accepts so
+benchmarks can tell how many handshakes a run needed.
+
+Services are pointed to it through `GOOGLE_API_ROOT_URL` and authorized with a throwaway
+service account key whose `token_uri` is the local server.
+"""
+
+import os
+import ssl
+import json
+import time
+import datetime
+import tempfile
+import ipaddress
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+class FakeGoogleApiServer:
+    """Threaded keep-alive HTTPS server answering like the Google APIs.
+
+    Args:
+        latency (float, optional): Seconds every response is delayed. Defaults to 0.
+        routes (dict, optional): Maps `(method, path)` to a callable receiving the handler and
+            returning `(status, body)` or `(status, body, headers)`. The body is a dict sent as
+            JSON or bytes sent as they are. Unknown paths answer `{'id': <last path segment>}`.
+    """
+
+    def __init__(self, latency=0.0, routes=None):
+        self.latency = latency
+        self.routes = routes or {}
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cert_path, key_path, self._private_key = _self_signed_certificate(self._tmp.name)
+
+        server = self
+
+        class Handler(_Handler):
+            fake = server
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 1024
+
+            def get_request(self):
+                connection, address = super().get_request()
+                with server._lock:
+                    server.connections += 1
+                return connection, address
+
+        self._httpd = Server(('127.0.0.1', 0), Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_path, key_path)
+        # The handshake happens in the handler threads, so many clients can connect at once
+        self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True,
+                                                 do_handshake_on_connect=False)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return 'https://localhost:{}/'.format(self._httpd.server_address[1])
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+    def write_service_account_file(self, path=None):
+        """Writes a service account key file whose tokens are issued by this server and returns its path."""
+        path = path or os.path.join(self._tmp.name, 'service_credentials.json')
+        private_key = self._private_key.private_bytes(serialization.Encoding.PEM,
+                                                      serialization.PrivateFormat.PKCS8,
+                                                      serialization.NoEncryption())
+        with open(path, 'w') as key_file:
+            json.dump({
+                'type': 'service_account',
+                'project_id': 'benchmark',
+                'private_key_id': 'benchmark',
+                'private_key': private_key.decode(),
+                'client_email': 'benchmark@benchmark.iam.gserviceaccount.com',
+                'client_id': '1',
+                'token_uri': self.url + 'token',
+            }, key_file)
+        return path
+
+    def environment(self):
+        """Environment variables that make the library and its transports use this server."""
+        return {
+            'GOOGLE_APPLICATION_CREDENTIALS': self.write_service_account_file(),
+            'GOOGLE_API_ROOT_URL': self.url,
+            'REQUESTS_CA_BUNDLE': self.cert_path,
+            'HTTPLIB2_CA_CERTS': self.cert_path,
+            'SSL_CERT_FILE': self.cert_path,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, without this delayed ACKs add 40ms to every response
+    disable_nagle_algorithm = True
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.request_body = self.rfile.read(length) if length else b''
+        with self.fake._lock:
+            self.fake.requests += 1
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+        path = self.path.split('?')[0]
+        headers = {}
+        if path == '/token':
+            status, body = 200, {'access_token': 'benchmark-token', 'token_type': 'Bearer', 'expires_in': 3600}
+        elif (self.command, path) in self.fake.routes:
+            status, body, *extra = self.fake.routes[(self.command, path)](self)
+            headers = extra[0] if extra else {}
+        else:
+            status, body = 200, {'id': path.rstrip('/').rsplit('/', 1)[-1]}
+
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        headers = dict({'Content-Type': 'application/json; charset=UTF-8'}, **headers)
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+
+def _self_signed_certificate(folder):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName('localhost'),
+                                                    x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]),
+                       critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(folder, 'cert.pem')
+    key_path = os.path.join(folder, 'key.pem')
+    with open(cert_path, 'wb') as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as key_file:
+        key_file.write(key.private_bytes(serialization.Encoding.PEM,
+                                         serialization.PrivateFormat.TraditionalOpenSSL,
+                                         serialization.NoEncryption()))
+    return cert_path, key_path, key
@@ -0,0 +1,85 @@
+"""Bodies shaped like the responses recorded from the Drive, Slides and Sheets APIs, at any size.
+
+Each function returns what the API answered for the call, with the recorded attributes and
+`size` items, so the fake server can serve them without keeping large fixtures in the repo.
+"""
+
+import re
+import json
+
+
+def drive_file(file_id='1dXc2kLq3BvRrGxJmQk8oVnT5sWz0aYfE', name='Report'):
+    return {
+        'kind': 'drive#file',
+        'id': file_id,
+        'name': name,
+        'mimeType': 'application/vnd.google-apps.presentation',
+    }
+
+
+def drive_file_list(size):
+    mime_types = ('application/vnd.google-apps.spreadsheet', 'application/vnd.google-apps.presentation',
+                  'application/vnd.google-apps.folder', 'application/pdf')
+    return {'files': [{'id': '1{:032d}'.format(index), 'name': 'File {}'.format(index),
+                       'mimeType': mime_types[index % len(mime_types)]}
+                      for index in range(size)]}
+
+
+def drive_permission_list(size):
+    return {'permissions': [{'id': '{:020d}'.format(index), 'type': 'user', 'role': 'writer' if index % 3 else 'reader',
+                             'emailAddress': 'user{}@example.com'.format(index)}
+                            for index in range(size)]}
+
+
+def drive_permission(index=0):
+    return {'kind': 'drive#permission', 'id': '{:020d}'.format(index), 'type': 'user', 'role': 'reader'}
+
+
+def batch(request_body, part_response):
+    """Multipart answer of a `/batch` endpoint, `part_response(index)` giving the body of every call.
+
+    Returns:
+        tuple: The body as bytes and the Content-Type header.
+    """
+    content_ids = re.findall(rb'Content-ID: <([^>]+)>', request_body)
+    parts = []
+    for index, content_id in enumerate(content_ids):
+        parts.append(b'--batch_benchmark\r\nContent-Type: application/http\r\nContent-ID: <response-' + content_id
+                     + b'>\r\n\r\nHTTP/1.1 200 OK\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n'
+                     + json.dumps(part_response(index)).encode() + b'\r\n')
+    return b''.join(parts) + b'--batch_benchmark--', 'multipart/mixed; boundary=batch_benchmark'
+
+
+def slides_batch_update(presentation_id, size):
+    return {
+        'presentationId': presentation_id,
+        'replies': [{'replaceAllText': {'occurrencesChanged': 1}} for _ in range(size)],
+        'writeControl': {'requiredRevisionId': 'ALm37BWZ6m0oPDCGYjQ0nqkY5kk0'},
+    }
+
+
+def sheet_values(sheet_name, rows, columns=10):
+    values = [['Column {}'.format(column) for column in range(columns)]]
+    values += [['{}-{}'.format(row, column) for column in range(columns)] for row in range(rows)]
+    return {
+        'range': "{}!A1:{}{}".format(sheet_name, chr(ord('A') + columns - 1), rows + 1),
+        'majorDimension': 'ROWS',
+        'values': values,
+    }
+
+
+def sheet_values_batch_update(spreadsheet_id, sheet_name, rows, columns=10):
+    return {
+        'spreadsheetId': spreadsheet_id,
+        'totalUpdatedRows': rows + 1,
+        'totalUpdatedColumns': columns,
+        'totalUpdatedCells': (rows + 1) * columns,
+        'totalUpdatedSheets': 1,
+        'responses': [{
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': "{}!A1:{}{}".format(sheet_name, chr(ord('A') + columns - 1), rows + 1),
+            'updatedRows': rows + 1,
+            'updatedColumns': columns,
+            'updatedCells': (rows + 1) * columns,
+        }],
+    }
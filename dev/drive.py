@@ -1,14 +1,21 @@
 from GoogleApiSupport import auth
+from GoogleApiSupport import drive
+from GoogleApiSupport import downloads
 from dev import utils
 from apiclient import errors
-import io
 import os
 import pandas as pd
-from googleapiclient.http import MediaIoBaseDownload
 import webbrowser
 
 # TODO: type hinting
 
+class _DriveService:
+    """Builds the Drive service on first access instead of at import time. auth caches it per thread."""
+
+    def __get__(self, instance, owner):
+        return auth.get_service("drive")
+
+
 class GoogleDriveFile:
     """Any file in Google Drive.
     
@@ -25,12 +32,12 @@ class GoogleDriveFile:
 
     """
     
-    service = auth.get_service("drive")
+    service = _DriveService()
     
-    def __init__(self, file_id=None):        
+    def __init__(self, file_id=None, fields='name,mimeType,webViewLink,parents,permissions'):
         if file_id is not None: 
-            # File information
-            file_info = self.service.files().get(fileId=file_id, fields='*').execute()
+            # File information, only the attributes kept by the object
+            file_info = self.service.files().get(fileId=file_id, fields=fields).execute()
             self.file_id = file_id
             self.file_name = file_info.get('name')
             self.mime_type = file_info.get('mimeType')
@@ -123,7 +130,7 @@ class GoogleDriveFile:
         except errors.HttpError as error:
             print('An error occurred: %s' % error)
             
-    def download(self, destination_folder='', file_name=None, open_file=False):
+    def download(self, destination_folder='', file_name=None, open_file=False, chunk_size=None):
         """Method to download the file if it's stored in Google Drive. If it's a Google Worspace file, use the method export().
         Reflects the first use case described here: https://developers.google.com/drive/api/guides/manage-downloads
 
@@ -131,31 +138,22 @@ class GoogleDriveFile:
             destination_folder (str, optional): Folder where to download the file. Defaults to ''.
             file_name (str, optional): Name of the file downloaded. Defaults to None, in which case it takes the original name.
             open_file (bool, optional): Whether to open the downloaded file. Defaults to False.
+            chunk_size (int, optional): Bytes requested at a time. Defaults to None, downloads.CHUNK_SIZE.
         """
         
         if file_name is None:
             file_name = self.file_name
             
+        destination_path = os.path.join(destination_folder, file_name)
+
         try:
-            request = self.service.files().get_media(fileId=self.file_id)
-            fh = io.BytesIO() 
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                print(F'Download {int(status.progress() * 100)}.')
-        
+            # Every chunk goes straight to disk, a partial file of the same version is continued
+            drive.download_media(self.file_id, destination_path, chunk_size=chunk_size,
+                                 on_progress=lambda received, total: print(F'Download {received}/{total} bytes.'))
         except errors.HttpError as error:
             print(F'An error occurred: {error}')
-            file = None
-            
-        destination_path = os.path.join(destination_folder, file_name)
-            
-        with io.open(destination_path, 'wb') as file:
-            fh.seek(0)
-            file.write(fh.read())
-            file.close()
-            
+            return
+
         if open_file:
             utils.start_file(path=destination_path)
         else:
@@ -224,12 +222,9 @@ class GoogleDriveFile:
         destination_path = os.path.join(destination_folder, 
                                         final_format['name']+final_format['extension'])  
 
-        data = self.service.files().export_media(fileId=self.file_id,
-                                                 mimeType=final_format['mime_type']).execute()
-
-        f = open(destination_path, 'wb')
-        f.write(data)
-        f.close()
+        request = self.service.files().export_media(fileId=self.file_id,
+                                                    mimeType=final_format['mime_type'])
+        downloads.download_to_file(request, destination_path, resume=False)
         
         if open_file:
             utils.start_file(path=destination_path)
@@ -12,19 +12,25 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/vperezb/google-api-support",
-    packages=find_packages(),
+    packages=find_packages(exclude=["test", "benchmarks"]),
+    package_data={"GoogleApiSupport": ["discovery/*.json"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: Public Domain",
         "Development Status :: 3 - Alpha",
     ],
     install_requires = [
-        "google-api-python-client",
+        # uploads and downloads resume through attributes of its 2.x requests, see test_uploads and test_downloads
+        "google-api-python-client>=2.0,<3",
         "httplib2",
-        "oauth2client",
+        "requests",
         "pandas",
         "google-cloud-storage",
         "google-auth",
+        "google-auth-httplib2",
         "google_auth_oauthlib"
     ],
+    extras_require={
+        "aio": ["httpx"],
+    },
 )
@@ -0,0 +1,113 @@
+import json
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+
+import pandas as pd
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import response_cache
+
+try:
+    import httpx
+    from GoogleApiSupport.aio import drive, slides, spreadsheets, transport
+except ImportError:
+    httpx = None
+
+
+@unittest.skipUnless(httpx, 'httpx is not installed')
+class TestAio(unittest.TestCase):
+
+    def run_with_server(self, coroutine_function, handler, api_name='drive'):
+        service = build_from_document(apis.get_discovery_json(api_name),
+                                      http=mock.Mock(credentials=AnonymousCredentials(), limiter=None))
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(transport, 'get_client', return_value=client), \
+                    mock.patch('GoogleApiSupport.auth.get_service', return_value=service):
+                try:
+                    return await coroutine_function()
+                finally:
+                    await client.aclose()
+
+        return asyncio.run(run())
+
+    def test_copy_file(self):
+        def handler(request):
+            self.assertEqual(request.method, 'POST')
+            self.assertEqual(request.url.path, '/drive/v3/files/template/copy')
+            self.assertEqual(json.loads(request.content), {'name': 'report'})
+            return httpx.Response(200, json={'id': 'new-file'})
+
+        new_file_id = self.run_with_server(lambda: drive.copy_file('template', 'report'), handler)
+        self.assertEqual(new_file_id, 'new-file')
+
+    def test_writes_drop_the_cached_reads(self):
+        response_cache.enable(freshness=60)
+        self.addCleanup(response_cache.disable)
+        handler = lambda request: httpx.Response(200, json={'id': 'new-file'})
+        with mock.patch.object(response_cache, 'invalidate') as invalidate:
+            self.run_with_server(lambda: drive.copy_file('template', 'report'), handler)
+        self.assertIn('/drive/v3/files/template/copy', invalidate.call_args[0][0])
+
+    def test_services_are_built_outside_the_event_loop(self):
+        threads = []
+
+        async def get_file_name():
+            with mock.patch('GoogleApiSupport.auth.get_service',
+                            side_effect=lambda *args, **kwargs: threads.append(threading.get_ident()) or service):
+                return await drive.get_file_name('file')
+
+        service = build_from_document(apis.get_discovery_json('drive'),
+                                      http=mock.Mock(credentials=AnonymousCredentials(), limiter=None))
+        handler = lambda request: httpx.Response(200, json={'name': 'report'})
+        self.assertEqual(self.run_with_server(get_file_name, handler), {'name': 'report'})
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_error_status_raises(self):
+        handler = lambda request: httpx.Response(404, json={'error': {'message': 'File not found'}})
+        with self.assertRaises(HttpError) as context:
+            self.run_with_server(lambda: drive.files_in_folder('folder'), handler)
+        self.assertEqual(context.exception.resp.status, 404)
+
+    def test_batch_text_replace(self):
+        def handler(request):
+            self.assertEqual(request.url.path, '/v1/presentations/deck:batchUpdate')
+            [replace] = json.loads(request.content)['requests']
+            self.assertEqual(replace['replaceAllText']['containsText']['text'], '{{name}}')
+            self.assertEqual(replace['replaceAllText']['replaceText'], 'Spain')
+            return httpx.Response(200, json={'replies': [{'replaceAllText': {'occurrencesChanged': 2}}]})
+
+        response = self.run_with_server(lambda: slides.batch_text_replace({'name': 'Spain'}, 'deck'), handler, 'slides')
+        self.assertEqual(response['replies'][0]['replaceAllText']['occurrencesChanged'], 2)
+
+    def test_pandas_to_sheet(self):
+        def handler(request):
+            self.assertEqual(request.url.path, '/v4/spreadsheets/sheet/values:batchUpdate')
+            [data] = json.loads(request.content)['data']
+            self.assertEqual(data, {'range': 'Data!A1', 'values': [['country', 'sales'], ['Spain', 3]]})
+            return httpx.Response(200, json={'totalUpdatedRows': 2})
+
+        df = pd.DataFrame({'country': ['Spain'], 'sales': [3]})
+        response = self.run_with_server(lambda: spreadsheets.pandas_to_sheet('sheet', 'Data', df), handler,
+                                        'spreadsheets')
+        self.assertEqual(response, {'totalUpdatedRows': 2})
+
+    def test_download_sheet_to_pandas(self):
+        def handler(request):
+            self.assertEqual(request.url.path, '/v4/spreadsheets/sheet/values/Data!A1:B3')
+            return httpx.Response(200, json={'values': [['country', 'sales'], ['Spain', '3'], ['France', '5']]})
+
+        df = self.run_with_server(lambda: spreadsheets.download_sheet_to_pandas('sheet', 'Data', 'A1:B3'), handler,
+                                  'spreadsheets')
+        self.assertEqual(df.to_dict('list'), {'country': ['Spain', 'France'], 'sales': ['3', '5']})
+
+
+if __name__ == '__main__':
+    unittest.main()
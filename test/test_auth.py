@@ -0,0 +1,85 @@
+import json
+import unittest
+import threading
+from unittest import mock
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import auth
+
+
+class TestServiceCache(unittest.TestCase):
+
+    def setUp(self):
+        auth.invalidate_service_cache()
+        self.credentials_path = mock.patch.object(auth, 'get_service_credentials_path', return_value='service.json')
+        self.credentials_path.start()
+        self.build = mock.patch.object(auth, '_build_service', side_effect=lambda *args: object())
+        self.build_service = self.build.start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        auth.invalidate_service_cache()
+
+    def test_reuses_service(self):
+        info = auth.service_cache_info()
+        first = auth.get_service('drive')
+        second = auth.get_service('drive')
+        self.assertIs(first, second)
+        self.assertEqual(self.build_service.call_count, 1)
+        self.assertEqual(auth.service_cache_info()['hits'] - info['hits'], 1)
+        self.assertEqual(auth.service_cache_info()['misses'] - info['misses'], 1)
+
+    def test_key_includes_scopes(self):
+        plain = auth.get_service('slides')
+        with_sheets = auth.get_service('slides', additional_apis=['sheets'])
+        self.assertIsNot(plain, with_sheets)
+
+    def test_invalidate(self):
+        first = auth.get_service('drive')
+        auth.invalidate_service_cache('drive')
+        self.assertIsNot(first, auth.get_service('drive'))
+
+    def test_ttl(self):
+        with mock.patch.object(auth, 'SERVICE_CACHE_TTL', 0):
+            first = auth.get_service('drive')
+            self.assertIsNot(first, auth.get_service('drive'))
+
+    def test_service_per_thread(self):
+        services = []
+        thread = threading.Thread(target=lambda: services.append(auth.get_service('drive')))
+        thread.start()
+        thread.join()
+        self.assertIsNot(services[0], auth.get_service('drive'))
+
+    def test_pool_size(self):
+        with mock.patch.object(auth, 'SERVICE_POOL_SIZE', 1):
+            first = auth.get_service('drive')
+            auth.get_service('slides')
+            self.assertEqual(auth.service_cache_info()['size'], 1)
+            self.assertIsNot(first, auth.get_service('drive'))
+
+
+class TestDiscoveryDocuments(unittest.TestCase):
+
+    def test_bundled_for_every_api(self):
+        for api_name, api_config in apis.api_configs.items():
+            document = apis.get_discovery_document(api_name)
+            self.assertEqual(document['name'], api_config['build'])
+            self.assertEqual(document['version'], api_config['version'])
+
+    def test_parsed_once(self):
+        self.assertIs(apis.get_discovery_document('sheets'), apis.get_discovery_document('spreadsheets'))
+
+    def test_building_services_leaves_the_shared_document_untouched(self):
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.http import HttpMockSequence
+
+        before = json.dumps(apis.get_discovery_document('drive'), sort_keys=True)
+        # The methods are described, and their parameters added to the document, on first use
+        service = build_from_document(auth._discovery_document('drive'), http=HttpMockSequence([]))
+        service.files().create(body={})
+        self.assertEqual(json.dumps(apis.get_discovery_document('drive'), sort_keys=True), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import json
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import batch
+from GoogleApiSupport import drive
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import transport
+from GoogleApiSupport import response_cache
+from test.test_execution import build_drive
+
+
+def batch_response(*parts):
+    """Multipart answer of the batch endpoint, `parts` being `(status, body)` in request order."""
+    content = ''
+    for index, (status, body) in enumerate(parts):
+        content += ('--batch_boundary\r\nContent-Type: application/http\r\nContent-ID: <response-x + {}>\r\n\r\n'
+                    'HTTP/1.1 {} OK\r\nContent-Type: application/json\r\n\r\n{}\r\n'
+                    .format(index, status, body if isinstance(body, str) else json.dumps(body)))
+    content += '--batch_boundary--'
+    return {'status': '200', 'content-type': 'multipart/mixed; boundary="batch_boundary"'}, content
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.sleep = mock.patch.object(execution.time, 'sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def use_service(self, responses):
+        service = build_drive(responses)
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        return service._http
+
+    def test_calls_share_one_request(self):
+        service = build_drive([batch_response((204, ''), (204, ''), (200, '{"id": "a"}'))])
+        http = service._http
+        service._http = transport.RateLimitedHttp(http, mock.Mock(**{'reserve.return_value': 0}))
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        with batch.Batch('drive') as drive_batch:
+            deletes = [drive.delete_file(file_id, batch=drive_batch) for file_id in ('a', 'b')]
+            read = drive_batch.add(service.files().get(fileId='a'))
+        self.assertEqual([delete.result() for delete in deletes], ['', ''])
+        self.assertEqual(read.result(), {'id': 'a'})
+        self.assertEqual(len(http.request_sequence), 1)
+        self.assertTrue(http.request_sequence[0][0].endswith('/batch/drive/v3'))
+        # One token per call of its quota, none for the request of the batch
+        self.assertEqual(sorted(service._http.limiter.reserve.call_args_list),
+                         sorted([mock.call(1, max_wait=None, method='GET'), mock.call(2, max_wait=None, method='POST')]))
+
+    def test_rate_limit_past_the_deadline(self):
+        service = build_drive([])
+        service._http = transport.RateLimitedHttp(service._http, mock.Mock(**{'reserve.return_value': 10}))
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        with deadline.timeout(1), batch.Batch('drive') as drive_batch:
+            delete = drive.delete_file('a', batch=drive_batch)
+        with self.assertRaises(deadline.DeadlineExceeded):
+            delete.result()
+        self.sleep.assert_not_called()
+
+    def test_writes_drop_the_cached_reads(self):
+        response_cache.enable(freshness=60)
+        self.addCleanup(response_cache.disable)
+        self.use_service([({'status': '200'}, '{"name": "report"}'), batch_response((204, '')),
+                          ({'status': '200'}, '{"name": "renamed"}')])
+        service = drive.auth.get_service('drive')
+        service.files().get(fileId='a').execute()
+        with batch.Batch('drive') as drive_batch:
+            drive_batch.add(service.files().update(fileId='a', body={'name': 'renamed'}))
+        self.assertEqual(service.files().get(fileId='a').execute(), {'name': 'renamed'})
+
+    def test_move_file(self):
+        http = self.use_service([({'status': '200'}, '{"parents": ["old"]}'), batch_response((200, {'id': 'a'}))])
+        with batch.Batch('drive') as drive_batch:
+            moved = drive.move_file('a', 'new', batch=drive_batch)
+        self.assertEqual(moved.result(), {'id': 'a'})
+        self.assertIn('addParents=new', http.request_sequence[1][2])
+
+    def test_retries_only_the_failed_calls(self):
+        http = self.use_service([batch_response((204, ''), (503, {})), batch_response((204, ''))])
+        drive_batch = batch.Batch('drive')
+        deletes = [drive.delete_file(file_id, batch=drive_batch) for file_id in ('a', 'b')]
+        drive_batch.execute()
+        self.assertEqual([delete.result() for delete in deletes], ['', ''])
+        self.assertEqual(len(http.request_sequence), 2)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_does_not_replay_create_after_server_error(self):
+        self.use_service([batch_response((500, {}))])
+        with batch.Batch('drive') as drive_batch:
+            grant = drive.insert_permission('file', 'user', 'reader', 'someone@example.com', batch=drive_batch)
+        with self.assertRaises(HttpError):
+            grant.result()
+        self.sleep.assert_not_called()
+
+    def test_copy_permissions_in_one_batch(self):
+        permissions = [{'type': 'user', 'role': 'reader', 'emailAddress': 'a@example.com'},
+                       {'type': 'anyone', 'role': 'reader'}]
+        http = self.use_service([batch_response((200, {'permissions': permissions}), (200, {'permissions': []})),
+                                 batch_response((200, {'id': 'p1'}), (200, {'id': 'p2'}))])
+        grants = drive.copy_permissions('source', 'target')
+        self.assertEqual([(grant.status, grant.result) for grant in grants],
+                         [('created', {'id': 'p1'}), ('created', {'id': 'p2'})])
+        self.assertEqual(len(http.request_sequence), 2)
+
+    def test_copy_permissions_sends_only_missing_grants(self):
+        start = [{'type': 'user', 'role': 'writer', 'emailAddress': 'A@example.com'},
+                 {'type': 'user', 'role': 'writer', 'emailAddress': 'b@example.com'},
+                 {'type': 'domain', 'role': 'reader', 'domain': 'example.com'},
+                 {'type': 'user', 'role': 'owner', 'emailAddress': 'owner@example.com'}]
+        end = [{'id': 'e1', 'type': 'user', 'role': 'owner', 'emailAddress': 'a@example.com'},
+               {'id': 'e2', 'type': 'user', 'role': 'reader', 'emailAddress': 'b@example.com'},
+               {'id': 'e3', 'type': 'domain', 'role': 'reader', 'domain': 'example.com'}]
+        http = self.use_service([batch_response((200, {'permissions': start}), (200, {'permissions': end})),
+                                 batch_response((200, {'id': 'p1'}), (403, {'error': {'code': 403}}))])
+        grants = drive.copy_permissions('source', 'target')
+
+        self.assertEqual([grant.status for grant in grants], ['existing', 'created', 'existing', 'failed'])
+        self.assertEqual(grants[0].result['id'], 'e1')
+        self.assertEqual(grants[3].permission['role'], 'writer')
+        self.assertEqual(grants[3].error.resp.status, 403)
+        inserts = http.request_sequence[1][2]
+        self.assertEqual(inserts.count('POST /drive/v3/files/target/permissions'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
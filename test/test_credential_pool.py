@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import drive
+from GoogleApiSupport import rate_limit
+from GoogleApiSupport import credential_pool
+from test.test_batch import batch_response
+from test.test_execution import build_drive
+
+
+class TestCredentialPool(unittest.TestCase):
+
+    def setUp(self):
+        auth.invalidate_service_cache()
+        rate_limit.reset()
+        mock.patch.object(auth, 'get_service_credentials_path', side_effect=lambda path=None: path).start()
+        self.build_service = mock.patch.object(auth, '_build_service', side_effect=lambda *args: args).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        auth.use_credential_pool(None)
+        auth.invalidate_service_cache()
+        rate_limit.reset()
+
+    def test_round_robin(self):
+        auth.use_credential_pool(['first.json', ('second.json', 'user@example.com')])
+        built = [auth.get_service('drive') for _ in range(4)]
+        self.assertEqual([(args[1], args[4]) for args in built],
+                         [('first.json', None), ('second.json', 'user@example.com')] * 2)
+        # Every member keeps its own cached service
+        self.assertEqual(self.build_service.call_count, 2)
+
+    def test_single_member_per_block(self):
+        auth.use_credential_pool(['first.json', 'second.json'])
+        with auth.single_pool_member():
+            built = [auth.get_service('drive') for _ in range(2)]
+            with auth.single_pool_member():
+                built.append(auth.get_service('slides'))
+        built.append(auth.get_service('drive'))
+        self.assertEqual([args[1] for args in built], ['first.json'] * 3 + ['second.json'])
+
+    def test_copy_file_copies_and_shares_as_one_member(self):
+        members = []
+
+        def build_service(api_name, service_credentials_path, *args):
+            members.append(service_credentials_path)
+            return build_drive([({'status': '200'}, '{"id": "copy"}'),
+                                batch_response((200, {'permissions': []}), (200, {'permissions': []}))])
+
+        self.build_service.side_effect = build_service
+        auth.use_credential_pool(['first.json', 'second.json'])
+        self.assertEqual(drive.copy_file('source', 'Copy', transfer_permissions=True), 'copy')
+        self.assertEqual(members, ['first.json'])
+
+    def test_explicit_credentials_skip_the_pool(self):
+        auth.use_credential_pool(['first.json', 'second.json'])
+        self.assertEqual(auth.get_service('drive', service_credentials_path='other.json')[1], 'other.json')
+
+    def test_least_loaded_takes_the_member_with_more_quota_left(self):
+        auth.use_credential_pool(['first.json', 'second.json'], strategy='least_loaded')
+        busy = rate_limit.get_limiter('slides', identity=credential_pool.identity('first.json'))
+        busy.reserve(busy.write.capacity + 5, method='POST')
+        self.assertEqual([auth.get_service('slides')[1] for _ in range(2)], ['second.json', 'second.json'])
+
+    def test_members_have_separate_limiters(self):
+        first = rate_limit.get_limiter('drive', identity=credential_pool.identity('key.json'))
+        delegated = rate_limit.get_limiter('drive', identity=credential_pool.identity('key.json', 'user@example.com'))
+        self.assertIsNot(first, delegated)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            auth.use_credential_pool(['first.json'], strategy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
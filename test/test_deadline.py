@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from GoogleApiSupport import transport
+from test.test_execution import build_drive
+
+
+class TestDeadline(unittest.TestCase):
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_nested_deadlines_keep_the_earliest(self):
+        self.assertIsNone(deadline.remaining())
+        with deadline.timeout(10):
+            with deadline.timeout(60):
+                self.assertLessEqual(deadline.remaining(), 10)
+            with deadline.timeout(1):
+                self.assertLessEqual(deadline.remaining(), 1)
+        self.assertIsNone(deadline.remaining())
+
+    def test_retry_ending_after_the_deadline_is_not_started(self):
+        sleep = mock.patch.object(execution.time, 'sleep').start()
+        mock.patch.object(execution.random, 'uniform', return_value=5).start()
+        service = build_drive([({'status': '503'}, ''), ({'status': '200'}, '{}')])
+        with self.assertRaises(deadline.DeadlineExceeded) as raised:
+            service.files().get(fileId='file').execute(timeout=2)
+        self.assertIsInstance(raised.exception.__cause__, HttpError)
+        self.assertIsInstance(raised.exception, TimeoutError)
+        sleep.assert_not_called()
+
+    def test_default_timeout_of_the_api(self):
+        mock.patch.dict(deadline.DEFAULT_TIMEOUTS, {'drive': 0}).start()
+        service = build_drive([({'status': '200'}, '{}')])
+        with self.assertRaises(deadline.DeadlineExceeded):
+            service.files().get(fileId='file').execute()
+
+    def test_socket_timeout_is_the_time_left(self):
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(status_code=200, reason='OK', content=b'{}', headers={})
+        with deadline.timeout(5):
+            transport.SessionHttp(session).request('https://example.com')
+        self.assertLessEqual(session.request.call_args.kwargs['timeout'], 5)
+
+    def test_rate_limit_wait_beyond_the_deadline(self):
+        limiter = mock.Mock()
+        limiter.reserve.return_value = 30
+        http = transport.RateLimitedHttp(mock.Mock(), limiter)
+        with deadline.timeout(1), self.assertRaises(deadline.DeadlineExceeded):
+            http.request('https://example.com')
+        http.http.request.assert_not_called()
+        # The bucket is not charged for a request that is not sent
+        self.assertLessEqual(limiter.reserve.call_args.kwargs['max_wait'], 1)
+
+    def test_deadline_follows_asyncio_tasks(self):
+        async def remaining_in_task():
+            return await asyncio.create_task(asyncio.sleep(0, deadline.remaining()))
+
+        with deadline.timeout(5):
+            self.assertLessEqual(asyncio.run(remaining_in_task()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
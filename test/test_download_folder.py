@@ -0,0 +1,97 @@
+import os
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import downloads
+from test.test_drive_index import FakeDrive, folder
+
+MODIFIED = '2024-05-01T10:00:00.000Z'
+
+
+def binary(file_id, name, parent, content):
+    return {'id': file_id, 'name': name, 'mimeType': 'text/csv', 'parents': [parent], 'size': str(len(content)),
+            'md5Checksum': hashlib.md5(content).hexdigest(), 'modifiedTime': MODIFIED}
+
+
+def workspace(file_id, name, parent, mime_type):
+    return {'id': file_id, 'name': name, 'mimeType': mime_type, 'parents': [parent], 'modifiedTime': MODIFIED}
+
+
+class TestDownloadFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.drive = FakeDrive([
+            binary('data', 'data.csv', 'root', b'a,b\n1,2\n'),
+            folder('reports', 'Reports', 'root'),
+            workspace('doc', 'Summary', 'reports', 'application/vnd.google-apps.document'),
+            workspace('form', 'Survey', 'reports', 'application/vnd.google-apps.form'),
+        ])
+        mock.patch.object(drive, 'iter_files', self.drive.iter_files).start()
+        self.service = mock.patch('GoogleApiSupport.auth.get_service').start().return_value
+        self.downloaded = []
+        mock.patch.object(downloads, 'download_to_file', side_effect=self.fake_download).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.folder.cleanup()
+
+    def fake_download(self, request, path, chunk_size=None, resume=True, version=None):
+        self.downloaded.append(os.path.relpath(path, self.folder.name))
+        content = b'a,b\n1,2\n' if path.endswith('.csv') else b'docx'
+        with open(path, 'wb') as local_file:
+            local_file.write(content)
+        return len(content)
+
+    def download(self):
+        report = downloads.download_folder('root', self.folder.name, max_bytes_in_flight=1)
+        return {os.path.relpath(result.path, self.folder.name): result.status for result in report.results}
+
+    def test_exports_workspace_files_and_downloads_the_others(self):
+        self.assertEqual(self.download(), {'data.csv': 'downloaded', os.path.join('Reports', 'Summary.docx'): 'exported',
+                                           os.path.join('Reports', 'Survey'): 'unsupported'})
+        self.service.files().export_media.assert_called_once_with(
+            fileId='doc', mimeType=downloads.EXPORT_FORMATS['application/vnd.google-apps.document'][0])
+        self.service.files().get_media.assert_called_once_with(fileId='data', supportsAllDrives=True)
+
+    def test_skips_files_up_to_date(self):
+        self.download()
+        self.downloaded.clear()
+        self.assertEqual(set(self.download().values()), {'skipped', 'unsupported'})
+        self.assertEqual(self.downloaded, [])
+
+    def test_matching_checksum_is_up_to_date(self):
+        self.download()
+        os.utime(os.path.join(self.folder.name, 'data.csv'), (0, 0))
+        self.assertEqual(self.download()['data.csv'], 'skipped')
+
+    def test_changed_files_are_downloaded_again(self):
+        self.download()
+        with open(os.path.join(self.folder.name, 'data.csv'), 'wb') as local_file:
+            local_file.write(b'a,b\n3,4\n')
+        self.assertEqual(self.download()['data.csv'], 'downloaded')
+
+    def test_names_stay_inside_the_destination(self):
+        self.drive.files += [folder('up', '..', 'root'), binary('escape', 'data.csv', 'up', b'a,b\n1,2\n'),
+                             binary('slash', os.sep.join(['..', 'x.csv']), 'root', b'a,b\n1,2\n')]
+        results = self.download()
+        self.assertEqual(results[os.path.join('__', 'data.csv')], 'downloaded')
+        self.assertEqual(results['.._x.csv'], 'downloaded')
+        self.assertTrue(all(not path.startswith('..' + os.sep) for path in self.downloaded))
+
+
+class TestByteBudget(unittest.TestCase):
+
+    def test_large_files_take_the_whole_budget(self):
+        budget = downloads._ByteBudget(10)
+        self.assertEqual(budget.acquire(25), 10)
+        budget.release(10)
+        self.assertEqual(budget.acquire(4), 4)
+        self.assertEqual(budget.used, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import downloads
+from GoogleApiSupport import execution
+from test.test_execution import build_drive
+
+CONTENT = b'0123456789'
+METADATA = {'status': '200'}, '{"md5Checksum": "v2"}'
+
+
+def chunk(start, end):
+    return {'status': '206', 'content-range': f'bytes {start}-{end - 1}/{len(CONTENT)}'}, CONTENT[start:end]
+
+
+class TestClientInternals(unittest.TestCase):
+    """`download` resumes partial files through an attribute googleapiclient does not document."""
+
+    def test_downloader_progress_attribute(self):
+        from googleapiclient.http import MediaIoBaseDownload
+
+        downloader = MediaIoBaseDownload(io.BytesIO(), build_drive([]).files().get_media(fileId='file'))
+        self.assertEqual(getattr(downloader, '_progress', None), 0,
+                         'MediaIoBaseDownload._progress is gone, downloads.download cannot resume '
+                         'with this google-api-python-client')
+
+
+class TestStreamingDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'file.bin')
+        mock.patch.object(execution.time, 'sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.folder.cleanup()
+
+    def use_service(self, responses):
+        service = build_drive(responses)
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        return service._http
+
+    def sent_ranges(self, http):
+        return [headers['range'] for uri, _, _, headers in http.request_sequence if 'alt=media' in uri]
+
+    def write_partial(self, content, version):
+        with open(self.path + '.part', 'wb') as partial:
+            partial.write(content)
+        with open(self.path + '.part.version', 'w') as version_file:
+            version_file.write(version)
+
+    def test_downloads_in_chunks_to_a_file(self):
+        http = self.use_service([METADATA, chunk(0, 4), ({'status': '503'}, ''), chunk(4, 8), chunk(8, 10)])
+        progress = []
+        size = drive.download_media('file', self.path, chunk_size=4,
+                                    on_progress=lambda received, total: progress.append((received, total)))
+        self.assertEqual(size, len(CONTENT))
+        with open(self.path, 'rb') as downloaded:
+            self.assertEqual(downloaded.read(), CONTENT)
+        self.assertEqual(self.sent_ranges(http), ['bytes=0-3', 'bytes=4-7', 'bytes=4-7', 'bytes=8-11'])
+        self.assertEqual(progress, [(4, 10), (8, 10), (10, 10)])
+        self.assertEqual(os.listdir(self.folder.name), ['file.bin'])
+
+    def test_continues_a_partial_file(self):
+        self.write_partial(CONTENT[:6], 'v2')
+        http = self.use_service([METADATA, chunk(6, 10)])
+        drive.download_media('file', self.path, chunk_size=4)
+        with open(self.path, 'rb') as downloaded:
+            self.assertEqual(downloaded.read(), CONTENT)
+        self.assertEqual(self.sent_ranges(http), ['bytes=6-9'])
+        self.assertEqual(os.listdir(self.folder.name), ['file.bin'])
+
+    def test_partial_file_of_another_version_starts_over(self):
+        self.write_partial(b'abcdef', 'v1')
+        http = self.use_service([METADATA, chunk(0, 10)])
+        drive.download_media('file', self.path)
+        with open(self.path, 'rb') as downloaded:
+            self.assertEqual(downloaded.read(), CONTENT)
+        self.assertEqual(self.sent_ranges(http), [f'bytes=0-{downloads.CHUNK_SIZE - 1}'])
+
+    def test_partial_file_already_complete(self):
+        self.write_partial(CONTENT, 'v2')
+        self.use_service([METADATA, ({'status': '416', 'content-range': f'bytes */{len(CONTENT)}'}, '')])
+        self.assertEqual(drive.download_media('file', self.path), len(CONTENT))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_streams_to_any_sink(self):
+        self.use_service([chunk(0, 10)])
+        sink = io.BytesIO()
+        drive.download_media('file', sink)
+        self.assertEqual(sink.getvalue(), CONTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import deadline
+from GoogleApiSupport import execution
+from test.test_execution import build_drive
+
+
+class TestErrors(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(execution.time, 'sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def use_service(self, responses):
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=build_drive(responses)).start()
+
+    def test_permission_errors_reach_the_caller(self):
+        self.use_service([({'status': '404'}, '{}'), ({'status': '400'}, '{}')])
+        with self.assertRaises(HttpError):
+            drive.retrieve_permissions('file')
+        with self.assertRaises(HttpError):
+            drive.insert_permission('file', 'user', 'reader', 'someone@example.com')
+
+    def test_upload_deadline_reaches_the_caller(self):
+        mock.patch.dict(deadline.DEFAULT_TIMEOUTS, {'drive': 0}).start()
+        self.use_service([])
+        with self.assertRaises(deadline.DeadlineExceeded):
+            drive.upload_file('report.csv', ['folder'], buffer=io.BytesIO(b'a,b'), mime_type='text/csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
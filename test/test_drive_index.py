@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import drive_index
+
+FOLDER = drive.FOLDER_MIME_TYPE
+
+
+def folder(file_id, name, parent):
+    return {'id': file_id, 'name': name, 'mimeType': FOLDER, 'parents': [parent]}
+
+
+def document(file_id, name, parent):
+    return {'id': file_id, 'name': name, 'mimeType': 'application/pdf', 'parents': [parent]}
+
+
+class FakeDrive:
+    """Answers the listing queries of `walk` from a list of files."""
+
+    def __init__(self, files):
+        self.files = files
+        self.listed = []
+
+    def iter_files(self, q, fields=None, **kwargs):
+        parent_id = q.split("'")[1]
+        self.listed.append(parent_id)
+        return iter([file for file in self.files if parent_id in file['parents']])
+
+
+class TestDriveIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.drive = FakeDrive([
+            folder('reports', 'Reports', 'root'),
+            folder('spain', 'Spain', 'reports'),
+            folder('france', 'France', 'reports'),
+            document('january', 'January.pdf', 'spain'),
+            document('readme', 'README.pdf', 'root'),
+        ])
+        mock.patch.object(drive, 'iter_files', self.drive.iter_files).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_walk_lists_every_folder_once(self):
+        paths = [path for path, _ in drive_index.walk('root', max_workers=2)]
+        self.assertEqual(sorted(paths), ['README.pdf', 'Reports', 'Reports/France', 'Reports/Spain',
+                                         'Reports/Spain/January.pdf'])
+        self.assertEqual(sorted(self.drive.listed), ['france', 'reports', 'root', 'spain'])
+        # Breadth first: the root is listed before its folders
+        self.assertEqual(self.drive.listed[0], 'root')
+
+    def test_resolves_paths_offline(self):
+        index = drive_index.DriveIndex('root').crawl()
+        calls = len(self.drive.listed)
+        self.assertEqual(index.resolve('Reports/Spain/January.pdf'), 'january')
+        self.assertEqual(index.resolve('/Reports/France/'), 'france')
+        self.assertIsNone(index.resolve('Reports/Italy'))
+        self.assertEqual(index.path('spain'), 'Reports/Spain')
+        self.assertEqual(len(self.drive.listed), calls)
+
+    def test_moving_a_folder_moves_what_is_below_it(self):
+        index = drive_index.DriveIndex('root').crawl()
+        index.update(dict(folder('spain', 'España', 'root')))
+        self.assertEqual(index.resolve('España/January.pdf'), 'january')
+        self.assertIsNone(index.resolve('Reports/Spain/January.pdf'))
+        self.assertEqual([file['id'] for file in index.children('Reports')], ['france'])
+
+    def test_files_moved_out_of_the_tree_are_removed(self):
+        index = drive_index.DriveIndex('root').crawl()
+        index.update(folder('reports', 'Reports', 'elsewhere'))
+        self.assertIsNone(index.resolve('Reports/Spain'))
+        self.assertIsNone(index.get('january'))
+        self.assertEqual(len(index), 1)
+
+    def test_crawl_refreshes_a_subtree(self):
+        index = drive_index.DriveIndex('root').crawl()
+        self.drive.files.append(document('february', 'February.pdf', 'spain'))
+        self.drive.listed.clear()
+        index.crawl('Reports/Spain')
+        self.assertEqual(self.drive.listed, ['spain'])
+        self.assertEqual(index.resolve('Reports/Spain/February.pdf'), 'february')
+        self.assertEqual(index.resolve('Reports/Spain/January.pdf'), 'january')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import drive_sync
+from test.test_drive_index import FakeDrive, folder, document
+from test.test_execution import build_drive
+
+
+def changes(*items, next_page=None, new_start='2'):
+    response = {'changes': [{'changeType': 'file', 'fileId': file['id'], 'file': file} if isinstance(file, dict)
+                            else {'changeType': 'file', 'fileId': file, 'removed': True} for file in items]}
+    if next_page:
+        response['nextPageToken'] = next_page
+    else:
+        response['newStartPageToken'] = new_start
+    return {'status': '200'}, json.dumps(response)
+
+
+class TestDriveSync(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.folder.name, 'sync.json')
+        self.drive = FakeDrive([folder('reports', 'Reports', 'root'), document('january', 'January.pdf', 'reports')])
+        mock.patch.object(drive, 'iter_files', self.drive.iter_files).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.folder.cleanup()
+
+    def use_service(self, responses):
+        service = build_drive(responses)
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        return service._http
+
+    def test_applies_the_changes_of_the_watched_folder(self):
+        http = self.use_service([
+            ({'status': '200'}, json.dumps({'startPageToken': '1'})),
+            changes(document('february', 'February.pdf', 'reports'),
+                    document('elsewhere', 'Other.pdf', 'unwatched'),
+                    next_page='1b'),
+            changes(document('january', 'January 2024.pdf', 'reports'), 'reports'),
+        ])
+        sync = drive_sync.DriveSync('root')
+        self.assertEqual(sync.poll(), [])
+        self.assertEqual(sync.index.resolve('Reports/January.pdf'), 'january')
+
+        found = [(change.kind, change.path) for change in sync.poll()]
+        self.assertEqual(found, [('added', 'Reports/February.pdf'), ('moved', 'Reports/January 2024.pdf'),
+                                 ('removed', 'Reports')])
+        self.assertEqual(len(sync.index), 0)
+        self.assertEqual(sync.page_token, '2')
+        query = parse_qs(urlparse(http.request_sequence[1][0]).query)
+        self.assertEqual(query['pageToken'], ['1'])
+        self.assertIn('changes(changeType,fileId,removed,file(', query['fields'][0])
+
+    def test_later_runs_continue_from_the_saved_state(self):
+        self.use_service([({'status': '200'}, json.dumps({'startPageToken': '1'}))])
+        drive_sync.DriveSync('root', state_path=self.state_path).poll()
+        self.drive.listed.clear()
+
+        http = self.use_service([changes(document('february', 'February.pdf', 'reports'))])
+        sync = drive_sync.DriveSync('root', state_path=self.state_path)
+        self.assertEqual([change.path for change in sync.poll()], ['Reports/February.pdf'])
+        self.assertEqual(sync.index.resolve('Reports/January.pdf'), 'january')
+        self.assertEqual(len(http.request_sequence), 1)
+        self.assertEqual(self.drive.listed, [])
+
+    def test_folder_moved_in_is_crawled(self):
+        self.drive.files.append(document('old', 'Old.pdf', 'archive'))
+        self.use_service([({'status': '200'}, json.dumps({'startPageToken': '1'})),
+                          changes(folder('archive', 'Archive', 'root'))])
+        sync = drive_sync.DriveSync('root')
+        sync.poll()
+        self.assertEqual([change.kind for change in sync.poll()], ['added'])
+        self.assertEqual(sync.index.resolve('Archive/Old.pdf'), 'old')
+
+    def test_drive_changes_are_skipped(self):
+        status, body = changes(document('february', 'February.pdf', 'reports'))
+        response = json.loads(body)
+        response['changes'].insert(0, {'changeType': 'drive', 'driveId': 'shared', 'drive': {'name': 'Team'}})
+        self.use_service([({'status': '200'}, json.dumps({'startPageToken': '1'})), (status, json.dumps(response))])
+        sync = drive_sync.DriveSync('root')
+        sync.poll()
+        self.assertEqual([change.path for change in sync.poll()], ['Reports/February.pdf'])
+        self.assertEqual(sync.page_token, '2')
+
+
+if __name__ == '__main__':
+    unittest.main()
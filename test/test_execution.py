@@ -0,0 +1,62 @@
+import json
+import unittest
+from unittest import mock
+
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import execution
+
+
+def build_drive(responses):
+    return build_from_document(apis.get_discovery_json('drive'), http=HttpMockSequence(responses),
+                               requestBuilder=execution.ApiRequest)
+
+
+class TestRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.sleep = mock.patch.object(execution.time, 'sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_retries_server_error_of_idempotent_request(self):
+        service = build_drive([({'status': '503'}, ''), ({'status': '200'}, '{"name": "report"}')])
+        self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'report'})
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_does_not_replay_create_after_server_error(self):
+        service = build_drive([({'status': '500'}, ''), ({'status': '200'}, '{"id": "copy"}')])
+        with self.assertRaises(HttpError):
+            service.files().copy(fileId='file', body={}).execute()
+        self.sleep.assert_not_called()
+
+    def test_replays_create_when_rate_limited(self):
+        rate_limited = json.dumps({'error': {'errors': [{'reason': 'userRateLimitExceeded'}]}})
+        service = build_drive([({'status': '403'}, rate_limited), ({'status': '200'}, '{"id": "copy"}')])
+        self.assertEqual(service.files().copy(fileId='file', body={}).execute(), {'id': 'copy'})
+
+    def test_honors_retry_after(self):
+        service = build_drive([({'status': '429', 'retry-after': '7'}, ''), ({'status': '200'}, '{}')])
+        service.files().get(fileId='file').execute()
+        self.assertGreaterEqual(self.sleep.call_args[0][0], 7)
+
+    def test_client_errors_are_not_retried(self):
+        service = build_drive([({'status': '404'}, '')])
+        with self.assertRaises(HttpError):
+            service.files().get(fileId='file').execute()
+        self.sleep.assert_not_called()
+
+    def test_total_time_cap(self):
+        with mock.patch.object(execution, 'MAX_RETRY_TIME', 5):
+            service = build_drive([({'status': '429', 'retry-after': '60'}, '')])
+            with self.assertRaises(HttpError):
+                service.files().get(fileId='file').execute()
+        self.sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
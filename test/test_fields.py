@@ -0,0 +1,90 @@
+import json
+import unittest
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import HttpMockSequence
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import execution
+from GoogleApiSupport import drive
+from GoogleApiSupport import slides
+from GoogleApiSupport import spreadsheets
+
+
+class TestDefaultFieldMasks(unittest.TestCase):
+
+    def mock_service(self, api_name, body):
+        self.http = HttpMockSequence([({'status': '200'}, json.dumps(body))])
+        service = build_from_document(apis.get_discovery_json(api_name), http=self.http,
+                                      requestBuilder=execution.ApiRequest)
+        patcher = mock.patch('GoogleApiSupport.auth.get_service', return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent_fields(self):
+        uri = self.http.request_sequence[0][0]
+        return parse_qs(urlparse(uri).query).get('fields')
+
+    def test_sheet_names_only_ask_for_titles(self):
+        self.mock_service('spreadsheets', {'sheets': [{'properties': {'title': 'Sheet1'}}]})
+        self.assertEqual(spreadsheets.get_sheet_names('spreadsheet'), ['Sheet1'])
+        self.assertEqual(self.sent_fields(), ['sheets.properties.title'])
+
+    def test_get_info_still_returns_the_whole_resource_by_default(self):
+        self.mock_service('spreadsheets', {'spreadsheetId': 'spreadsheet'})
+        spreadsheets.get_info('spreadsheet')
+        self.assertIsNone(self.sent_fields())
+
+    def test_presentation_notes_from_partial_response(self):
+        text_elements = [{'endIndex': 1}, {'endIndex': 6, 'textRun': {'content': 'Notes'}}]
+        notes_page = {'pageElements': [{'shape': {'shapeType': 'TEXT_BOX', 'text': {'textElements': text_elements}}}]}
+        self.mock_service('slides', {'slides': [{'objectId': 'p1', 'slideProperties': {'notesPage': notes_page}}]})
+        self.assertEqual(slides.get_presentation_notes('presentation'), {'p1': 'Notes'})
+        self.assertEqual(self.sent_fields(), [slides.NOTES_FIELDS])
+
+    def test_get_page_fetches_only_that_page(self):
+        self.mock_service('slides', {'objectId': 'p1'})
+        self.assertEqual(slides.get_page('presentation', 'p1', fields='objectId'), {'objectId': 'p1'})
+        self.assertIn('/presentations/presentation/pages/p1', self.http.request_sequence[0][0])
+        self.assertEqual(self.sent_fields(), ['objectId'])
+
+    def test_sheet_values_mask_can_be_overridden(self):
+        self.mock_service('spreadsheets', {'range': 'Data!A1:B2', 'values': [['a'], ['1']]})
+        df = spreadsheets.download_sheet_to_pandas('spreadsheet', 'Data', fields='range,values')
+        self.assertEqual(list(df['a']), ['1'])
+        self.assertEqual(self.sent_fields(), ['range,values'])
+
+    def test_files_in_folder_mask_can_be_overridden(self):
+        self.mock_service('drive', {'files': [{'id': 'file'}]})
+        self.assertEqual(drive.files_in_folder('folder', fields='files(id)'), [{'id': 'file'}])
+        self.assertEqual(self.sent_fields(), ['nextPageToken,files(id)'])
+
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        pages = [{'files': [{'id': 'first'}, {'id': 'second'}], 'nextPageToken': 'page2'}, {'files': [{'id': 'third'}]}]
+        self.http = HttpMockSequence([({'status': '200'}, json.dumps(page)) for page in pages])
+        service = build_from_document(apis.get_discovery_json('drive'), http=self.http,
+                                      requestBuilder=execution.ApiRequest)
+        patcher = mock.patch('GoogleApiSupport.auth.get_service', return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_follows_next_page_token(self):
+        self.assertEqual([file['id'] for file in drive.files_in_folder('folder')], ['first', 'second', 'third'])
+        first, second = [parse_qs(urlparse(request[0]).query) for request in self.http.request_sequence]
+        self.assertEqual(first['pageSize'], ['1000'])
+        self.assertNotIn('pageToken', first)
+        self.assertEqual(second['pageToken'], ['page2'])
+
+    def test_yields_files_as_pages_arrive(self):
+        files = drive.iter_files_in_folder('folder')
+        self.assertEqual(next(files)['id'], 'first')
+        self.assertEqual(len(self.http.request_sequence), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
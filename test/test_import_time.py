@@ -0,0 +1,35 @@
+import sys
+import json
+import unittest
+import subprocess
+
+# Modules of the package that only depend on the standard library when imported.
+MODULES = ['apis', 'auth', 'drive', 'slides', 'spreadsheets', 'sheets', 'storage', 'instrumentation', 'rate_limit']
+HEAVY_MODULES = ['pandas', 'googleapiclient', 'google_auth_oauthlib', 'google.cloud.storage', 'requests', 'httplib2',
+                 'google.oauth2', 'oauth2client']
+# Generous bound, importing the package takes a few milliseconds, the google client libraries hundreds.
+MAX_IMPORT_SECONDS = 0.1
+
+IMPORT_SCRIPT = f"""
+import sys, time, json
+start = time.perf_counter()
+for module in {MODULES!r}:
+    __import__('GoogleApiSupport.' + module)
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_is_cheap_and_side_effect_free(self):
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], capture_output=True, text=True, check=True)
+        measured = json.loads(result.stdout)
+
+        self.assertEqual(measured['heavy'], [])
+        self.assertEqual(result.stderr, '')
+        self.assertLess(measured['seconds'], MAX_IMPORT_SECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import instrumentation
+from test.test_execution import build_drive
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.records = []
+        instrumentation.add_sink(self.records.append)
+        self.histogram = instrumentation.add_sink(instrumentation.PrometheusSink())
+        mock.patch('GoogleApiSupport.execution.time.sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        instrumentation.remove_sink(self.records.append)
+        instrumentation.remove_sink(self.histogram)
+
+    def test_records_call(self):
+        service = build_drive([({'status': '503'}, ''), ({'status': '200'}, '{"id": "copy"}')])
+        service.files().get(fileId='file').execute()
+
+        record, = self.records
+        self.assertEqual((record.api, record.method), ('drive', 'files.get'))
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.response_bytes, len('{"id": "copy"}'))
+        self.assertEqual(record.retries, 1)
+
+    def test_records_failed_call(self):
+        service = build_drive([({'status': '404'}, 'missing')])
+        with self.assertRaises(HttpError):
+            service.files().get(fileId='file').execute()
+        self.assertEqual(self.records[0].status, 404)
+
+    def test_prometheus_exposition(self):
+        service = build_drive([({'status': '200'}, '{}')])
+        service.files().copy(fileId='file', body={'name': 'copy'}).execute()
+
+        text = self.histogram.render()
+        self.assertIn('google_api_requests_total{api="drive",method="files.copy",status="200"} 1', text)
+        self.assertIn('google_api_request_duration_seconds_count{api="drive",method="files.copy"} 1', text)
+        self.assertIn('google_api_request_bytes_total{api="drive",method="files.copy"} 16', text)
+        self.assertEqual(self.histogram.quantile('drive', 'files.copy', 0.5), 0.025)
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_flags_repeated_requests(self):
+        service = build_drive([({'status': '200'}, '{"id": "file"}')] * 3)
+        reports = []
+        with instrumentation.trace(report=reports.append) as calls:
+            for _ in range(2):
+                service.files().get(fileId='file').execute()
+            service.files().get(fileId='other').execute()
+
+        self.assertEqual(len(calls.calls), 3)
+        (record, count, origins), = calls.duplicates()
+        self.assertEqual((record.http_method, count), ('GET', 2))
+        self.assertIn('/files/file', record.uri)
+        self.assertTrue(all(origin.startswith(f'{__name__}.test_flags_repeated_requests:') for origin in origins))
+        self.assertIn('3 api calls', reports[0])
+        self.assertIn('1 of them repeated', reports[0])
+        self.assertFalse(instrumentation.enabled())
+
+    def test_same_url_with_other_body_is_not_repeated(self):
+        service = build_drive([({'status': '200'}, '{}')] * 2)
+        with instrumentation.trace(report=None) as calls:
+            service.files().copy(fileId='file', body={'name': 'first'}).execute()
+            service.files().copy(fileId='file', body={'name': 'second'}).execute()
+        self.assertEqual(calls.duplicates(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
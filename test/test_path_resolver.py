@@ -0,0 +1,125 @@
+import json
+import threading
+import unittest
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+
+from GoogleApiSupport import drive
+from GoogleApiSupport import path_resolver
+from test.test_execution import build_drive
+
+trash_file = drive.trash_file
+
+
+class FakeDrive:
+    """Folders of a drive answering the queries of the resolver."""
+
+    def __init__(self, folders=()):
+        self.folders = list(folders)
+        self.queries = []
+        self.trashed = []
+
+    def iter_files(self, q, fields=None, **kwargs):
+        self.queries.append(q)
+        name = q.split("name='")[1].split("'")[0]
+        parent = q.split(" and '")[1].split("'")[0] if " and '" in q else None
+        return iter([{'id': folder_id} for folder_id, folder_name, folder_parent in self.folders
+                     if folder_name == name and parent in (None, folder_parent)])
+
+    def create_folder(self, name, parent_folder):
+        folder_id = f'created-{name}'
+        self.folders.append((folder_id, name, parent_folder[0]))
+        return {'id': folder_id}
+
+    def trash_file(self, file_id, **kwargs):
+        self.trashed.append(file_id)
+
+
+class TestPathResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.drive = FakeDrive([('reports', 'Reports', 'drive'), ('2024', '2024', 'reports')])
+        for name in ('iter_files', 'create_folder', 'trash_file'):
+            mock.patch.object(drive, name, getattr(self.drive, name)).start()
+        self.resolver = path_resolver.PathResolver('drive')
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_caches_resolved_prefixes(self):
+        self.assertEqual(self.resolver.resolve('Reports/2024'), '2024')
+        self.assertEqual(len(self.drive.queries), 2)
+        self.assertEqual(self.resolver.resolve('Reports/2024/'), '2024')
+        self.assertEqual(self.resolver.resolve('Reports'), 'reports')
+        self.assertEqual(len(self.drive.queries), 2)
+
+    def test_expired_entries_are_looked_up_again(self):
+        self.resolver.resolve('Reports')
+        with mock.patch.object(path_resolver.time, 'monotonic', return_value=path_resolver.time.monotonic() + 601):
+            self.resolver.resolve('Reports')
+        self.assertEqual(len(self.drive.queries), 2)
+
+    def test_invalidate(self):
+        self.resolver.resolve('Reports/2024')
+        self.resolver.invalidate('Reports/2024')
+        self.resolver.resolve('Reports/2024')
+        self.assertEqual(len(self.drive.queries), 3)
+
+    def test_creates_missing_folders(self):
+        self.assertEqual(self.resolver.resolve('Reports/2025/Spain'), 'created-Spain')
+        self.assertIn(('created-2025', '2025', 'reports'), self.drive.folders)
+        self.assertIsNone(self.resolver.resolve('Reports/2026', create=False))
+
+    def test_keeps_the_oldest_of_folders_created_concurrently(self):
+        def create_folder(name, parent_folder):
+            # Another process creates it first
+            self.drive.folders.append(('other', name, parent_folder[0]))
+            return FakeDrive.create_folder(self.drive, name, parent_folder)
+
+        with mock.patch.object(drive, 'create_folder', create_folder):
+            self.assertEqual(self.resolver.resolve('Reports/2025'), 'other')
+        self.assertEqual(self.drive.trashed, ['created-2025'])
+
+    def test_duplicates_of_shared_drives_are_trashed(self):
+        service = build_drive([({'status': '200'}, '{"id": "created-2025"}')])
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+
+        def create_folder(name, parent_folder):
+            self.drive.folders.append(('other', name, parent_folder[0]))
+            return FakeDrive.create_folder(self.drive, name, parent_folder)
+
+        # The real request, to check its parameters
+        with mock.patch.object(drive, 'create_folder', create_folder), mock.patch.object(drive, 'trash_file', trash_file):
+            self.assertEqual(self.resolver.resolve('Reports/2025'), 'other')
+        uri, method, body = service._http.request_sequence[0][:3]
+        self.assertEqual(method, 'PATCH')
+        self.assertEqual(json.loads(body), {'trashed': True})
+        self.assertIn('/files/created-2025', uri)
+        self.assertEqual(parse_qs(urlparse(uri).query)['supportsAllDrives'], ['true'])
+
+    def test_merges_concurrent_lookups(self):
+        started, release = threading.Event(), threading.Event()
+        iter_files = self.drive.iter_files
+
+        def slow_iter_files(q, **kwargs):
+            started.set()
+            release.wait(5)
+            return iter_files(q, **kwargs)
+
+        with mock.patch.object(drive, 'iter_files', slow_iter_files):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(self.resolver.resolve('Reports')))
+                       for _ in range(4)]
+            threads[0].start()
+            started.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results, ['reports'] * 4)
+        self.assertEqual(len(self.drive.queries), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
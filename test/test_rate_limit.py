@@ -0,0 +1,79 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import rate_limit
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_paced(self):
+        bucket = rate_limit.TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_wait_over_max_wait_takes_nothing(self):
+        bucket = rate_limit.TokenBucket(rate=10, capacity=1)
+        bucket.reserve()
+        self.assertAlmostEqual(bucket.reserve(max_wait=0.01), 0.1, places=2)
+        self.assertAlmostEqual(bucket.available(), 0, places=1)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+
+    def test_acquire_sleeps(self):
+        bucket = rate_limit.TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+    def test_file_bucket_shared(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'bucket.json')
+            first = rate_limit.FileTokenBucket(rate=10, capacity=1, path=path)
+            second = rate_limit.FileTokenBucket(rate=10, capacity=1, path=path)
+            self.assertEqual(first.reserve(), 0)
+            self.assertGreater(second.reserve(max_wait=0), 0.09)
+            self.assertAlmostEqual(second.reserve(), 0.1, delta=0.03)
+
+
+class TestGetLimiter(unittest.TestCase):
+
+    def setUp(self):
+        rate_limit.reset()
+
+    def tearDown(self):
+        rate_limit.reset()
+
+    def test_shared_by_same_api_and_identity(self):
+        sheets = rate_limit.get_limiter('sheets', 'service.json')
+        self.assertIs(sheets, rate_limit.get_limiter('spreadsheets', 'service.json'))
+        self.assertIsNot(sheets, rate_limit.get_limiter('sheets', 'other.json'))
+        self.assertIsNot(sheets, rate_limit.get_limiter('slides', 'service.json'))
+
+    def test_window_never_exceeds_quota(self):
+        limiter = rate_limit.get_limiter('sheets')
+        for bucket in (limiter.read, limiter.write):
+            self.assertLessEqual(bucket.capacity + bucket.rate * 60, 60)
+
+    def test_reads_and_writes_have_separate_quotas(self):
+        limiter = rate_limit.get_limiter('slides')
+        self.assertIsNot(limiter.bucket('GET'), limiter.bucket('POST'))
+        self.assertGreater(limiter.read.capacity, limiter.write.capacity)
+        drive = rate_limit.get_limiter('drive')
+        self.assertIs(drive.bucket('GET'), drive.bucket('POST'))
+
+    def test_short_scripts_do_not_wait(self):
+        limiter = rate_limit.get_limiter('sheets')
+        self.assertEqual([limiter.reserve(method=method) for method in ('GET', 'POST') * 10], [0] * 20)
+
+    def test_disabled(self):
+        with mock.patch.object(rate_limit, 'ENABLED', False):
+            self.assertIsNone(rate_limit.get_limiter('sheets'))
+
+
+if __name__ == '__main__':
+    unittest.main()
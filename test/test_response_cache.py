@@ -0,0 +1,119 @@
+import os
+import json
+import stat
+import tempfile
+import unittest
+from types import SimpleNamespace
+from urllib.parse import urlparse, parse_qs
+
+from googleapiclient.errors import HttpError
+
+from GoogleApiSupport import response_cache
+from test.test_execution import build_drive
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def tearDown(self):
+        response_cache.disable()
+
+    def test_fresh_response_needs_no_request(self):
+        response_cache.enable(freshness=60)
+        service = build_drive([({'status': '200'}, '{"name": "report"}')])
+        for _ in range(3):
+            self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'report'})
+        self.assertEqual(len(service._http.request_sequence), 1)
+
+    def test_revalidates_with_etag(self):
+        response_cache.enable(freshness=0)
+        service = build_drive([({'status': '200', 'etag': '"v1"'}, '{"name": "report"}'),
+                               ({'status': '304'}, '')])
+        sent_headers = []
+        request = service._http.request
+        service._http.request = lambda uri, method, body, headers, **kwargs: (
+            sent_headers.append(dict(headers)) or request(uri, method, body, headers, **kwargs))
+        service.files().get(fileId='file').execute()
+        self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'report'})
+        self.assertEqual(sent_headers[1]['If-None-Match'], '"v1"')
+        self.assertEqual(response_cache.info()['entries'], 1)
+
+    def test_revalidates_drive_file_with_its_version(self):
+        response_cache.enable(freshness=0)
+        service = build_drive([({'status': '200'}, '{"name": "report", "version": "7"}'),
+                               ({'status': '200'}, '{"version": "7"}')])
+        service.files().get(fileId='file', fields='name,version').execute()
+        self.assertEqual(service.files().get(fileId='file', fields='name,version').execute(),
+                         {'name': 'report', 'version': '7'})
+        check_uri = service._http.request_sequence[1][0]
+        self.assertEqual(parse_qs(urlparse(check_uri).query)['fields'], ['version'])
+
+    def test_new_version_is_fetched(self):
+        response_cache.enable(freshness=0)
+        service = build_drive([({'status': '200'}, '{"name": "report", "version": "7"}'),
+                               ({'status': '200'}, '{"version": "8"}'),
+                               ({'status': '200'}, '{"name": "renamed", "version": "8"}')])
+        service.files().get(fileId='file', fields='name,version').execute()
+        self.assertEqual(service.files().get(fileId='file', fields='name,version').execute()['name'], 'renamed')
+
+    def test_writes_drop_the_cached_reads(self):
+        response_cache.enable(freshness=60)
+        service = build_drive([({'status': '200'}, '{"name": "report"}'),
+                               ({'status': '200'}, '{"name": "renamed"}'),
+                               ({'status': '200'}, '{"name": "renamed"}')])
+        service.files().get(fileId='file').execute()
+        service.files().update(fileId='file', body={'name': 'renamed'}).execute()
+        self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'renamed'})
+
+    def test_least_recently_used_are_evicted(self):
+        response_cache.enable(max_entries=2, freshness=60)
+        service = build_drive([({'status': '200'}, json.dumps({'name': name})) for name in 'abca'])
+        for name in 'abca':
+            service.files().get(fileId=name).execute()
+        self.assertEqual(len(service._http.request_sequence), 4)
+
+    def test_impersonated_users_do_not_share_reads(self):
+        response_cache.enable(freshness=60)
+        alice = build_drive([({'status': '200'}, '{"name": "report"}')])
+        bob = build_drive([({'status': '404'}, '{}')])
+        for service, subject in ((alice, 'alice@example.com'), (bob, 'bob@example.com')):
+            service._http.credentials = SimpleNamespace(service_account_email='robot@example.com', _subject=subject,
+                                                        universe_domain='googleapis.com')
+        self.assertEqual(alice.files().get(fileId='file').execute(), {'name': 'report'})
+        with self.assertRaises(HttpError):
+            bob.files().get(fileId='file').execute()
+
+    def test_disk_cache_survives_the_process(self):
+        with tempfile.TemporaryDirectory() as folder:
+            response_cache.enable(freshness=60, path=folder)
+            build_drive([({'status': '200'}, '{"name": "report"}')]).files().get(fileId='file').execute()
+
+            response_cache.enable(freshness=60, path=folder)
+            service = build_drive([])
+            self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'report'})
+
+    def test_disk_cache_is_private_json(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'cache')
+            response_cache.enable(freshness=60, path=path)
+            build_drive([({'status': '200'}, '{"name": "report"}')]).files().get(fileId='file').execute()
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o700)
+            [name] = os.listdir(path)
+            self.assertTrue(name.endswith('.json'))
+            with open(os.path.join(path, name)) as entry_file:
+                self.assertIn('/files/file', json.load(entry_file)['key'][1])
+
+    def test_disk_cache_reads_entries_of_other_processes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            response_cache.enable(freshness=60, path=folder)
+            reader = response_cache._cache
+            response_cache.enable(freshness=60, path=folder)
+            build_drive([({'status': '200'}, '{"name": "report"}')]).files().get(fileId='file').execute()
+
+            response_cache._cache = reader
+            service = build_drive([])
+            self.assertEqual(service.files().get(fileId='file').execute(), {'name': 'report'})
+            self.assertEqual(response_cache.info()['entries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,30 @@
 import unittest
+from unittest import mock
 
+import pandas as pd
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence
+
+from GoogleApiSupport import apis
+from GoogleApiSupport import execution
 from GoogleApiSupport import spreadsheets
 from GoogleApiSupport import drive
 
 TEST_WRITE_FILE_ID = '19Q8y1uR8SD27GiVN200e87ufoMklH2KBh2NfyQTEt9Q'
 TEST_READONLY_FILE_ID = '1cMTfxikXMAgmdVXj3PKuD1fX_vPnQmO5teg15zGarOc'
 
+class TestErrors(unittest.TestCase):
+
+    def test_pandas_to_sheet_errors_reach_the_caller(self):
+        service = build_from_document(apis.get_discovery_json('spreadsheets'),
+                                      http=HttpMockSequence([({'status': '400'}, '{}')]),
+                                      requestBuilder=execution.ApiRequest)
+        with mock.patch('GoogleApiSupport.auth.get_service', return_value=service):
+            with self.assertRaises(HttpError):
+                spreadsheets.pandas_to_sheet('sheet', 'Data', pd.DataFrame({'a': [1]}))
+
+
 class TestsReadOnly(unittest.TestCase):
     def test_get_sheet_names(self):
         """
@@ -0,0 +1,145 @@
+import os
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+from google.auth.exceptions import RefreshError
+
+from GoogleApiSupport import auth
+from GoogleApiSupport import file_lock
+from GoogleApiSupport import rate_limit
+from GoogleApiSupport import token_refresh
+
+
+def utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class FakeCredentials:
+
+    def __init__(self, seconds_left, error=None):
+        self.token = 'token'
+        self.expiry = utcnow() + datetime.timedelta(seconds=seconds_left)
+        self.error = error
+        self.refreshes = 0
+
+    def refresh(self, request):
+        if self.error:
+            raise self.error
+        self.refreshes += 1
+        self.expiry = utcnow() + datetime.timedelta(seconds=3600)
+
+
+class TestBackgroundRefresh(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(token_refresh, '_thread', mock.Mock()).start()
+        mock.patch.dict(token_refresh._watched).start()
+        token_refresh._watched.clear()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_refreshes_tokens_about_to_expire(self):
+        expiring, fresh = FakeCredentials(60), FakeCredentials(500)
+        saved = []
+        token_refresh.watch(expiring, saved.append)
+        token_refresh.watch(fresh)
+        next_refresh = token_refresh.refresh_due(request=None)
+        self.assertEqual((expiring.refreshes, fresh.refreshes), (1, 0))
+        self.assertEqual(saved, [expiring])
+        self.assertAlmostEqual(next_refresh, 500 - token_refresh.REFRESH_MARGIN, delta=5)
+
+    def test_stops_watching_revoked_credentials(self):
+        revoked = FakeCredentials(0, error=RefreshError('invalid_grant'))
+        token_refresh.watch(revoked)
+        token_refresh.refresh_due(request=None)
+        self.assertNotIn(revoked, token_refresh._watched)
+
+    def test_retries_transient_failures_soon(self):
+        offline = FakeCredentials(0, error=OSError('connection reset'))
+        token_refresh.watch(offline)
+        self.assertEqual(token_refresh.refresh_due(request=None), token_refresh.RETRY_DELAY)
+
+
+class TestCredentialsCache(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(token_refresh, 'ENABLED', False).start()
+        self.folder = tempfile.TemporaryDirectory()
+        self.key_path = os.path.join(self.folder.name, 'service_credentials.json')
+        with open(self.key_path, 'w') as key_file:
+            key_file.write('{}')
+        self.load = mock.patch('google.oauth2.service_account.Credentials.from_service_account_file',
+                               side_effect=lambda *args, **kwargs: FakeCredentials(3600)).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        auth._credentials_cache.clear()
+        self.folder.cleanup()
+
+    def test_parses_key_file_once(self):
+        first = auth.get_credentials(self.key_path, scopes=['scope'])
+        self.assertIs(auth.get_credentials(self.key_path, scopes=['scope']), first)
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_parses_again_when_the_file_changes(self):
+        first = auth.get_credentials(self.key_path, scopes=['scope'])
+        modified = os.path.getmtime(self.key_path)
+        os.utime(self.key_path, (modified + 10, modified + 10))
+        self.assertIsNot(auth.get_credentials(self.key_path, scopes=['scope']), first)
+
+    def test_replaced_credentials_are_forgotten(self):
+        mock.patch.object(token_refresh, 'ENABLED', True).start()
+        mock.patch.object(token_refresh, '_thread', mock.Mock()).start()
+        mock.patch.dict(token_refresh._watched).start()
+        first = auth.get_credentials(self.key_path, scopes=['scope'])
+        modified = os.path.getmtime(self.key_path)
+        os.utime(self.key_path, (modified + 10, modified + 10))
+        second = auth.get_credentials(self.key_path, scopes=['scope'])
+        self.assertNotIn(first, token_refresh._watched)
+        self.assertEqual([cached[0] for cached in auth._credentials_cache.values()], [second])
+
+        auth.invalidate_service_cache()
+        self.assertEqual(auth._credentials_cache, {})
+        self.assertNotIn(second, token_refresh._watched)
+
+    def test_services_use_the_credentials_of_a_rotated_key_file(self):
+        auth.invalidate_service_cache()
+        self.addCleanup(auth.invalidate_service_cache)
+        mock.patch.object(rate_limit, 'ENABLED', False).start()
+        with mock.patch.object(auth, 'TRANSPORT', 'session'), mock.patch.object(auth, 'SERVICE_CACHE_TTL', 0):
+            first = auth.get_service('drive', service_credentials_path=self.key_path)
+            modified = os.path.getmtime(self.key_path)
+            os.utime(self.key_path, (modified + 10, modified + 10))
+            second = auth.get_service('drive', service_credentials_path=self.key_path)
+        self.assertIsNot(second._http.credentials, first._http.credentials)
+        self.assertIsNot(second._http.session, first._http.session)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_token_is_saved_atomically(self):
+        token_path = os.path.join(self.folder.name, 'token.json')
+        auth.save_oauth_token(mock.Mock(to_json=lambda: '{"token": "new"}'), token_path)
+        with open(token_path) as token_file:
+            self.assertEqual(token_file.read(), '{"token": "new"}')
+        self.assertEqual(sorted(os.listdir(self.folder.name)),
+                         ['service_credentials.json', 'token.json', 'token.json.lock'])
+
+
+class TestFileLock(unittest.TestCase):
+
+    def test_failed_write_keeps_previous_content(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'token.json')
+            file_lock.write_atomic(path, 'previous')
+            with mock.patch('os.replace', side_effect=OSError):
+                with self.assertRaises(OSError):
+                    file_lock.write_atomic(path, 'new')
+            with open(path) as written:
+                self.assertEqual(written.read(), 'previous')
+            self.assertEqual(os.listdir(folder), ['token.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import gzip
+import threading
+import unittest
+from unittest import mock
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from GoogleApiSupport import transport
+
+CSV = b'country,sales\n' + b'Spain,3\n' * 40000
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the CSV compressed, as Google does for clients accepting gzip."""
+
+    def do_GET(self):
+        body = gzip.compress(CSV)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSessionHttp(unittest.TestCase):
+
+    def test_request_returns_httplib2_response(self):
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(status_code=404, reason='Not Found', content=b'{}',
+                                                 headers={'Content-Type': 'application/json'})
+        response, content = transport.SessionHttp(session).request('https://example.com', 'POST', body='{}')
+
+        session.request.assert_called_once_with('POST', 'https://example.com', data='{}', headers=None,
+                                                allow_redirects=True, timeout=None)
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response['content-type'], 'application/json')
+        self.assertEqual(content, b'{}')
+
+    def test_decoded_bodies_have_their_length(self):
+        from googleapiclient.http import HttpRequest, MediaIoBaseDownload
+
+        server = HTTPServer(('127.0.0.1', 0), GzipHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        session = requests.Session()
+        session.credentials = None
+        http = transport.SessionHttp(session)
+
+        response, content = http.request(f'http://127.0.0.1:{server.server_port}/export.csv')
+        self.assertEqual(content, CSV)
+        self.assertEqual(response['content-length'], str(len(CSV)))
+        self.assertNotIn('content-encoding', response)
+
+        sink = io.BytesIO()
+        request = HttpRequest(http, None, f'http://127.0.0.1:{server.server_port}/export.csv')
+        downloader = MediaIoBaseDownload(sink, request, chunksize=len(CSV) // 2)
+        status, done = downloader.next_chunk()
+        self.assertTrue(done)
+        self.assertEqual(sink.getvalue(), CSV)
+
+    def test_sessions_shared_by_key(self):
+        credentials = mock.Mock()
+        build_session = mock.Mock(side_effect=lambda credentials: mock.Mock(credentials=credentials))
+        with mock.patch.object(transport, 'build_session', build_session):
+            first = transport.get_session_http('key', credentials)
+            second = transport.get_session_http('key', credentials)
+        transport.close_sessions()
+        self.assertIs(first.session, second.session)
+        self.assertEqual(build_session.call_count, 1)
+
+    def test_new_credentials_replace_the_session(self):
+        build_session = mock.Mock(side_effect=lambda credentials: mock.Mock(credentials=credentials))
+        with mock.patch.object(transport, 'build_session', build_session):
+            first = transport.get_session_http('key', mock.Mock())
+            second = transport.get_session_http('key', mock.Mock())
+        transport.close_sessions()
+        self.assertIsNot(first.session, second.session)
+        first.session.close.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from GoogleApiSupport import execution
+from GoogleApiSupport import uploads
+from test.test_execution import build_drive
+
+CHUNK = 256 * 1024
+SESSION = 'https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&upload_id=session'
+
+
+class TestClientInternals(unittest.TestCase):
+    """`upload` resumes sessions through attributes googleapiclient does not document."""
+
+    def test_resumable_request_attributes(self):
+        from googleapiclient.http import MediaIoBaseUpload
+
+        media = MediaIoBaseUpload(io.BytesIO(b'x' * (CHUNK + 1)), 'text/csv', chunksize=CHUNK, resumable=True)
+        request = build_drive([]).files().create(body={}, media_body=media)
+        for name in ('resumable_uri', 'resumable_progress', '_in_error_state'):
+            self.assertTrue(hasattr(request, name), f'HttpRequest.{name} is gone, uploads.upload cannot resume '
+                                                    'with this google-api-python-client')
+
+
+class TestResumableUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'export.csv')
+        with open(self.path, 'wb') as export:
+            export.write(b'x' * (2 * CHUNK + 100))
+        mock.patch.object(uploads, 'SESSION_DIR', os.path.join(self.folder.name, 'sessions')).start()
+        mock.patch.object(execution.time, 'sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.folder.cleanup()
+
+    def use_service(self, responses):
+        service = build_drive(responses)
+        mock.patch('GoogleApiSupport.auth.get_service', return_value=service).start()
+        return service._http
+
+    def upload(self, **kwargs):
+        return uploads.upload('export.csv', local_file_path=self.path, chunk_size=CHUNK, **kwargs)
+
+    def test_failed_chunk_continues_from_the_server_range(self):
+        http = self.use_service([
+            ({'status': '200', 'location': SESSION}, ''),
+            ({'status': '308', 'range': f'bytes=0-{CHUNK - 1}'}, ''),
+            ({'status': '503'}, ''),
+            # Asked how much it got, the server answers the second chunk arrived
+            ({'status': '308', 'range': f'bytes=0-{2 * CHUNK - 1}'}, ''),
+            ({'status': '200'}, json.dumps({'id': 'file'})),
+        ])
+        progress = []
+        self.assertEqual(self.upload(on_progress=lambda sent, total: progress.append(sent)), {'id': 'file'})
+
+        sent_ranges = [headers.get('Content-Range') for _, _, _, headers in http.request_sequence[1:]]
+        self.assertEqual(sent_ranges, [f'bytes 0-{CHUNK - 1}/{2 * CHUNK + 100}',
+                                       f'bytes {CHUNK}-{2 * CHUNK - 1}/{2 * CHUNK + 100}',
+                                       f'bytes */{2 * CHUNK + 100}',
+                                       f'bytes {2 * CHUNK}-{2 * CHUNK + 99}/{2 * CHUNK + 100}'])
+        self.assertEqual(progress, [CHUNK, 2 * CHUNK + 100])
+        self.assertEqual(os.listdir(uploads.SESSION_DIR), [])
+
+    def test_resumes_the_session_of_a_previous_run(self):
+        self.use_service([
+            ({'status': '200', 'location': SESSION}, ''),
+            ({'status': '308', 'range': f'bytes=0-{CHUNK - 1}'}, ''),
+            ({'status': '400'}, ''),
+        ])
+        with self.assertRaises(Exception):
+            self.upload()
+        session_file, = os.listdir(uploads.SESSION_DIR)
+
+        http = self.use_service([
+            ({'status': '308', 'range': f'bytes=0-{CHUNK - 1}'}, ''),
+            ({'status': '308', 'range': f'bytes=0-{2 * CHUNK - 1}'}, ''),
+            ({'status': '200'}, json.dumps({'id': 'file'})),
+        ])
+        self.assertEqual(self.upload(), {'id': 'file'})
+        uri, method, _, headers = http.request_sequence[0]
+        self.assertEqual((uri, method, headers['Content-Range']), (SESSION, 'PUT', f'bytes */{2 * CHUNK + 100}'))
+        self.assertTrue(http.request_sequence[1][3]['Content-Range'].startswith(f'bytes {CHUNK}-'))
+
+    def test_small_files_in_one_request(self):
+        with open(self.path, 'wb') as export:
+            export.write(b'small')
+        http = self.use_service([({'status': '200'}, json.dumps({'id': 'file'}))])
+        self.assertEqual(self.upload(), {'id': 'file'})
+        self.assertIn('uploadType=multipart', http.request_sequence[0][0])
+
+    def test_upload_many_reports_every_file(self):
+        with mock.patch.object(uploads, 'upload', side_effect=[{'id': 'first'}, OSError('disk')]):
+            report = uploads.upload_many([{'file_name': 'first', 'local_file_path': self.path},
+                                          {'file_name': 'second', 'local_file_path': self.path}], max_workers=1)
+        self.assertEqual([result.file for result in report.results], [{'id': 'first'}, None])
+        self.assertIsInstance(report.results[1].error, OSError)
+        self.assertEqual(report.bytes, 2 * CHUNK + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()